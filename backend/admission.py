@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+from db_session import statement_timeout_ms
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - in-memory buckets only
+    aioredis = None
+
+# (methods, path pattern, route class), first match wins; None = not admission controlled.
+# Anything else is "read" for GET/HEAD and "write" otherwise.
+ROUTE_CLASSES = [
+    ({"GET", "HEAD"}, re.compile(r"^/(healthz|livez|readyz|docs|redoc|openapi\.json)"), None),
+    ({"POST"}, re.compile(r"^/debug/profile$"), None),  # admin-only, holds its thread for the capture
+    ({"POST"}, re.compile(r"^/exceptions/(bulk|auto-assign)$"), "bulk"),
+    ({"POST"}, re.compile(r"^/exports$"), "bulk"),
+    ({"GET"}, re.compile(r"^/exceptions/as-of$"), "stream"),
+    ({"GET"}, re.compile(r"^/attachments/by-exception/\d+/bundle\.zip$"), "stream"),
+    ({"POST"}, re.compile(r"^/attachments/bundle$"), "stream"),
+]
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    if method == "OPTIONS":
+        return None  # CORS preflight
+    for methods, pattern, cls in ROUTE_CLASSES:
+        if method in methods and pattern.match(path):
+            return cls
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def client_key(scope: Scope) -> str:
+    """Explicit client id / API key if sent (hashed, so keys never reach Redis), else the peer address."""
+    headers = dict(scope.get("headers") or [])
+    ident = headers.get(b"x-api-key") or headers.get(b"x-client-id")
+    if ident:
+        return "k:" + hashlib.sha1(ident).hexdigest()[:16]
+    if settings.trust_forwarded_for and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class MemoryBuckets:
+    """Token buckets per client in this process: RATE_LIMIT_RPS refill, RATE_LIMIT_BURST capacity."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 50_000):
+        self.rate, self.burst, self.max_clients = rate, burst, max_clients
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str) -> float:
+        """0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - ts) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # a bucket that has refilled completely is the same as no bucket
+        full = self.burst / self.rate
+        for k in [k for k, (_, ts) in self._buckets.items() if now - ts >= full]:
+            del self._buckets[k]
+
+
+# same algorithm as MemoryBuckets, atomically in Redis; the server clock keeps workers consistent
+_REDIS_TAKE = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Shared buckets for several API workers; falls back to the local buckets if Redis is down."""
+
+    def __init__(self, url: str, fallback: MemoryBuckets):
+        self.fallback = fallback
+        self._redis = aioredis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._script = self._redis.register_script(_REDIS_TAKE)
+        self._down_until = 0.0
+
+    async def take(self, key: str) -> float:
+        if time.monotonic() < self._down_until:
+            return self.fallback.take(key)
+        try:
+            return float(await self._script(keys=[f"ems:rl:{key}"], args=[self.fallback.rate, self.fallback.burst]))
+        except Exception as e:
+            print("Rate limiter: Redis unavailable, using local buckets for 30s:", e)
+            self._down_until = time.monotonic() + 30
+            return self.fallback.take(key)
+
+
+def _reject(status: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail}, status_code=status,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Admission control in front of the routes:
+
+    1. per-client token bucket -> 429 + Retry-After when empty
+    2. per-route-class concurrency cap (ADMIT_LIMITS); a request waits up to
+       ADMIT_QUEUE_MS for a slot, then gets 503 + Retry-After
+    3. the class's statement_timeout applied to every DB transaction the
+       request opens (db_session listens on after_begin)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        memory = MemoryBuckets(settings.rate_limit_rps, settings.rate_limit_burst)
+        self.buckets = memory
+        if settings.rate_limit_redis_url:
+            if aioredis is None:
+                print("RATE_LIMIT_REDIS_URL set but redis is not installed; using local buckets.")
+            else:
+                self.buckets = RedisBuckets(settings.rate_limit_redis_url, memory)
+        self.limits = settings.admit_limits
+        self.timeouts = settings.statement_timeouts
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"admitted": 0, "rate_limited": 0, "shed": 0}
+        self.in_flight: Dict[str, int] = {}
+        admission_state["middleware"] = self
+
+    async def _take(self, key: str) -> float:
+        res = self.buckets.take(key)
+        return await res if asyncio.iscoroutine(res) else res
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+        cls = route_class(scope["method"], scope["path"])
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self._take(client_key(scope))
+        if wait > 0:
+            self.stats["rate_limited"] += 1
+            await _reject(429, "Rate limit exceeded", wait)(scope, receive, send)
+            return
+
+        slots = None
+        if self.limits.get(cls):
+            slots = self._slots.get(cls)
+            if slots is None:
+                slots = self._slots[cls] = asyncio.Semaphore(self.limits[cls])
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=settings.admit_queue_ms / 1000)
+            except asyncio.TimeoutError:
+                self.stats["shed"] += 1
+                await _reject(503, f"Server busy ({cls} requests at capacity)", 1)(scope, receive, send)
+                return
+
+        self.stats["admitted"] += 1
+        self.in_flight[cls] = self.in_flight.get(cls, 0) + 1
+        token = statement_timeout_ms.set(self.timeouts.get(cls) or None)
+        try:
+            # streamed bodies are sent inside this call, so the slot is held until they finish
+            await self.app(scope, receive, send)
+        finally:
+            statement_timeout_ms.reset(token)
+            self.in_flight[cls] -= 1
+            if slots is not None:
+                slots.release()
+
+    def status(self) -> dict:
+        return {
+            "enabled": settings.admission_enabled,
+            "buckets": "redis" if isinstance(self.buckets, RedisBuckets) else "memory",
+            "limits": self.limits,
+            "statement_timeouts_ms": self.timeouts,
+            "in_flight": dict(self.in_flight),
+            **self.stats,
+        }
+
+
+# the middleware instance, once Starlette has built the stack (for /debug/admission)
+admission_state: Dict[str, AdmissionMiddleware] = {}
+
+
+async def query_canceled_handler(request: Request, exc: OperationalError):
+    # 57014 = query_canceled, what statement_timeout raises
+    if getattr(exc.orig, "pgcode", None) == "57014":
+        return _reject(503, "Query took too long and was cancelled; narrow the request or retry later", 5)
+    raise exc
@@ -0,0 +1,75 @@
+"""In-memory stand-in for MinIO so the benchmark does not need object storage.
+
+`install()` swaps `storage.s3._client` for a fake that implements the handful
+of S3 calls the routes make. Presigned URLs are still produced by a real
+botocore signer so that cost stays in the measurements.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Dict, Optional
+
+import boto3
+from botocore.client import Config
+from botocore.exceptions import ClientError
+
+from config import settings
+import storage.s3 as s3_module
+
+
+class FakeS3Client:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = set()
+        self._objects: Dict[str, bytes] = {}
+        # real client only used for local URL signing (no network)
+        self._signer = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint,
+            region_name=settings.s3_region or "us-east-1",
+            aws_access_key_id=settings.s3_access_key,
+            aws_secret_access_key=settings.s3_secret_key,
+            config=Config(s3={"addressing_style": "path"}, signature_version="s3v4"),
+        )
+
+    def _missing(self, op: str):
+        return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, op)
+
+    def head_bucket(self, Bucket: str):
+        if Bucket not in self._buckets:
+            raise self._missing("HeadBucket")
+        return {}
+
+    def create_bucket(self, Bucket: str, **kwargs):
+        self._buckets.add(Bucket)
+        return {}
+
+    def put_bucket_cors(self, Bucket: str, CORSConfiguration: dict):
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes = b"", **kwargs):
+        with self._lock:
+            self._objects[Key] = bytes(Body)
+        return {"ETag": '"%s"' % hashlib.md5(Body).hexdigest()}
+
+    def head_object(self, Bucket: str, Key: str):
+        body = self._objects.get(Key)
+        if body is None:
+            raise self._missing("HeadObject")
+        return {"ContentLength": len(body), "ETag": '"%s"' % hashlib.md5(body).hexdigest()}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict, ExpiresIn: int = 600):
+        return self._signer.generate_presigned_url(ClientMethod, Params=Params, ExpiresIn=ExpiresIn)
+
+
+_fake: Optional[FakeS3Client] = None
+
+
+def install() -> FakeS3Client:
+    global _fake
+    if _fake is None:
+        _fake = FakeS3Client()
+        _fake.create_bucket(Bucket=settings.s3_bucket)
+    s3_module._client = lambda: _fake
+    return _fake
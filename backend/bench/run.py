@@ -0,0 +1,264 @@
+"""Drive the EMS API in-process with a realistic operation mix.
+
+    python -m bench.seed --exceptions 50000 --reset
+    python -m bench.run --mix analyst --duration 60 --concurrency 8 --save-baseline analyst
+    python -m bench.run --mix analyst --duration 60 --concurrency 8 --compare analyst
+
+Requests go through the real ASGI app (FastAPI TestClient) against the
+configured Postgres; S3 is replaced by `bench.fake_s3`. Each operation
+reports p50/p95/p99 latency, throughput and the number of SQL statements it
+issued. Exit status is 1 when --compare finds a regression.
+"""
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from bench import fake_s3
+from bench.stats import compare, format_table, summarize
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# operation name -> weight
+MIXES: Dict[str, Dict[str, int]] = {
+    # analysts polling queues and opening items
+    "analyst": {
+        "list_exceptions": 30,
+        "list_exceptions_filtered": 25,
+        "list_attachments": 15,
+        "list_users": 5,
+        "list_exception_types": 5,
+        "assign_exception": 8,
+        "create_exception": 7,
+        "presign_upload": 3,
+        "finalize_upload": 2,
+    },
+    "read_heavy": {
+        "list_exceptions": 40,
+        "list_exceptions_filtered": 40,
+        "list_attachments": 15,
+        "list_users": 5,
+    },
+    "ingest": {
+        "create_exception": 70,
+        "presign_upload": 15,
+        "finalize_upload": 15,
+    },
+    "scheduler": {
+        "escalate_overdue": 1,
+    },
+}
+
+
+class _StatementCounter:
+    """SQL statements per bench operation. TestClient runs the app (and sync
+    routes) on other threads, so each operation is tagged with an
+    X-Bench-Op header; the wrapped app puts that tag in a contextvar, which
+    Starlette copies into the threadpool, and the listener counts under it.
+    Listens on every Engine, so replica reads are counted too."""
+
+    HEADER = b"x-bench-op"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("bench_op", default=None)
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        tag = self._current.get()
+        if tag is not None:
+            with self._lock:
+                self._counts[tag] += 1
+
+    def wrap(self, app):
+        async def tagged(scope, receive, send):
+            tag = dict(scope.get("headers") or []).get(self.HEADER) if scope["type"] == "http" else None
+            token = self._current.set(tag.decode() if tag else None)
+            try:
+                await app(scope, receive, send)
+            finally:
+                self._current.reset(token)
+        return tagged
+
+    def take(self, tag: str) -> int:
+        with self._lock:
+            return self._counts.pop(tag, 0)
+
+
+class Workload:
+    def __init__(self, client: TestClient, rng: random.Random, ids: dict):
+        self.client = client
+        self.rng = rng
+        self.ids = ids
+
+    def _ok(self, resp) -> bool:
+        return resp.status_code < 400
+
+    def list_exceptions(self):
+        return self._ok(self.client.get("/exceptions"))
+
+    def list_exceptions_filtered(self):
+        params = {"status": self.rng.choice(["NEW", "IN_PROGRESS", "ESCALATED", "AWAITING_APPROVAL"])}
+        if self.rng.random() < 0.5:
+            params["type_id"] = self.rng.choice(self.ids["types"])
+        return self._ok(self.client.get("/exceptions", params=params))
+
+    def list_attachments(self):
+        return self._ok(self.client.get(f"/attachments/by-exception/{self.rng.choice(self.ids['exceptions'])}"))
+
+    def list_users(self):
+        return self._ok(self.client.get("/users"))
+
+    def list_exception_types(self):
+        return self._ok(self.client.get("/exception-types"))
+
+    def assign_exception(self):
+        exc_id = self.rng.choice(self.ids["exceptions"])
+        body = {"assigned_to": self.rng.choice(self.ids["users"]), "actor_id": self.rng.choice(self.ids["users"])}
+        return self._ok(self.client.post(f"/exceptions/{exc_id}/assign", json=body))
+
+    def create_exception(self):
+        body = {
+            "type_id": self.rng.choice(self.ids["types"]),
+            "title": "Bench created exception",
+            "severity": self.rng.choice(["LOW", "MEDIUM", "HIGH", "CRITICAL"]),
+            "bu_id": "RETAIL",
+            "created_by": self.rng.choice(self.ids["users"]),
+            "priority": self.rng.randint(1, 5),
+        }
+        resp = self.client.post("/exceptions", json=body)
+        if resp.status_code == 201:
+            self.ids["exceptions"].append(resp.json()["id"])
+        return self._ok(resp)
+
+    def presign_upload(self):
+        body = {"exception_id": self.rng.choice(self.ids["exceptions"]), "filename": "swift_mt103.pdf",
+                "mime": "application/pdf"}
+        resp = self.client.post("/attachments/presign-upload", json=body)
+        if resp.status_code < 400:
+            out = resp.json()
+            fake_s3.install().put_object(Bucket="", Key=out["key"], Body=b"%PDF-1.4 bench" * 64)
+            self.ids["pending_attachments"].append(out["attachment_id"])
+        return self._ok(resp)
+
+    def finalize_upload(self):
+        if not self.ids["pending_attachments"]:
+            return self.presign_upload()
+        att_id = self.ids["pending_attachments"].pop()
+        return self._ok(self.client.post("/attachments/finalize", json={"attachment_id": att_id}))
+
+    def escalate_overdue(self):
+        from scheeduler import escalate_overdue
+        escalate_overdue()
+        return True
+
+
+def _load_ids(engine) -> dict:
+    with engine.connect() as conn:
+        exc = conn.execute(text("SELECT id FROM exceptions ORDER BY random() LIMIT 5000")).scalars().all()
+        users = conn.execute(text("SELECT id FROM users ORDER BY id LIMIT 1000")).scalars().all()
+        types = conn.execute(text("SELECT id FROM exception_types ORDER BY id")).scalars().all()
+    if not (exc and users and types):
+        raise SystemExit("Database is empty; run `python -m bench.seed` first.")
+    return {"exceptions": list(exc), "users": list(users), "types": list(types), "pending_attachments": []}
+
+
+def run(mix: str, duration: float, concurrency: int, max_ops: int = 0, random_seed: int = 7) -> dict:
+    fake_s3.install()
+    from db import engine
+    from main import app
+
+    counter = _StatementCounter()
+    ids = _load_ids(engine)
+    weights = MIXES[mix]
+    names, w = list(weights), list(weights.values())
+
+    samples: Dict[str, List[tuple]] = defaultdict(list)
+    lock = threading.Lock()
+    done = 0
+    deadline = time.perf_counter() + duration
+
+    def worker(n: int):
+        nonlocal done
+        rng = random.Random(random_seed + n)
+        # one client id per worker, so admission control (if enabled) sees separate clients
+        client = TestClient(counter.wrap(app), raise_server_exceptions=False, headers={"X-Client-Id": f"bench-{n}"})
+        load = Workload(client, rng, ids)
+        seq = 0
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_ops and done >= max_ops:
+                    return
+                done += 1
+            op = rng.choices(names, weights=w, k=1)[0]
+            fn: Callable[[], bool] = getattr(load, op)
+            seq += 1
+            tag = f"{n}:{seq}"
+            client.headers["X-Bench-Op"] = tag
+            t0 = time.perf_counter()
+            try:
+                ok = fn()
+            except Exception as e:  # keep the run going, count as error
+                print("ERR", op, e, file=sys.stderr)
+                ok = False
+            latency = time.perf_counter() - t0
+            with lock:
+                samples[op].append((latency, counter.take(tag), ok))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report = summarize(samples, time.perf_counter() - started)
+    report.update({"mix": mix, "concurrency": concurrency})
+    return report
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="EMS API load benchmark")
+    p.add_argument("--mix", choices=sorted(MIXES), default="analyst")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    p.add_argument("--max-ops", type=int, default=0, help="stop after N operations (0 = no limit)")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--output", help="write JSON report to this path")
+    p.add_argument("--save-baseline", metavar="NAME", help="store report as bench/baselines/NAME.json")
+    p.add_argument("--compare", metavar="NAME", help="compare against bench/baselines/NAME.json")
+    p.add_argument("--tolerance", type=float, default=0.15, help="allowed p95 regression (fraction)")
+    args = p.parse_args(argv)
+
+    report = run(args.mix, args.duration, args.concurrency, args.max_ops)
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+    print(format_table(report, baseline))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        (BASELINE_DIR / f"{args.save_baseline}.json").write_text(json.dumps(report, indent=2))
+        print(f"baseline saved: {args.save_baseline}")
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for r in regressions:
+            print("REGRESSION", r)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
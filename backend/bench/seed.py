@@ -0,0 +1,207 @@
+"""Seed a local Postgres with synthetic EMS data for benchmarking.
+
+    python -m bench.seed --exceptions 50000 --audit-per-exception 4 --attachments-per-exception 1 --reset
+
+Rows carry what the app itself writes: urgency_at, approval_requested_at on
+AWAITING_APPROVAL rows, and a chained audit trail starting with CREATED.
+
+Run `alembic upgrade head` first, or pass --create-schema on a scratch database.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import pkgutil
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, insert, text, update
+
+from db import engine
+import models as models_pkg
+from models.base import Base
+from models.user import User
+from models.exception_type import ExceptionType
+from models.exception import Exception as ExceptionModel
+from models.audit_event import AuditEvent
+from models.attachment import Attachment
+from services.audit_chain import chain
+from services.history import state_of
+from services.queue import compute_urgency_at
+
+CHUNK = 5000
+
+STATUSES = [
+    ("NEW", 30), ("TRIAGED", 15), ("IN_PROGRESS", 25), ("AWAITING_APPROVAL", 10),
+    ("ESCALATED", 5), ("RESOLVED", 5), ("CLOSED", 10),
+]
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+BUS = ["RETAIL", "CORPORATE", "TREASURY", "CARDS", "PAYMENTS"]
+
+
+def _load_models():
+    for _, name, _ in pkgutil.iter_modules(models_pkg.__path__):
+        importlib.import_module(f"{models_pkg.__name__}.{name}")
+
+
+def _chunks(rows, size=CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _weighted_status(rng: random.Random) -> str:
+    names, weights = zip(*STATUSES)
+    return rng.choices(names, weights=weights, k=1)[0]
+
+
+def seed(
+    exceptions: int = 10000,
+    users: int = 200,
+    types: int = 20,
+    audit_per_exception: int = 3,
+    attachments_per_exception: float = 0.5,
+    overdue_ratio: float = 0.1,
+    reset: bool = False,
+    create_schema: bool = False,
+    random_seed: int = 42,
+) -> dict:
+    rng = random.Random(random_seed)
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    _load_models()
+    if create_schema:
+        Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        if reset:
+            conn.execute(text(
+                "TRUNCATE attachments, approvals, audit_events, exceptions, exception_types, users "
+                "RESTART IDENTITY CASCADE"
+            ))
+
+        user_ids = conn.execute(insert(User).returning(User.id), [
+            {"username": f"bench_user_{i}", "email": f"bench_user_{i}@example.com",
+             "full_name": f"Bench User {i}", "is_active": rng.random() > 0.05}
+            for i in range(users)
+        ]).scalars().all()
+
+        type_ids = conn.execute(insert(ExceptionType).returning(ExceptionType.id), [
+            {"code": f"BENCH_{i}", "name": f"Bench type {i}",
+             "default_sla_hours": rng.choice([4, 24, 48, 72]), "approval_levels": rng.choice([1, 1, 2])}
+            for i in range(types)
+        ]).scalars().all()
+
+        exc_rows, histories = [], []
+        for i in range(exceptions):
+            created = now - timedelta(hours=rng.uniform(0, 24 * 60))
+            if rng.random() < overdue_ratio:
+                due = now - timedelta(minutes=rng.uniform(1, 600))
+            else:
+                due = now + timedelta(hours=rng.uniform(1, 96))
+            severity, priority = rng.choice(SEVERITIES), rng.randint(1, 5)
+            status = _weighted_status(rng)
+            # later events happen between creation and now, in order
+            times = sorted(created + (now - created) * rng.random() for _ in range(max(audit_per_exception - 1, 1)))
+            row = {
+                "type_id": rng.choice(type_ids),
+                "title": f"Bench exception {i}",
+                "description": "Synthetic exception for benchmarking",
+                "severity": severity,
+                "bu_id": rng.choice(BUS),
+                "created_by": rng.choice(user_ids),
+                "assigned_to": rng.choice(user_ids) if rng.random() < 0.8 else None,
+                "status": status,
+                "priority": priority,
+                "due_at": due,
+                "urgency_at": compute_urgency_at(due, priority, severity),
+                "approval_requested_at": times[0] if status == "AWAITING_APPROVAL" else None,
+                "created_at": created.replace(tzinfo=None),
+                "updated_at": created.replace(tzinfo=None),
+            }
+            exc_rows.append(row)
+            histories.append((created, times))
+        exc_ids = []
+        for chunk in _chunks(exc_rows):
+            exc_ids.extend(conn.execute(insert(ExceptionModel).returning(ExceptionModel.id), chunk).scalars().all())
+
+        # the audit trail the app would have written: CREATED (status NEW), the status change, then
+        # reassignments ending at the current assignee; chained so verification and as-of replay hold
+        audit_rows, heads = [], []
+        for exc_id, row, (created, times) in zip(exc_ids, exc_rows, histories):
+            hops = [rng.choice(user_ids) for _ in range(max(audit_per_exception - 2, 0))] + [row["assigned_to"]]
+            initial = {**row, "id": exc_id, "status": "NEW", "assigned_to": hops[0]}
+            events = [{"at": created, "actor_id": row["created_by"], "action": "CREATED", "old": None,
+                       "new": state_of(initial)}]
+            if row["status"] != "NEW":
+                events.append({"at": times[0], "action": "STATUS_CHANGED",
+                               "old": {"status": "NEW"}, "new": {"status": row["status"]}})
+            for at, (old_user, new_user) in zip(times, zip(hops, hops[1:])):
+                events.append({"at": at, "action": "ASSIGNED",
+                               "old": {"assigned_to": old_user}, "new": {"assigned_to": new_user}})
+            events.sort(key=lambda ev: ev["at"])
+            head = None
+            for ev in events:
+                ev.update(entity_type="exception", entity_id=exc_id)
+                ev.setdefault("actor_id", rng.choice(user_ids))
+                head = chain(ev, head)
+            audit_rows.extend(events)
+            heads.append({"b_id": exc_id, "b_head": head})
+        for chunk in _chunks(audit_rows):
+            conn.execute(insert(AuditEvent), chunk)
+        t = ExceptionModel.__table__
+        for chunk in _chunks(heads):
+            conn.execute(update(t).where(t.c.id == bindparam("b_id")).values(audit_head=bindparam("b_head")), chunk)
+
+        att_rows = []
+        for exc_id in exc_ids:
+            n = int(attachments_per_exception) + (1 if rng.random() < attachments_per_exception % 1 else 0)
+            for j in range(n):
+                att_rows.append({
+                    "exception_id": exc_id, "filename": f"statement_{j}.pdf", "mime": "application/pdf",
+                    "s3_key": f"exceptions/{exc_id}/bench{j}_statement_{j}.pdf",
+                    "size": rng.randint(10_000, 2_000_000), "uploaded_by": rng.choice(user_ids),
+                })
+        for chunk in _chunks(att_rows):
+            conn.execute(insert(Attachment), chunk)
+
+        conn.execute(text("ANALYZE"))
+
+    return {
+        "users": len(user_ids),
+        "exception_types": len(type_ids),
+        "exceptions": len(exc_ids),
+        "audit_events": len(audit_rows),
+        "attachments": len(att_rows),
+        "seconds": round(time.perf_counter() - started, 2),
+        "user_ids": user_ids,
+        "type_ids": type_ids,
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Seed EMS database with benchmark data")
+    p.add_argument("--exceptions", type=int, default=10000)
+    p.add_argument("--users", type=int, default=200)
+    p.add_argument("--types", type=int, default=20)
+    p.add_argument("--audit-per-exception", type=int, default=3)
+    p.add_argument("--attachments-per-exception", type=float, default=0.5)
+    p.add_argument("--overdue-ratio", type=float, default=0.1)
+    p.add_argument("--reset", action="store_true", help="truncate domain tables first")
+    p.add_argument("--create-schema", action="store_true", help="create tables from models (scratch DBs only)")
+    p.add_argument("--random-seed", type=int, default=42)
+    args = p.parse_args(argv)
+    out = seed(
+        exceptions=args.exceptions, users=args.users, types=args.types,
+        audit_per_exception=args.audit_per_exception,
+        attachments_per_exception=args.attachments_per_exception,
+        overdue_ratio=args.overdue_ratio, reset=args.reset,
+        create_schema=args.create_schema, random_seed=args.random_seed,
+    )
+    out.pop("user_ids"), out.pop("type_ids")
+    print("Seeded:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Import-time budget for API workers.
+
+    python -m bench.startup                        # fail if over the default budget
+    python -m bench.startup --budget-ms 900 --runs 7
+    python -m bench.startup --save-baseline startup
+    python -m bench.startup --compare startup --tolerance 0.2
+
+Each run imports `main` (which builds the app) in a fresh interpreter and
+reports wall time, so nothing is cached between runs apart from .pyc files.
+It also fails if any of LAZY_MODULES was loaded: those are imported on first
+use (S3, the scheduler, webhooks, SLA math) and must stay off the boot path.
+Exit status is 1 on any failure.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+LAZY_MODULES = ("boto3", "botocore", "apscheduler", "httpx", "numpy", "dotenv", "pyarrow", "PIL", "pypdf")
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import main
+elapsed = (time.perf_counter() - t) * 1000
+loaded = [m for m in {lazy!r} if m in sys.modules and type(sys.modules[m]).__name__ != "_LazyModule"]
+print(json.dumps({{"import_ms": elapsed, "modules": len(sys.modules), "loaded": loaded}}))
+"""
+
+
+def probe(env: dict | None = None) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(lazy=LAZY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> dict:
+    probe()  # warm .pyc files and the OS page cache
+    samples = [probe() for _ in range(runs)]
+    times = sorted(s["import_ms"] for s in samples)
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(times), 1),
+        "import_ms_min": round(times[0], 1),
+        "import_ms_max": round(times[-1], 1),
+        "modules": samples[-1]["modules"],
+        "lazy_loaded": sorted({m for s in samples for m in s["loaded"]}),
+    }
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="EMS API startup-time budget")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--budget-ms", type=float, default=1200.0, help="max median import time of main")
+    p.add_argument("--save-baseline", metavar="NAME", help="store report as bench/baselines/NAME.json")
+    p.add_argument("--compare", metavar="NAME", help="compare against bench/baselines/NAME.json")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed median regression (fraction)")
+    args = p.parse_args(argv)
+
+    report = measure(args.runs)
+    print(json.dumps(report, indent=2))
+    failures = []
+    if report["import_ms_median"] > args.budget_ms:
+        failures.append(f"median import {report['import_ms_median']} ms > budget {args.budget_ms} ms")
+    if report["lazy_loaded"]:
+        failures.append(f"imported at startup but should be lazy: {', '.join(report['lazy_loaded'])}")
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        limit = baseline["import_ms_median"] * (1 + args.tolerance)
+        if report["import_ms_median"] > limit:
+            failures.append(
+                f"median import {report['import_ms_median']} ms > baseline "
+                f"{baseline['import_ms_median']} ms +{args.tolerance:.0%}"
+            )
+    if args.save_baseline:
+        (BASELINE_DIR / f"{args.save_baseline}.json").write_text(json.dumps(report, indent=2))
+        print(f"baseline saved: {args.save_baseline}")
+    for f in failures:
+        print("FAIL:", f)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
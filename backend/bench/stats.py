@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank, matches what most load tools report
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: Dict[str, List[tuple]], elapsed: float) -> dict:
+    """samples: op name -> list of (latency_seconds, statements, ok)."""
+    ops = {}
+    total = 0
+    for op, rows in sorted(samples.items()):
+        lat = sorted(r[0] * 1000.0 for r in rows)
+        stmts = [r[1] for r in rows]
+        errors = sum(1 for r in rows if not r[2])
+        total += len(rows)
+        ops[op] = {
+            "count": len(rows),
+            "errors": errors,
+            "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(lat, 50), 3),
+            "p95_ms": round(percentile(lat, 95), 3),
+            "p99_ms": round(percentile(lat, 99), 3),
+            "mean_ms": round(sum(lat) / len(lat), 3) if lat else 0.0,
+            "statements_per_op": round(sum(stmts) / len(stmts), 2) if stmts else 0.0,
+        }
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total_ops": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "operations": ops,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15) -> List[str]:
+    """Return human readable regressions (p95 latency / statement count) beyond tolerance."""
+    regressions = []
+    for op, cur in current.get("operations", {}).items():
+        base: Optional[dict] = baseline.get("operations", {}).get(op)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{op}: p95 {cur['p95_ms']}ms vs baseline {base['p95_ms']}ms "
+                f"(+{(cur['p95_ms'] / base['p95_ms'] - 1) * 100:.1f}%)"
+            )
+        if cur["statements_per_op"] > base["statements_per_op"] + 0.5:
+            regressions.append(
+                f"{op}: {cur['statements_per_op']} statements/op vs baseline {base['statements_per_op']}"
+            )
+    return regressions
+
+
+def format_table(report: dict, baseline: Optional[dict] = None) -> str:
+    head = f"{'operation':<28}{'count':>8}{'err':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'stmts':>8}"
+    if baseline:
+        head += f"{'Δp95':>9}"
+    lines = [head, "-" * len(head)]
+    for op, s in report["operations"].items():
+        line = (f"{op:<28}{s['count']:>8}{s['errors']:>6}{s['throughput_rps']:>10}"
+                f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['statements_per_op']:>8}")
+        base = (baseline or {}).get("operations", {}).get(op)
+        if base and base["p95_ms"]:
+            line += f"{(s['p95_ms'] / base['p95_ms'] - 1) * 100:>+8.1f}%"
+        lines.append(line)
+    lines.append(f"total: {report['total_ops']} ops in {report['elapsed_s']}s ({report['throughput_rps']} ops/s)")
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Cache-Control per route name; GET/HEAD routes not listed get DEFAULT_POLICY.
+# "no-cache" still lets clients keep the body and revalidate with If-None-Match.
+DEFAULT_POLICY = "no-store"
+CACHE_POLICIES = {
+    "list_exceptions": "private, no-cache",
+    "list_users": "private, no-cache",
+    "list_exception_types": "private, max-age=60, must-revalidate",
+    "list_for_exception": "private, no-cache",
+}
+
+_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def collection_etag(db: Session, model, *criteria, key: str = "", extra: tuple = ()) -> str:
+    """Strong ETag for a filtered collection from a single aggregate row.
+
+    count + max(id) catch inserts/deletes, max(updated_at) catches edits; `extra`
+    adds aggregates for tables without updated_at. `key` separates different
+    filters/representations (route name + query string).
+    """
+    cols = [func.count(), func.max(model.id)]
+    if hasattr(model, "updated_at"):
+        cols.append(func.max(model.updated_at))
+    cols.extend(extra)
+    row = db.query(*cols).filter(*criteria).one()
+    digest = hashlib.sha1(f"{key}|{tuple(row)!r}".encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def strip_etag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(strip_etag(t) == etag for t in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def with_etag(result: Any, response: Response, etag: str) -> Any:
+    # routes either return a ready Response (fast path) or data for the response_model
+    target = result if isinstance(result, Response) else response
+    target.headers["ETag"] = etag
+    return result
+
+
+def conditional(request: Request, db: Session, model, *criteria, extra: tuple = ()) -> tuple[str, Optional[Response]]:
+    route = request.scope.get("route")
+    key = f"{getattr(route, 'name', request.url.path)}?{request.url.query}"
+    etag = collection_etag(db, model, *criteria, key=key, extra=extra)
+    return etag, (not_modified(etag) if is_fresh(request, etag) else None)
+
+
+class CacheControlMiddleware:
+    def __init__(self, app: ASGIApp, policies: Optional[dict] = None, default: str = DEFAULT_POLICY):
+        self.app = app
+        self.policies = CACHE_POLICIES if policies is None else policies
+        self.default = default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if "cache-control" not in headers:
+                    route = scope.get("route")
+                    headers["Cache-Control"] = self.policies.get(getattr(route, "name", None), self.default)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 from pydantic import BaseModel
-from dotenv import load_dotenv
 from pathlib import Path
 import os
 
-# Always load .env from the repo root (../.env relative to this file)
+# Always load .env from the repo root (../.env relative to this file).
+# Deployments that inject the environment skip it (and the dotenv import) with EMS_DOTENV=0.
 ROOT_ENV = Path(__file__).resolve().parents[1].parent / ".env"
-if ROOT_ENV.exists():
+if os.getenv("EMS_DOTENV", "1") not in {"0", "false", "FALSE"} and ROOT_ENV.exists():
+    from dotenv import load_dotenv
+
     load_dotenv(ROOT_ENV)
 
 def _clean(val: str, default: str) -> str:
@@ -17,6 +19,15 @@ def _clean(val: str, default: str) -> str:
         return default
     return val
 
+def _pairs(raw: str) -> dict:
+    # "read=64,write=32" -> {"read": 64, "write": 32}
+    out = {}
+    for part in raw.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            out[name.strip().lower()] = int(value)
+    return out
+
 class Settings(BaseModel):
     db_user: str = _clean(os.getenv("PGUSER"), "postgres")
     db_password: str = _clean(os.getenv("PGPASSWORD"), "password")
@@ -33,6 +44,150 @@ class Settings(BaseModel):
     s3_secure: bool = os.getenv("S3_SECURE", "false").lower() == "true"
     frontend_origin: str = _clean(os.getenv("FRONTEND_ORIGIN"), "http://localhost:5173")
 
+    # comma separated route names served via serialization.FastJSONResponse ("*" = all, "off" = none)
+    fast_serialization_routes: str = _clean(
+        os.getenv("FAST_SERIALIZATION_ROUTES"),
+        "list_exceptions,list_users,list_exception_types,list_for_exception",
+    )
+
+    # response compression (gzip, or brotli when the package is installed)
+    compression_min_size: int = int(_clean(os.getenv("COMPRESSION_MIN_SIZE"), "1024"))
+    gzip_level: int = int(_clean(os.getenv("GZIP_LEVEL"), "6"))
+    brotli_quality: int = int(_clean(os.getenv("BROTLI_QUALITY"), "4"))
+
+    # auto-assignment of new / escalated exceptions (services.assignment)
+    auto_assign: bool = os.getenv("EMS_AUTO_ASSIGN", "0") in {"1", "true", "TRUE"}
+    assignment_refresh_seconds: int = int(_clean(os.getenv("ASSIGNMENT_REFRESH_SECONDS"), "300"))
+    bulk_ingest_max: int = int(_clean(os.getenv("BULK_INGEST_MAX"), "10000"))
+
+    # read replicas: comma separated DSNs; read-only routes go there while lag is acceptable
+    replica_urls_raw: str = _clean(os.getenv("PG_REPLICA_URLS"), "")
+    replica_max_lag_seconds: float = float(_clean(os.getenv("REPLICA_MAX_LAG_SECONDS"), "5"))
+    replica_lag_check_seconds: float = float(_clean(os.getenv("REPLICA_LAG_CHECK_SECONDS"), "2"))
+    replica_connect_timeout_seconds: int = int(_clean(os.getenv("REPLICA_CONNECT_TIMEOUT_SECONDS"), "2"))
+
+    # hot/cold split: CLOSED exceptions older than this move to the *_archive tables
+    archive_enabled: bool = os.getenv("EMS_ARCHIVE", "1") in {"1", "true", "TRUE"}
+    archive_after_days: int = int(_clean(os.getenv("ARCHIVE_AFTER_DAYS"), "90"))
+    archive_batch_size: int = int(_clean(os.getenv("ARCHIVE_BATCH_SIZE"), "1000"))
+    archive_max_batches: int = int(_clean(os.getenv("ARCHIVE_MAX_BATCHES"), "50"))
+
+    # default SLA warning tiers (% of SLA elapsed) for types without their own
+    sla_warning_tiers_raw: str = _clean(os.getenv("SLA_WARNING_TIERS"), "50,80,100")
+
+    # point-in-time reads (services.history): snapshots bound how many audit events a read replays
+    snapshot_interval_hours: float = float(_clean(os.getenv("SNAPSHOT_INTERVAL_HOURS"), "24"))
+    snapshot_batch_size: int = int(_clean(os.getenv("SNAPSHOT_BATCH_SIZE"), "5000"))
+    asof_chunk_size: int = int(_clean(os.getenv("ASOF_CHUNK_SIZE"), "500"))
+
+    # async report exports (services.exports); 0 workers = run them with `python -m services.exports`
+    export_workers: int = int(_clean(os.getenv("EXPORT_WORKERS"), "2"))
+    export_poll_seconds: float = float(_clean(os.getenv("EXPORT_POLL_SECONDS"), "5"))
+    export_batch_rows: int = int(_clean(os.getenv("EXPORT_BATCH_ROWS"), "5000"))
+    export_part_size_mb: int = int(_clean(os.getenv("EXPORT_PART_SIZE_MB"), "8"))
+    export_url_expires_seconds: int = int(_clean(os.getenv("EXPORT_URL_EXPIRES_SECONDS"), "3600"))
+    export_stale_seconds: int = int(_clean(os.getenv("EXPORT_STALE_SECONDS"), "300"))
+    export_max_attempts: int = int(_clean(os.getenv("EXPORT_MAX_ATTEMPTS"), "3"))
+
+    # content-addressed attachments (services.blobs): unreferenced blobs are deleted after this grace period
+    blob_gc_grace_hours: float = float(_clean(os.getenv("BLOB_GC_GRACE_HOURS"), "24"))
+    blob_gc_batch_size: int = int(_clean(os.getenv("BLOB_GC_BATCH_SIZE"), "500"))
+
+    # streaming ZIP bundles (services.bundles): memory ~ prefetch x buffer chunks x chunk size
+    bundle_prefetch: int = int(_clean(os.getenv("BUNDLE_PREFETCH"), "4"))
+    bundle_chunk_kb: int = int(_clean(os.getenv("BUNDLE_CHUNK_KB"), "256"))
+    bundle_buffer_chunks: int = int(_clean(os.getenv("BUNDLE_BUFFER_CHUNKS"), "8"))
+    bundle_max_exceptions: int = int(_clean(os.getenv("BUNDLE_MAX_EXCEPTIONS"), "500"))
+
+    # attachment previews (services.previews): claimer threads feed a process pool; 0 workers = `python -m services.previews`
+    preview_workers: int = int(_clean(os.getenv("PREVIEW_WORKERS"), "2"))
+    preview_processes: int = int(_clean(os.getenv("PREVIEW_PROCESSES"), "2"))
+    preview_poll_seconds: float = float(_clean(os.getenv("PREVIEW_POLL_SECONDS"), "5"))
+    preview_max_mb: int = int(_clean(os.getenv("PREVIEW_MAX_MB"), "50"))
+    preview_thumb_px: int = int(_clean(os.getenv("PREVIEW_THUMB_PX"), "512"))
+    preview_text_pages: int = int(_clean(os.getenv("PREVIEW_TEXT_PAGES"), "20"))
+    preview_text_max_chars: int = int(_clean(os.getenv("PREVIEW_TEXT_MAX_CHARS"), "200000"))
+    preview_timeout_seconds: float = float(_clean(os.getenv("PREVIEW_TIMEOUT_SECONDS"), "120"))
+    preview_stale_seconds: int = int(_clean(os.getenv("PREVIEW_STALE_SECONDS"), "600"))
+    preview_max_attempts: int = int(_clean(os.getenv("PREVIEW_MAX_ATTEMPTS"), "3"))
+
+    # admission control (admission.py): per-client token buckets, per-route-class concurrency caps,
+    # per-class statement_timeout in ms (0 = none). Caps are per API process. Off by default: behind a
+    # load balancer every client shares the proxy's address unless TRUST_FORWARDED_FOR is set
+    admission_enabled: bool = os.getenv("EMS_ADMISSION", "0") in {"1", "true", "TRUE"}
+    rate_limit_rps: float = float(_clean(os.getenv("RATE_LIMIT_RPS"), "20"))
+    rate_limit_burst: int = int(_clean(os.getenv("RATE_LIMIT_BURST"), "60"))
+    rate_limit_redis_url: str = _clean(os.getenv("RATE_LIMIT_REDIS_URL"), "")  # shared buckets across workers
+    trust_forwarded_for: bool = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+    admit_limits_raw: str = _clean(os.getenv("ADMIT_LIMITS"), "read=64,write=32,bulk=4,stream=8")
+    admit_queue_ms: int = int(_clean(os.getenv("ADMIT_QUEUE_MS"), "250"))
+    statement_timeouts_raw: str = _clean(os.getenv("STATEMENT_TIMEOUTS_MS"), "read=5000,write=10000,bulk=60000,stream=0")
+
+    # startup (main.create_app): warm pools and caches before the worker takes traffic
+    warmup_enabled: bool = os.getenv("EMS_WARMUP", "1") in {"1", "true", "TRUE"}
+    warmup_connections: int = int(_clean(os.getenv("WARMUP_CONNECTIONS"), "2"))
+
+    # health probes (health.py): dependency checks run in the background, probes read the cached result
+    health_interval_seconds: float = float(_clean(os.getenv("HEALTH_INTERVAL_SECONDS"), "5"))
+    health_timeout_seconds: float = float(_clean(os.getenv("HEALTH_TIMEOUT_SECONDS"), "2"))
+    health_pool_saturation: float = float(_clean(os.getenv("HEALTH_POOL_SATURATION"), "0.95"))
+    health_require_s3: bool = os.getenv("HEALTH_REQUIRE_S3", "true").lower() == "true"
+
+    # duplicate detection (services.dedupe): Bloom prefilter in front of the fingerprint index
+    dedupe_bloom_capacity: int = int(_clean(os.getenv("DEDUPE_BLOOM_CAPACITY"), "1000000"))
+    dedupe_bloom_error: float = float(_clean(os.getenv("DEDUPE_BLOOM_ERROR"), "0.01"))
+    dedupe_bloom_refresh_seconds: int = int(_clean(os.getenv("DEDUPE_BLOOM_REFRESH_SECONDS"), "300"))
+
+    # user directory cache (services.directory): names for `expand=users` without a lookup per row
+    user_directory_refresh_seconds: int = int(_clean(os.getenv("USER_DIRECTORY_REFRESH_SECONDS"), "60"))
+
+    # admin-only /debug routes (profiling.require_admin); empty = those routes answer 404
+    admin_token: str = _clean(os.getenv("EMS_ADMIN_TOKEN"), "")
+    profile_max_seconds: float = float(_clean(os.getenv("PROFILE_MAX_SECONDS"), "120"))
+    profile_interval_ms: float = float(_clean(os.getenv("PROFILE_INTERVAL_MS"), "10"))
+
+    # notifications (services.notifications): per-recipient digests sent by a small async worker pool
+    notify_enabled: bool = os.getenv("EMS_NOTIFY", "1") in {"1", "true", "TRUE"}
+    notify_transports_raw: str = _clean(os.getenv("NOTIFY_TRANSPORTS"), "log")  # log, smtp, webhook
+    notify_digest_seconds: float = float(_clean(os.getenv("NOTIFY_DIGEST_SECONDS"), "60"))
+    notify_workers: int = int(_clean(os.getenv("NOTIFY_WORKERS"), "4"))
+    notify_queue_max: int = int(_clean(os.getenv("NOTIFY_QUEUE_MAX"), "500"))
+    notify_max_retries: int = int(_clean(os.getenv("NOTIFY_MAX_RETRIES"), "5"))
+    notify_backoff_seconds: float = float(_clean(os.getenv("NOTIFY_BACKOFF_SECONDS"), "1"))
+    notify_fallback_to: str = _clean(os.getenv("NOTIFY_FALLBACK_TO"), "ems-ops@localhost")
+    notify_approvals_to: str = _clean(os.getenv("NOTIFY_APPROVALS_TO"), "ems-approvers@localhost")
+    notify_webhook_url: str = _clean(os.getenv("NOTIFY_WEBHOOK_URL"), "")
+    smtp_host: str = _clean(os.getenv("SMTP_HOST"), "127.0.0.1")
+    smtp_port: int = int(_clean(os.getenv("SMTP_PORT"), "1025"))  # mailhog in infra/docker-compose.yml
+    smtp_from: str = _clean(os.getenv("SMTP_FROM"), "ems@localhost")
+    smtp_user: str = _clean(os.getenv("SMTP_USER"), "")
+    smtp_password: str = _clean(os.getenv("SMTP_PASSWORD"), "")
+    smtp_starttls: bool = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+
+    @property
+    def notify_transports(self) -> list:
+        return [t.strip().lower() for t in self.notify_transports_raw.split(",") if t.strip()]
+
+    @property
+    def sla_warning_tiers(self) -> list:
+        return [int(t) for t in self.sla_warning_tiers_raw.split(",") if t.strip()]
+
+    @property
+    def admit_limits(self) -> dict:
+        return _pairs(self.admit_limits_raw)
+
+    @property
+    def statement_timeouts(self) -> dict:
+        return _pairs(self.statement_timeouts_raw)
+
+    @property
+    def replica_urls(self) -> list:
+        return [u.strip() for u in self.replica_urls_raw.split(",") if u.strip()]
+
+    @property
+    def fast_serialization(self) -> set:
+        return {r.strip() for r in self.fast_serialization_routes.split(",") if r.strip()}
+
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
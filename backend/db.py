@@ -1,13 +1,150 @@
+import itertools
+import os
+import threading
+import time
+from typing import List, Optional
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from config import settings
 
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, future=True)
 
+replica_engines: List[Engine] = [
+    # bounded connect: an unreachable replica must fail the lag check fast, not hang it
+    create_engine(
+        url, pool_pre_ping=True, future=True,
+        connect_args={"connect_timeout": settings.replica_connect_timeout_seconds},
+    )
+    for url in settings.replica_urls
+]
+
+# 0 when the replica has replayed everything it received, else seconds behind
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """Measures replica lag every `replica_lag_check_seconds` on a background
+    thread, so routing reads only the cached answer and costs no query. Until
+    the first check lands (or with the thread stopped) every replica counts
+    as unreachable and reads go to the primary."""
+
+    def __init__(self, engines: List[Engine]):
+        self.engines = engines
+        self._lock = threading.Lock()
+        self._lag = {id(e): float("inf") for e in engines}
+        self._checked_at = 0.0
+        self._rr = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def check(self) -> None:
+        with self._lock:
+            for e in self.engines:
+                try:
+                    with e.connect() as conn:
+                        self._lag[id(e)] = float(conn.execute(REPLICA_LAG_SQL).scalar_one())
+                except Exception as exc:
+                    print("Replica check failed:", e.url.host, exc)
+                    self._lag[id(e)] = float("inf")
+            self._checked_at = time.monotonic()
+
+    def start(self) -> None:
+        if self._thread is not None or not self.engines:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ems-replica-lag", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(settings.replica_lag_check_seconds)
+
+    def healthy(self) -> List[Engine]:
+        return [e for e in self.engines if self._lag[id(e)] <= settings.replica_max_lag_seconds]
+
+    def pick(self) -> Optional[Engine]:
+        candidates = self.healthy() if self.engines else []
+        if not candidates:
+            return None
+        return candidates[next(self._rr) % len(candidates)]
+
+    def status(self) -> list:
+        # None = unreachable / not yet checked
+        return [
+            {"host": e.url.host, "lag_seconds": None if self._lag[id(e)] == float("inf") else self._lag[id(e)]}
+            for e in self.engines
+        ]
+
+
+replicas = ReplicaMonitor(replica_engines)
+
+
+def _dispose_in_child() -> None:
+    # a forked worker (gunicorn --preload) must not share the parent's sockets
+    engine.dispose(close=False)
+    for e in replica_engines:
+        e.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_in_child)
+
+
+def warm_pool(connections: int) -> None:
+    """Open `connections` pooled connections per engine up front, so the first
+    requests after boot do not pay for TCP + auth + pre-ping."""
+    for e in [engine, *replica_engines]:
+        conns = []
+        try:
+            for _ in range(connections):
+                conns.append(e.connect())
+                conns[-1].execute(text("SELECT 1"))
+        except Exception as exc:
+            print("Pool warm-up failed:", e.url.host, exc)
+        finally:
+            for c in conns:
+                c.close()  # back into the pool, still open
+    if replica_engines:
+        replicas.check()
+
+
+def read_engine() -> Engine:
+    return replicas.pick() or engine
+
+
 def db_health() -> dict:
     try:
-        print(settings.DATABASE_URL)
         with engine.connect() as conn:
             r = conn.execute(text("SELECT 1")).scalar_one()
         return {"db": "up", "ping": r}
     except Exception as e:
         return {"db": "down", "error": str(e)}
+
+
+def pool_status() -> list:
+    """Checked-out connections against capacity (pool_size + max_overflow) per engine."""
+    out = []
+    for e in [engine, *replica_engines]:
+        pool = e.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        out.append({
+            "host": e.url.host,
+            "checked_out": pool.checkedout(),
+            "capacity": capacity,
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+        })
+    return out
@@ -1,11 +1,51 @@
-from typing import Any, Generator
+from contextvars import ContextVar
+from typing import Any, Generator, Optional
 
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.orm import Session
-from db import engine
+from sqlalchemy.sql.dml import UpdateBase
+from db import engine, replicas
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+
+class RoutingSession(Session):
+    """Reads go to one replica per session (picked on first use, lag-checked);
+    the first write of any kind pins the session to the primary so it reads
+    its own writes from then on."""
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self.info.get("primary") or isinstance(clause, UpdateBase):
+            self.info["primary"] = True
+            return engine
+        if "replica" not in self.info:
+            self.info["replica"] = replicas.pick()
+        return self.info["replica"] or engine
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _pin_to_primary(session, flush_context, instances):
+    session.info["primary"] = True
+
+
+# set per request by admission.AdmissionMiddleware; background jobs leave it unset (no limit)
+statement_timeout_ms: ContextVar[Optional[int]] = ContextVar("statement_timeout_ms", default=None)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    ms = statement_timeout_ms.get()
+    if ms and connection.dialect.name == "postgresql":
+        # SET LOCAL ends with the transaction, so pooled connections come back clean
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False, future=True)
+
 def get_session() -> Generator[Session, Any, None]:
     with SessionLocal() as session:
         yield session
+
+def get_read_session() -> Generator[Session, Any, None]:
+    with ReadSessionLocal() as session:
+        yield session
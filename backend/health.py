@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+import scheeduler
+from config import settings
+from db import engine, pool_status, replicas
+from storage.s3 import head_bucket
+
+
+def _timed(fn: Callable[[], Optional[dict]]) -> dict:
+    started = time.perf_counter()
+    try:
+        extra = fn() or {}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1), **extra}
+    except Exception as e:
+        return {"ok": False, "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": f"{type(e).__name__}: {e}"[:300]}
+
+
+def check_postgres() -> dict:
+    def ping():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"replicas": replicas.status()}
+    return _timed(ping)
+
+
+def check_s3() -> dict:
+    return _timed(lambda: head_bucket(settings.health_timeout_seconds))
+
+
+def check_pool() -> dict:
+    pools = pool_status()
+    worst = max((p["saturation"] for p in pools), default=0.0)
+    return {"ok": worst < settings.health_pool_saturation, "saturation": worst, "pools": pools}
+
+
+def check_scheduler(app) -> dict:
+    sched = getattr(app.state, "scheduler", None)
+    if sched is None:
+        return {"ok": True, "running": False}  # not this process's job
+    age = time.time() - (scheeduler.last_heartbeat or 0)
+    return {
+        "ok": bool(sched.running) and age < 3 * scheeduler.HEARTBEAT_SECONDS,
+        "running": bool(sched.running),
+        "heartbeat_age_s": round(age, 1),
+    }
+
+
+class HealthMonitor:
+    """Runs the dependency checks every HEALTH_INTERVAL_SECONDS on a background
+    thread and keeps the last result, so /livez and /readyz answer from memory
+    and probes from every pod never add DB or S3 traffic of their own."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ems-health")
+        self._app = None
+        self.result: Dict[str, dict] = {}
+        self.checked_at = 0.0
+
+    def run_checks(self) -> Dict[str, dict]:
+        # Postgres and S3 in parallel: one slow dependency should not delay the other's answer
+        pg = self._pool.submit(check_postgres)
+        s3 = self._pool.submit(check_s3)
+        result = {"postgres": pg.result(), "s3": s3.result(), "db_pool": check_pool()}
+        if self._app is not None:
+            result["scheduler"] = check_scheduler(self._app)
+        self.result, self.checked_at = result, time.time()
+        return result
+
+    def start(self, app) -> None:
+        self._app = app
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ems-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self) -> None:
+        # first pass right away; /readyz says not_ready until it lands
+        while not self._stop.is_set():
+            try:
+                self.run_checks()
+            except Exception as e:
+                print("Health check loop error:", e)
+            self._stop.wait(settings.health_interval_seconds)
+
+    def readiness(self, app) -> tuple[bool, dict]:
+        age = time.time() - self.checked_at
+        stale = age > 3 * settings.health_interval_seconds
+        r = self.result
+        required = ["postgres", "db_pool", "scheduler"] + (["s3"] if settings.health_require_s3 else [])
+        failing = [name for name in required if name in r and not r[name]["ok"]]
+        ready = bool(getattr(app.state, "ready", False)) and bool(r) and not stale and not failing
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "failing": failing,
+            "stale": stale,
+            "checked_age_s": round(age, 1) if self.checked_at else None,
+            "checks": r,
+        }
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,24 @@
+"""Deferred imports for heavy dependencies that most processes (or requests) never touch."""
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """The module `name`, loaded on first attribute access instead of now.
+
+    Raises ImportError immediately if it is not installed. Only for top-level
+    modules accessed as attributes (np.array); submodules and `from x import y`
+    need a plain import inside the function that uses them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,69 +1,217 @@
-from fastapi import FastAPI, Request
+import re
+from typing import Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
 
-from db import db_health, engine
+from caching import CacheControlMiddleware
+from compression import CompressionMiddleware
+from config import settings
+from db import read_engine, replicas, warm_pool
+from db_session import SessionLocal
 from routes.exception_types import router as et_router
 from routes.exceptions import router as ex_router
 from routes.users import router as users_router
 from routes.attachments import router as att_router
+from routes.assignment_rules import router as assignment_router
+from routes.sla_calendars import router as sla_router
+from routes.approvals import router as approvals_router
+from routes.exports import router as exports_router
 from scheeduler import maybe_start_scheduler
+from services.assignment import assigner
+from services.notifications import notifier
+from services.exports import export_pool
+from services.previews import preview_pool
+from services.sla_calendar import calendars
+from services.directory import directory
+from admission import AdmissionMiddleware, admission_state, query_canceled_handler
+from health import monitor
+from profiling import ProfileMiddleware, profiler, require_admin
 
 ALLOWED_ORIGINS = ["http://localhost:5173"]  # dev frontend
 
-app = FastAPI(title="EMS API", version="0.1.0")
-
-app.on_event("startup")
-def _start_scheduler():
-    maybe_start_scheduler(app)
-
-@app.on_event("shutdown")
-def _stop_scheduler():
-    sched = getattr(app.state, "scheduler", None)
-    if sched:
-        sched.shutdown(wait=False)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print("REQ", request.method, request.url.path)
-    resp = await call_next(request)
-    print("RES", resp.status_code, request.method, request.url.path)
-    return resp
-
-@app.get("/healthz")
-def healthz():
-    return {"status": "ok", "api": "up", **db_health()}
-
-@app.get("/debug/db/tables")
-def list_tables():
-    with engine.connect() as conn:
-        insp = inspect(conn)
-        return {"tables": insp.get_table_names()}
-
-@app.get("/debug/dsn")
-def debug_dsn():
-    from config import settings
-    url = settings.DATABASE_URL.replace(settings.db_password, "******")
-    return {"database_url": url}
-
-@app.get("/debug/routes")
-def debug_routes():
-    out = []
-    for r in app.router.routes:
-        methods = sorted(m for m in getattr(r, "methods", set()) if m != "HEAD")
-        path = getattr(r, "path", None) or getattr(r, "path_format", None)
-        out.append({"path": path, "methods": methods})
-    return out
-
-app.include_router(et_router)
-app.include_router(ex_router)
-app.include_router(users_router)
-app.include_router(att_router)
+
+def warm_up() -> None:
+    """Pay first-request costs at boot: pooled DB connections, the compiled SLA
+    calendars (and numpy with them), assignment loads, the user directory and
+    the S3 client."""
+    from storage.s3 import _client
+
+    warm_pool(settings.warmup_connections)
+    try:
+        with SessionLocal() as db:
+            calendars.all(db)
+            if settings.auto_assign:
+                assigner.refresh(db)
+            directory.refresh(db)
+    except Exception as e:
+        print("Cache warm-up failed:", e)
+    _client()
+
+
+def create_app() -> FastAPI:
+    """Build the API. `uvicorn main:app` serves the module-level instance;
+    `uvicorn --factory main:create_app` builds one per worker. Importing this
+    module opens no connections and starts no threads, so a preloading
+    server can fork after it."""
+    app = FastAPI(title="EMS API", version="0.1.0")
+    app.state.ready = False
+
+    @app.on_event("startup")
+    def _start_scheduler():
+        maybe_start_scheduler(app)
+
+    @app.on_event("shutdown")
+    def _stop_scheduler():
+        sched = getattr(app.state, "scheduler", None)
+        if sched:
+            sched.shutdown(wait=False)
+
+    @app.on_event("startup")
+    def _start_export_workers():
+        export_pool.start()
+        preview_pool.start()
+
+    @app.on_event("shutdown")
+    def _stop_export_workers():
+        export_pool.stop()
+        preview_pool.stop()
+
+    @app.on_event("shutdown")
+    def _stop_notifier():
+        # flush buffered digests before the process exits
+        notifier.stop()
+
+    @app.on_event("startup")
+    def _warm_up():
+        # uvicorn accepts connections only after the startup handlers return
+        if settings.warmup_enabled:
+            warm_up()
+        app.state.ready = True
+        monitor.start(app)
+        directory.start()
+        replicas.start()
+
+    @app.on_event("shutdown")
+    def _stop_health():
+        app.state.ready = False
+        monitor.stop()
+        directory.stop()
+        replicas.stop()
+
+    app.add_middleware(CacheControlMiddleware)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+    )
+    # inside CORS so 429/503 responses still carry the CORS headers
+    app.add_middleware(AdmissionMiddleware)
+    app.add_exception_handler(OperationalError, query_canceled_handler)
+    app.add_middleware(ProfileMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        print("REQ", request.method, request.url.path)
+        resp = await call_next(request)
+        print("RES", resp.status_code, request.method, request.url.path)
+        return resp
+
+    # probes answer from the monitor's cached checks; none of them touches the DB or S3
+    @app.get("/livez")
+    def livez():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    def readyz():
+        ready, body = monitor.readiness(app)
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    @app.get("/healthz")
+    def healthz():
+        _, body = monitor.readiness(app)
+        pg = body["checks"].get("postgres")
+        # legacy shape first: consumers check status == "ok"; the monitor's view sits under its own key
+        return {"status": "ok", "api": "up", "db": "up" if pg and pg["ok"] else "down", "readiness": body}
+
+    @app.get("/debug/db/tables")
+    def list_tables():
+        with read_engine().connect() as conn:
+            insp = inspect(conn)
+            return {"tables": insp.get_table_names()}
+
+    @app.get("/debug/dsn")
+    def debug_dsn():
+        url = settings.DATABASE_URL.replace(settings.db_password, "******")
+        return {"database_url": url, "replicas": replicas.status()}
+
+    @app.get("/debug/admission")
+    def debug_admission():
+        mw = admission_state.get("middleware")
+        return mw.status() if mw else {"enabled": False}
+
+    @app.get("/debug/notifications")
+    def debug_notifications():
+        return notifier.status()
+
+    @app.get("/debug/user-directory")
+    def debug_user_directory():
+        return directory.status()
+
+    @app.post("/debug/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+    def debug_profile(
+        seconds: float = Query(10, gt=0),
+        interval_ms: float = Query(None, ge=1),
+        route: Optional[str] = Query(None, description="regex on the path: sample only while matching requests run"),
+        requests: int = Query(0, ge=0, description="with route: stop after this many matching requests"),
+        idle: bool = False,
+    ):
+        """Sample this worker's stacks and return them collapsed, ready for
+        flamegraph.pl or speedscope. Only the worker that serves this request
+        is profiled."""
+        if seconds > settings.profile_max_seconds:
+            raise HTTPException(status_code=400, detail=f"At most {settings.profile_max_seconds:g} seconds")
+        if requests and not route:
+            raise HTTPException(status_code=400, detail="requests needs a route pattern")
+        try:
+            body, summary = profiler.capture(
+                seconds, interval_ms or settings.profile_interval_ms, route=route, requests=requests, idle=idle
+            )
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid route pattern: {e}")
+        headers = {f"X-Profile-{k.replace('_', '-').title()}": str(v) for k, v in summary.items() if v is not None}
+        return PlainTextResponse(body, headers=headers)
+
+    @app.get("/debug/routes")
+    def debug_routes():
+        out = []
+        for r in app.router.routes:
+            methods = sorted(m for m in getattr(r, "methods", set()) if m != "HEAD")
+            path = getattr(r, "path", None) or getattr(r, "path_format", None)
+            out.append({"path": path, "methods": methods})
+        return out
+
+    app.include_router(et_router)
+    app.include_router(ex_router)
+    app.include_router(users_router)
+    app.include_router(att_router)
+    app.include_router(assignment_router)
+    app.include_router(sla_router)
+    app.include_router(approvals_router)
+    app.include_router(exports_router)
+    return app
+
+
+app = create_app()
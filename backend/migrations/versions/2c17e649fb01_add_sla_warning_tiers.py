@@ -0,0 +1,35 @@
+"""add sla warning tiers
+
+Revision ID: 2c17e649fb01
+Revises: 5de37b709018
+Create Date: 2026-10-19 13:58:22.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2c17e649fb01'
+down_revision: Union[str, None] = '5de37b709018'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('exception_types', sa.Column('warning_tiers', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('exceptions', sa.Column('sla_tier', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('exceptions_archive', sa.Column('sla_tier', sa.SmallInteger(), server_default='0', nullable=False))
+    op.create_index(
+        'ix_exceptions_sla_due', 'exceptions', ['type_id', 'due_at'], unique=False,
+        postgresql_where=sa.text("status NOT IN ('CLOSED', 'RESOLVED', 'REJECTED')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exceptions_sla_due', table_name='exceptions')
+    op.drop_column('exceptions_archive', 'sla_tier')
+    op.drop_column('exceptions', 'sla_tier')
+    op.drop_column('exception_types', 'warning_tiers')
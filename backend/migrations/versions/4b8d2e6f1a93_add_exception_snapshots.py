@@ -0,0 +1,39 @@
+"""add exception snapshots
+
+Revision ID: 4b8d2e6f1a93
+Revises: 9e41a7c3d2b8
+Create Date: 2026-10-19 16:05:11.402876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d2e6f1a93'
+down_revision: Union[str, None] = '9e41a7c3d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'exception_snapshots',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('exception_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.BigInteger(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_exception_snapshots')),
+        sa.UniqueConstraint('exception_id', 'event_id', name='uq_exception_snapshots_event'),
+    )
+    op.create_index('ix_exception_snapshots_lookup', 'exception_snapshots', ['exception_id', 'taken_at'], unique=False)
+    op.create_index('ix_audit_events_entity', 'audit_events', ['entity_type', 'entity_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_entity', table_name='audit_events')
+    op.drop_index('ix_exception_snapshots_lookup', table_name='exception_snapshots')
+    op.drop_table('exception_snapshots')
@@ -0,0 +1,58 @@
+"""add sla calendars, holidays and sla pause
+
+Revision ID: 5de37b709018
+Revises: 7b21ad30bbf5
+Create Date: 2026-10-19 12:41:09.336170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5de37b709018'
+down_revision: Union[str, None] = '7b21ad30bbf5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sla_calendars',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('bu_id', sa.String(length=64), nullable=True),
+    sa.Column('name', sa.String(length=128), nullable=False),
+    sa.Column('timezone', sa.String(length=64), server_default='UTC', nullable=False),
+    sa.Column('work_start', sa.Time(), server_default='09:00', nullable=False),
+    sa.Column('work_end', sa.Time(), server_default='17:00', nullable=False),
+    sa.Column('cutoff', sa.Time(), nullable=True),
+    sa.Column('workdays', sa.String(length=7), server_default='1111100', nullable=False),
+    sa.Column('active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_sla_calendars')),
+    sa.UniqueConstraint('bu_id', name=op.f('uq_sla_calendars_bu_id'))
+    )
+    op.create_table('sla_holidays',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('calendar_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('name', sa.String(length=128), nullable=True),
+    sa.ForeignKeyConstraint(['calendar_id'], ['sla_calendars.id'], name=op.f('fk_sla_holidays_sla_calendars_calendar_id'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_sla_holidays')),
+    sa.UniqueConstraint('calendar_id', 'day', name=op.f('uq_sla_holidays_calendar_id'))
+    )
+    op.create_index(op.f('ix_sla_holidays_calendar_id'), 'sla_holidays', ['calendar_id'], unique=False)
+    op.add_column('exceptions', sa.Column('sla_paused_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('exceptions_archive', sa.Column('sla_paused_at', sa.DateTime(timezone=True), nullable=True))
+    # exceptions already waiting on approval start their pause now, so resuming extends due_at
+    op.execute("UPDATE exceptions SET sla_paused_at = now() WHERE status = 'AWAITING_APPROVAL'")
+
+
+def downgrade() -> None:
+    op.drop_column('exceptions_archive', 'sla_paused_at')
+    op.drop_column('exceptions', 'sla_paused_at')
+    op.drop_index(op.f('ix_sla_holidays_calendar_id'), table_name='sla_holidays')
+    op.drop_table('sla_holidays')
+    op.drop_table('sla_calendars')
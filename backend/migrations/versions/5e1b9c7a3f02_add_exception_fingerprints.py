@@ -0,0 +1,72 @@
+"""add exception fingerprints and duplicate links
+
+Revision ID: 5e1b9c7a3f02
+Revises: d4a7e2c9b610
+Create Date: 2026-10-19 21:12:40.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b9c7a3f02'
+down_revision: Union[str, None] = 'd4a7e2c9b610'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_OPEN = "status NOT IN ('CLOSED', 'RESOLVED', 'REJECTED')"
+NEW_OPEN = "status NOT IN ('CLOSED', 'RESOLVED', 'REJECTED', 'DUPLICATE')"
+
+
+def _open_indexes(where: str) -> None:
+    # DUPLICATE joins the terminal statuses: the open-row partial indexes follow
+    op.drop_index('ix_exceptions_queue', table_name='exceptions')
+    op.create_index(
+        'ix_exceptions_queue', 'exceptions', ['assigned_to', 'urgency_at', 'id'], unique=False,
+        postgresql_where=sa.text(where),
+    )
+    op.drop_index('ix_exceptions_sla_due', table_name='exceptions')
+    op.create_index(
+        'ix_exceptions_sla_due', 'exceptions', ['type_id', 'due_at'], unique=False,
+        postgresql_where=sa.text(where),
+    )
+
+
+def upgrade() -> None:
+    op.add_column('exception_types', sa.Column('dedupe_fields', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    for table in ('exceptions', 'exceptions_archive'):
+        op.add_column(table, sa.Column('attributes', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+        op.add_column(table, sa.Column('fingerprint', sa.String(length=64), nullable=True))
+        op.add_column(table, sa.Column('duplicate_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('exceptions', sa.Column('duplicate_of', sa.Integer(), nullable=True))
+    op.add_column('exceptions_archive', sa.Column('duplicate_of', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        op.f('fk_exceptions_exceptions_duplicate_of'), 'exceptions', 'exceptions', ['duplicate_of'], ['id'],
+        ondelete='SET NULL',
+    )
+    op.create_index(op.f('ix_exceptions_duplicate_of'), 'exceptions', ['duplicate_of'], unique=False)
+    # existing rows have no fingerprint, so the unique index builds without conflicts
+    op.create_index(
+        'ux_exceptions_open_fingerprint', 'exceptions', ['fingerprint'], unique=True,
+        postgresql_where=sa.text(f"fingerprint IS NOT NULL AND {NEW_OPEN}"),
+    )
+    _open_indexes(NEW_OPEN)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE exceptions SET status = 'REJECTED' WHERE status = 'DUPLICATE'")
+    _open_indexes(OLD_OPEN)
+    op.drop_index('ux_exceptions_open_fingerprint', table_name='exceptions')
+    op.drop_index(op.f('ix_exceptions_duplicate_of'), table_name='exceptions')
+    op.drop_constraint(op.f('fk_exceptions_exceptions_duplicate_of'), 'exceptions', type_='foreignkey')
+    for table in ('exceptions_archive', 'exceptions'):
+        op.drop_column(table, 'duplicate_of')
+        op.drop_column(table, 'duplicate_count')
+        op.drop_column(table, 'fingerprint')
+        op.drop_column(table, 'attributes')
+    op.drop_column('exception_types', 'dedupe_fields')
@@ -0,0 +1,37 @@
+"""add assignment rules
+
+Revision ID: 6146c443bd51
+Revises: c5bf722d1c09
+Create Date: 2026-10-19 10:03:17.552410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '6146c443bd51'
+down_revision: Union[str, None] = 'c5bf722d1c09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('assignment_rules',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('type_id', sa.Integer(), nullable=True),
+    sa.Column('bu_id', sa.String(length=64), nullable=True),
+    sa.Column('strategy', sa.String(length=16), server_default='LEAST_LOADED', nullable=False),
+    sa.Column('user_ids', postgresql.ARRAY(sa.Integer()), server_default='{}', nullable=False),
+    sa.Column('active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['type_id'], ['exception_types.id'], name=op.f('fk_assignment_rules_exception_types_type_id'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_assignment_rules'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('assignment_rules')
@@ -0,0 +1,86 @@
+"""add partitioned archive tables for closed exceptions
+
+Revision ID: 7b21ad30bbf5
+Revises: 6146c443bd51
+Create Date: 2026-10-19 11:20:54.907311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b21ad30bbf5'
+down_revision: Union[str, None] = '6146c443bd51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('exceptions_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('type_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('severity', sa.String(length=16), nullable=True),
+    sa.Column('bu_id', sa.String(length=64), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('assigned_to', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('priority', sa.SmallInteger(), nullable=True),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('escalated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('urgency_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'closed_at', name=op.f('pk_exceptions_archive')),
+    postgresql_partition_by='RANGE (closed_at)'
+    )
+    op.create_index(op.f('ix_exceptions_archive_type_id'), 'exceptions_archive', ['type_id'], unique=False)
+    op.create_table('approvals_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=False),
+    sa.Column('exception_id', sa.Integer(), nullable=False),
+    sa.Column('level', sa.SmallInteger(), nullable=False),
+    sa.Column('approver_id', sa.Integer(), nullable=True),
+    sa.Column('decision', sa.String(length=16), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('decided_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'closed_at', name=op.f('pk_approvals_archive')),
+    postgresql_partition_by='RANGE (closed_at)'
+    )
+    op.create_index(op.f('ix_approvals_archive_exception_id'), 'approvals_archive', ['exception_id'], unique=False)
+    op.create_table('attachments_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=False),
+    sa.Column('exception_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('mime', sa.String(length=128), nullable=True),
+    sa.Column('s3_key', sa.Text(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('etag', sa.String(length=128), nullable=True),
+    sa.Column('uploaded_by', sa.Integer(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'closed_at', name=op.f('pk_attachments_archive')),
+    postgresql_partition_by='RANGE (closed_at)'
+    )
+    op.create_index(op.f('ix_attachments_archive_exception_id'), 'attachments_archive', ['exception_id'], unique=False)
+    # catch-all partitions; the archiver creates monthly ones as it goes
+    for table in ('exceptions_archive', 'approvals_archive', 'attachments_archive'):
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_attachments_archive_exception_id'), table_name='attachments_archive')
+    op.drop_table('attachments_archive')
+    op.drop_index(op.f('ix_approvals_archive_exception_id'), table_name='approvals_archive')
+    op.drop_table('approvals_archive')
+    op.drop_index(op.f('ix_exceptions_archive_type_id'), table_name='exceptions_archive')
+    op.drop_table('exceptions_archive')
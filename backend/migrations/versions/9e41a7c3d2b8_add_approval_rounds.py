@@ -0,0 +1,38 @@
+"""add approval rounds
+
+Revision ID: 9e41a7c3d2b8
+Revises: 2c17e649fb01
+Create Date: 2026-10-19 15:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e41a7c3d2b8'
+down_revision: Union[str, None] = '2c17e649fb01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('exceptions', sa.Column('approval_requested_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('exceptions', sa.Column('approval_level', sa.SmallInteger(), server_default='0', nullable=False))
+    # rows already waiting: the round started when the SLA clock was paused
+    op.execute(
+        "UPDATE exceptions SET approval_requested_at = COALESCE(sla_paused_at, updated_at) "
+        "WHERE status = 'AWAITING_APPROVAL'"
+    )
+    op.create_index(
+        'ix_exceptions_pending_approval', 'exceptions', ['approval_requested_at', 'id'], unique=False,
+        postgresql_where=sa.text("status = 'AWAITING_APPROVAL'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exceptions_pending_approval', table_name='exceptions')
+    op.drop_column('exceptions', 'approval_level')
+    op.drop_column('exceptions', 'approval_requested_at')
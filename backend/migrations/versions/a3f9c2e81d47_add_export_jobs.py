@@ -0,0 +1,52 @@
+"""add export jobs
+
+Revision ID: a3f9c2e81d47
+Revises: e7c05b1d94af
+Create Date: 2026-10-19 17:31:09.557120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2e81d47'
+down_revision: Union[str, None] = 'e7c05b1d94af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('format', sa.String(length=16), nullable=False),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default='QUEUED', nullable=False),
+        sa.Column('attempts', sa.SmallInteger(), server_default='0', nullable=False),
+        sa.Column('total_rows', sa.BigInteger(), nullable=True),
+        sa.Column('rows_written', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('bytes_written', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('s3_key', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id'], name=op.f('fk_export_jobs_users_requested_by'), ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_export_jobs')),
+    )
+    op.create_index(
+        'ix_export_jobs_claim', 'export_jobs', ['status', 'id'], unique=False,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_jobs_claim', table_name='export_jobs')
+    op.drop_table('export_jobs')
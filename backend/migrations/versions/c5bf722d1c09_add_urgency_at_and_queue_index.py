@@ -0,0 +1,40 @@
+"""add urgency_at and per-user queue index
+
+Revision ID: c5bf722d1c09
+Revises: 3c0e153c2220
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5bf722d1c09'
+down_revision: Union[str, None] = '3c0e153c2220'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('exceptions', sa.Column('urgency_at', sa.DateTime(timezone=True), nullable=True))
+    # keep in sync with services.queue PRIORITY_BOOST_HOURS / SEVERITY_BOOST_HOURS
+    op.execute("""
+        UPDATE exceptions SET urgency_at =
+            COALESCE(due_at, created_at AT TIME ZONE 'UTC' + interval '72 hours')
+            - make_interval(hours => (
+                CASE priority WHEN 1 THEN 48 WHEN 2 THEN 24 WHEN 3 THEN 8 ELSE 0 END
+                + CASE upper(severity) WHEN 'CRITICAL' THEN 48 WHEN 'HIGH' THEN 24 WHEN 'MEDIUM' THEN 8 ELSE 0 END
+            ))
+    """)
+    op.create_index(
+        'ix_exceptions_queue', 'exceptions', ['assigned_to', 'urgency_at', 'id'], unique=False,
+        postgresql_where=sa.text("status NOT IN ('CLOSED', 'RESOLVED', 'REJECTED')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exceptions_queue', table_name='exceptions')
+    op.drop_column('exceptions', 'urgency_at')
@@ -0,0 +1,55 @@
+"""add content addressed blobs
+
+Revision ID: c81f4d0e6b25
+Revises: a3f9c2e81d47
+Create Date: 2026-10-19 18:12:44.201937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f4d0e6b25'
+down_revision: Union[str, None] = 'a3f9c2e81d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('s3_key', sa.Text(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('mime', sa.String(length=128), nullable=True),
+        sa.Column('etag', sa.String(length=128), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default='PENDING', nullable=False),
+        sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('unreferenced_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('sha256', name=op.f('pk_blobs')),
+    )
+    op.create_index(
+        'ix_blobs_gc', 'blobs', ['unreferenced_at'], unique=False,
+        postgresql_where=sa.text('refcount <= 0'),
+    )
+    op.add_column('attachments', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'fk_attachments_blob_sha256', 'attachments', 'blobs', ['blob_sha256'], ['sha256'], ondelete='RESTRICT'
+    )
+    op.create_index('ix_attachments_blob_sha256', 'attachments', ['blob_sha256'], unique=False)
+    op.add_column('attachments_archive', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_index('ix_attachments_archive_blob_sha256', 'attachments_archive', ['blob_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attachments_archive_blob_sha256', table_name='attachments_archive')
+    op.drop_column('attachments_archive', 'blob_sha256')
+    op.drop_index('ix_attachments_blob_sha256', table_name='attachments')
+    op.drop_constraint('fk_attachments_blob_sha256', 'attachments', type_='foreignkey')
+    op.drop_column('attachments', 'blob_sha256')
+    op.drop_index('ix_blobs_gc', table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,61 @@
+"""add attachment derivatives
+
+Revision ID: d4a7e2c9b610
+Revises: c81f4d0e6b25
+Create Date: 2026-10-19 18:47:02.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e2c9b610'
+down_revision: Union[str, None] = 'c81f4d0e6b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attachment_derivatives',
+        sa.Column('s3_key', sa.Text(), nullable=False),
+        sa.Column('mime', sa.String(length=128), nullable=True),
+        sa.Column('status', sa.String(length=16), server_default='QUEUED', nullable=False),
+        sa.Column('attempts', sa.SmallInteger(), server_default='0', nullable=False),
+        sa.Column('preview_key', sa.Text(), nullable=True),
+        sa.Column('text_key', sa.Text(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column(
+            'text_tsv', postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', coalesce(text, ''))", persisted=True), nullable=True,
+        ),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('s3_key', name=op.f('pk_attachment_derivatives')),
+    )
+    op.create_index(
+        'ix_attachment_derivatives_claim', 'attachment_derivatives', ['status', 'created_at'], unique=False,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+    op.create_index(
+        'ix_attachment_derivatives_tsv', 'attachment_derivatives', ['text_tsv'], unique=False,
+        postgresql_using='gin',
+    )
+    # derive everything already uploaded (finalized rows have a size)
+    op.execute(
+        "INSERT INTO attachment_derivatives (s3_key, mime) "
+        "SELECT DISTINCT ON (s3_key) s3_key, mime FROM attachments WHERE size IS NOT NULL "
+        "ORDER BY s3_key, id ON CONFLICT DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attachment_derivatives_tsv', table_name='attachment_derivatives')
+    op.drop_index('ix_attachment_derivatives_claim', table_name='attachment_derivatives')
+    op.drop_table('attachment_derivatives')
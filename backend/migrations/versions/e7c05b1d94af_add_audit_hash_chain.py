@@ -0,0 +1,33 @@
+"""add audit hash chain
+
+Revision ID: e7c05b1d94af
+Revises: 4b8d2e6f1a93
+Create Date: 2026-10-19 16:48:37.920511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c05b1d94af'
+down_revision: Union[str, None] = '4b8d2e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing events stay unhashed; each entity's chain starts at its next event
+    op.add_column('audit_events', sa.Column('prev_hash', sa.String(length=64), nullable=True))
+    op.add_column('audit_events', sa.Column('hash', sa.String(length=64), nullable=True))
+    op.add_column('exceptions', sa.Column('audit_head', sa.String(length=64), nullable=True))
+    op.add_column('exceptions_archive', sa.Column('audit_head', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('exceptions_archive', 'audit_head')
+    op.drop_column('exceptions', 'audit_head')
+    op.drop_column('audit_events', 'hash')
+    op.drop_column('audit_events', 'prev_hash')
@@ -0,0 +1,76 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, SmallInteger, BigInteger, Text, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+# Cold storage for CLOSED exceptions and their duplicates (services.archive).
+# All three tables are range-partitioned by month of closed_at so old months
+# can be detached or dropped wholesale; partitions are created on demand by
+# the archiver.
+# No foreign keys: archived rows must outlive their live counterparts.
+
+class ExceptionArchive(Base):
+    __tablename__ = "exceptions_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (closed_at)"}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    closed_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    type_id: Mapped[int] = mapped_column(Integer, index=True)
+    title:   Mapped[str] = mapped_column(String(255))
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    severity:    Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    bu_id:       Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    created_by:  Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    assigned_to: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    status:   Mapped[str] = mapped_column(String(32))
+    priority: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    due_at:   Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    escalated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    urgency_at:   Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    sla_paused_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    sla_tier: Mapped[int] = mapped_column(SmallInteger, default=0)
+    audit_head: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    attributes: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    duplicate_of: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    duplicate_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class ApprovalArchive(Base):
+    __tablename__ = "approvals_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (closed_at)"}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    closed_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    exception_id: Mapped[int] = mapped_column(Integer, index=True)
+    level: Mapped[int] = mapped_column(SmallInteger)
+    approver_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    decision: Mapped[str] = mapped_column(String(16))
+    comment:  Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    decided_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class AttachmentArchive(Base):
+    __tablename__ = "attachments_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (closed_at)"}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    closed_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    exception_id: Mapped[int] = mapped_column(Integer, index=True)
+    filename: Mapped[str] = mapped_column(String(255))
+    mime: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    s3_key: Mapped[str] = mapped_column(Text)
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    blob_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    etag: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    uploaded_by: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,17 @@
+from typing import List, Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY
+from .base import Base, TimestampMixin
+
+class AssignmentRule(Base, TimestampMixin):
+    __tablename__ = "assignment_rules"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # both NULL = catch-all rule; the most specific matching rule wins
+    type_id: Mapped[Optional[int]] = mapped_column(ForeignKey("exception_types.id", ondelete="CASCADE"), nullable=True)
+    bu_id:   Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    strategy: Mapped[str] = mapped_column(String(16), default="LEAST_LOADED", server_default="LEAST_LOADED")
+    user_ids: Mapped[List[int]] = mapped_column(ARRAY(Integer), default=list, server_default="{}")
+    active:   Mapped[bool] = mapped_column(Boolean, default=True, server_default="true")
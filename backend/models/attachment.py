@@ -14,6 +14,10 @@ class Attachment(Base):
     mime: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     s3_key: Mapped[str] = mapped_column(Text)   # path/key in the bucket
     sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # set for content-addressed uploads: s3_key is then the shared blob's key
+    blob_sha256: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("blobs.sha256", ondelete="RESTRICT"), nullable=True, index=True
+    )
 
     size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     etag: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
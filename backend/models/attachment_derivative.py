@@ -0,0 +1,32 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, SmallInteger, Text, DateTime, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from .base import Base, TimestampMixin
+
+class AttachmentDerivative(Base, TimestampMixin):
+    """Preview image and extracted text of a stored object, produced once per
+    s3_key by services.previews (so deduplicated blobs share them)."""
+    __tablename__ = "attachment_derivatives"
+
+    s3_key: Mapped[str] = mapped_column(Text, primary_key=True)
+    mime: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+
+    status: Mapped[str] = mapped_column(String(16), default="QUEUED", server_default="QUEUED")  # QUEUED | RUNNING | DONE | UNSUPPORTED | FAILED
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0")
+    preview_key: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    text_key: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # first PREVIEW_TEXT_MAX_CHARS of the text, for exception search; the full text is at text_key
+    text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    text_tsv = mapped_column(TSVECTOR, Computed("to_tsvector('simple', coalesce(text, ''))", persisted=True))
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+Index(
+    "ix_attachment_derivatives_claim",
+    AttachmentDerivative.status,
+    AttachmentDerivative.created_at,
+    postgresql_where=AttachmentDerivative.status.in_(("QUEUED", "RUNNING")),
+)
+Index("ix_attachment_derivatives_tsv", AttachmentDerivative.text_tsv, postgresql_using="gin")
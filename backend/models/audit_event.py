@@ -1,7 +1,7 @@
 from typing import Optional
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, ForeignKey, func
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from .base import Base
 
@@ -18,3 +18,10 @@ class AuditEvent(Base):
 
     old: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     new: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+
+    # hash chain per entity (services.audit_chain); NULL on events written before chaining
+    prev_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+# per-entity history in order (history relationship, point-in-time replay, snapshots)
+Index("ix_audit_events_entity", AuditEvent.entity_type, AuditEvent.entity_id, AuditEvent.id)
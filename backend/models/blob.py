@@ -0,0 +1,24 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, Text, DateTime, Index, func
+from .base import Base
+
+class Blob(Base):
+    """One stored object per distinct content (SHA-256), shared by every
+    attachment with the same bytes. refcount counts live and archived
+    attachments; services.blobs.collect_garbage removes unreferenced blobs."""
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    s3_key: Mapped[str] = mapped_column(Text)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    mime: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    etag: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="PENDING", server_default="PENDING")  # PENDING | READY
+    refcount: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # when refcount last dropped to zero; GC waits a grace period from here
+    unreferenced_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+Index("ix_blobs_gc", Blob.unreferenced_at, postgresql_where=Blob.refcount <= 0)
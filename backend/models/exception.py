@@ -1,8 +1,16 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Text, ForeignKey, DateTime, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column, relationship, foreign
+from sqlalchemy import String, Integer, Text, ForeignKey, DateTime, SmallInteger, Index, and_
+from sqlalchemy.dialects.postgresql import JSONB
 from .base import Base, TimestampMixin
+from .attachment import Attachment
+from .approval import Approval
+from .audit_event import AuditEvent
+
+# statuses that drop an exception out of work queues and SLA tracking
+# (DUPLICATE: linked to an open original by services.dedupe, never worked on its own)
+TERMINAL_STATUSES = ("CLOSED", "RESOLVED", "REJECTED", "DUPLICATE")
 
 class Exception(Base, TimestampMixin):
     __tablename__ = "exceptions"
@@ -22,3 +30,75 @@ class Exception(Base, TimestampMixin):
     priority: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
     due_at:   Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     escalated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # due_at pulled forward by priority/severity (services.queue); drives "my queue" ordering
+    urgency_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # set while AWAITING_APPROVAL: the SLA clock is stopped and due_at is pushed out on resume
+    sla_paused_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # how many of the type's SLA warning tiers have fired (services.sla_alerts)
+    sla_tier: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0")
+    # current approval round: when it was requested and how many levels have signed off
+    approval_requested_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    approval_level: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0")
+    # hash of the latest audit event for this exception (services.audit_chain)
+    audit_head: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    # source-system fields (account, amount, reference, ...) the type's dedupe_fields may name
+    attributes: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    # services.dedupe fingerprint; unique among open exceptions (ux_exceptions_open_fingerprint)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    duplicate_of: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("exceptions.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    # on an original: how many duplicates were linked to it
+    duplicate_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # children are removed by ON DELETE CASCADE, so never load them just to delete
+    attachments: Mapped[List[Attachment]] = relationship(
+        Attachment, order_by=Attachment.id.desc(), passive_deletes=True
+    )
+    approvals: Mapped[List[Approval]] = relationship(
+        Approval, order_by=(Approval.level, Approval.id), passive_deletes=True
+    )
+    # audit_events is polymorphic (entity_type/entity_id) with no FK, hence viewonly
+    history: Mapped[List[AuditEvent]] = relationship(
+        AuditEvent,
+        primaryjoin=lambda: and_(
+            foreign(AuditEvent.entity_id) == Exception.id,
+            AuditEvent.entity_type == "exception",
+        ),
+        order_by=AuditEvent.id,
+        viewonly=True,
+    )
+
+Index(
+    "ix_exceptions_queue",
+    Exception.assigned_to,
+    Exception.urgency_at,
+    Exception.id,
+    postgresql_where=Exception.status.notin_(TERMINAL_STATUSES),
+)
+
+# SLA tier evaluation: one due_at range per exception type on open rows
+Index(
+    "ix_exceptions_sla_due",
+    Exception.type_id,
+    Exception.due_at,
+    postgresql_where=Exception.status.notin_(TERMINAL_STATUSES),
+)
+
+# approvers' pending inbox, oldest request first
+Index(
+    "ix_exceptions_pending_approval",
+    Exception.approval_requested_at,
+    Exception.id,
+    postgresql_where=Exception.status == "AWAITING_APPROVAL",
+)
+
+# one open exception per fingerprint: the arbiter for concurrent creates and ingests
+Index(
+    "ux_exceptions_open_fingerprint",
+    Exception.fingerprint,
+    unique=True,
+    postgresql_where=and_(Exception.fingerprint.isnot(None), Exception.status.notin_(TERMINAL_STATUSES)),
+)
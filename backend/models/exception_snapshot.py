@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, BigInteger, DateTime, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+class ExceptionSnapshot(Base):
+    """Compact copy of an exception's audited fields (services.history.STATE_FIELDS)
+    as of audit event `event_id`. Point-in-time reads start from the latest
+    snapshot before the requested time and replay only the events after it.
+    No FK: snapshots outlive archived exceptions."""
+    __tablename__ = "exception_snapshots"
+    __table_args__ = (UniqueConstraint("exception_id", "event_id", name="uq_exception_snapshots_event"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    exception_id: Mapped[int] = mapped_column(Integer)
+    event_id: Mapped[int] = mapped_column(BigInteger)  # last audit event folded into `state`
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))  # `at` of that event
+    state: Mapped[dict] = mapped_column(JSONB)
+
+Index("ix_exception_snapshots_lookup", ExceptionSnapshot.exception_id, ExceptionSnapshot.taken_at)
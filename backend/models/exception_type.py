@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import String, Boolean, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from .base import Base, TimestampMixin
 
 class ExceptionType(Base, TimestampMixin):
@@ -14,3 +15,8 @@ class ExceptionType(Base, TimestampMixin):
     default_sla_hours: Mapped[int] = mapped_column(Integer, default=72, server_default="72")
     approval_levels:   Mapped[int] = mapped_column(Integer, default=1,  server_default="1")
     active:            Mapped[bool] = mapped_column(Boolean, default=True, server_default="true")
+    # % of SLA elapsed at which to warn, e.g. [50, 80, 100]; NULL = settings.sla_warning_tiers
+    warning_tiers:     Mapped[Optional[List[int]]] = mapped_column(JSONB, nullable=True)
+    # fields whose values identify a repeat of the same break, e.g. ["account", "amount", "reference"];
+    # top-level columns (title, bu_id, ...) or keys of Exception.attributes. NULL = no deduplication
+    dedupe_fields:     Mapped[Optional[List[str]]] = mapped_column(JSONB, nullable=True)
@@ -0,0 +1,36 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, SmallInteger, BigInteger, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base, TimestampMixin
+
+class ExportJob(Base, TimestampMixin):
+    """A report produced off the request path by services.exports workers."""
+    __tablename__ = "export_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32))            # exceptions | sla_breaches | audit
+    format: Mapped[str] = mapped_column(String(16))          # csv (gzip) | parquet
+    params: Mapped[dict] = mapped_column(JSONB, default=dict, server_default="{}")
+    requested_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    status: Mapped[str] = mapped_column(String(16), default="QUEUED", server_default="QUEUED")
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0")
+    total_rows: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    rows_written: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    bytes_written: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    s3_key: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# workers claim from here with FOR UPDATE SKIP LOCKED
+Index(
+    "ix_export_jobs_claim",
+    ExportJob.status,
+    ExportJob.id,
+    postgresql_where=ExportJob.status.in_(("QUEUED", "RUNNING")),
+)
@@ -0,0 +1,31 @@
+from typing import Optional
+from datetime import date, time
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean, Date, Time, ForeignKey, UniqueConstraint
+from .base import Base, TimestampMixin
+
+class SlaCalendar(Base, TimestampMixin):
+    __tablename__ = "sla_calendars"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # NULL bu_id = default calendar for business units without their own
+    bu_id: Mapped[Optional[str]] = mapped_column(String(64), unique=True, nullable=True)
+    name: Mapped[str] = mapped_column(String(128))
+    timezone: Mapped[str] = mapped_column(String(64), default="UTC", server_default="UTC")
+
+    work_start: Mapped[time] = mapped_column(Time, default=time(9, 0), server_default="09:00")
+    work_end:   Mapped[time] = mapped_column(Time, default=time(17, 0), server_default="17:00")
+    # exceptions raised after the cut-off start their SLA clock the next working day
+    cutoff:     Mapped[Optional[time]] = mapped_column(Time, nullable=True)
+    # Mon..Sun, "1" = working day
+    workdays:   Mapped[str] = mapped_column(String(7), default="1111100", server_default="1111100")
+    active:     Mapped[bool] = mapped_column(Boolean, default=True, server_default="true")
+
+class SlaHoliday(Base):
+    __tablename__ = "sla_holidays"
+    __table_args__ = (UniqueConstraint("calendar_id", "day"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    calendar_id: Mapped[int] = mapped_column(ForeignKey("sla_calendars.id", ondelete="CASCADE"), index=True)
+    day: Mapped[date] = mapped_column(Date)
+    name: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hmac
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+
+# leaf frames of threads parked in the stdlib (pool workers waiting for work,
+# the event loop in select): counted only with idle=true
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "socket.py", "ssl.py")
+_IDLE_FUNCS = {"wait", "select", "poll", "get", "sleep", "accept", "_wait_for_tstate_lock", "run_forever"}
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency for admin-only debug routes: X-Admin-Token must equal EMS_ADMIN_TOKEN.
+    With no token configured the routes do not exist as far as clients can tell."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    module = code.co_filename.rsplit("/site-packages/", 1)[-1].rsplit("/lib/python", 1)[-1]
+    return f"{name} ({module}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in _IDLE_FUNCS and code.co_filename.endswith(_IDLE_FILES)
+
+
+class SamplingProfiler:
+    """Wall-clock sampler over every thread of this worker.
+
+    A capture runs on the calling (request) thread: it reads
+    sys._current_frames() every `interval_ms` and counts every other
+    thread's stack, in collapsed ("folded") form: one `frame;frame;frame
+    count` line per distinct stack, which flamegraph.pl, speedscope and
+    inferno read as is. Nothing is
+    installed in the interpreter, so there is no cost outside a capture.
+
+    Request mode samples only while a request matching `route` is in flight
+    (ProfileMiddleware counts them) and stops after `requests` of them, or
+    at `seconds` at the latest. Sync endpoints run on pool threads the
+    sampler cannot tell apart, so whatever else the worker is busy with in
+    that window shows up too."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = False
+        self.route: Optional[re.Pattern] = None  # read on every request by ProfileMiddleware
+        self._in_flight = 0
+        self._remaining = 0
+        self._done = threading.Event()
+
+    def capture(
+        self,
+        seconds: float,
+        interval_ms: float,
+        route: Optional[str] = None,
+        requests: int = 0,
+        idle: bool = False,
+    ) -> tuple[str, dict]:
+        """Block for the capture and return (collapsed stacks, summary)."""
+        pattern = re.compile(route) if route else None
+        with self._lock:
+            if self.active:
+                raise HTTPException(status_code=409, detail="A profile capture is already running on this worker")
+            self.active, self._in_flight, self._remaining = True, 0, requests
+            self._done.clear()
+            self.route = pattern
+
+        stacks: Counter = Counter()
+        me = threading.get_ident()
+        interval = max(interval_ms, 1.0) / 1000
+        started = time.perf_counter()
+        deadline = started + seconds
+        ticks = samples = 0
+        try:
+            while time.perf_counter() < deadline and not self._done.is_set():
+                if pattern is None or self._in_flight:
+                    ticks += 1
+                    for ident, frame in sys._current_frames().items():
+                        if ident == me or (not idle and _is_idle(frame)):
+                            continue
+                        stack = []
+                        while frame is not None:
+                            stack.append(_frame_label(frame.f_code))
+                            frame = frame.f_back
+                        stacks[";".join(reversed(stack))] += 1
+                        samples += 1
+                time.sleep(interval)
+        finally:
+            with self._lock:
+                self.active, self.route = False, None
+        summary = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": interval * 1000,
+            "ticks": ticks,
+            "samples": samples,
+            "stacks": len(stacks),
+            "requests": requests - self._remaining if pattern else None,
+        }
+        return "".join(f"{s} {n}\n" for s, n in stacks.most_common()), summary
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            # a request can outlive the capture that counted it; never go negative
+            self._in_flight = max(0, self._in_flight - 1)
+            if self._remaining:
+                self._remaining -= 1
+                if not self._remaining:
+                    self._done.set()
+
+
+profiler = SamplingProfiler()
+
+
+class ProfileMiddleware:
+    """Tells the profiler when requests matching a request-mode capture start
+    and finish. One attribute read per request when no capture is armed."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = profiler.route
+        if route is None or scope["type"] != "http" or not route.search(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_finished()
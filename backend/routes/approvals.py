@@ -0,0 +1,27 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from db_session import get_read_session
+from schemas.approval import PendingApprovalsOut
+from services.approvals import pending_approvals
+from services.directory import directory
+
+router = APIRouter(prefix="/approvals", tags=["approvals"])
+
+@router.get("/pending", response_model=PendingApprovalsOut)
+def list_pending_approvals(
+    approver_id: int,
+    level: Optional[int] = Query(None, ge=1),
+    type_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    expand: Optional[Literal["users"]] = Query(None, description="users: embed created_by_user / assigned_to_user"),
+    db: Session = Depends(get_read_session),
+):
+    items, next_cursor, by_level = pending_approvals(
+        db, approver_id, limit=limit, cursor=cursor, level=level, type_id=type_id
+    )
+    if expand:
+        directory.expand(db, items)
+    return PendingApprovalsOut(items=items, next_cursor=next_cursor, total=sum(by_level.values()), by_level=by_level)
@@ -0,0 +1,23 @@
+from typing import List
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+
+from db_session import get_session, get_read_session
+from models.assignment_rule import AssignmentRule
+from schemas.assignment_rule import AssignmentRuleCreate, AssignmentRuleOut
+from services.assignment import assigner
+
+router = APIRouter(prefix="/assignment-rules", tags=["assignment"])
+
+@router.post("", response_model=AssignmentRuleOut, status_code=status.HTTP_201_CREATED)
+def create_assignment_rule(payload: AssignmentRuleCreate, db: Session = Depends(get_session)):
+    obj = AssignmentRule(**payload.model_dump())
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    assigner.invalidate()
+    return obj
+
+@router.get("", response_model=List[AssignmentRuleOut])
+def list_assignment_rules(db: Session = Depends(get_read_session)):
+    return db.query(AssignmentRule).order_by(AssignmentRule.id).all()
@@ -1,17 +1,35 @@
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from db_session import get_session
-from storage.s3 import ensure_bucket, presign_put, presign_get, ensure_bucket_with_cors, head_object
+from db_session import get_session, get_read_session
+from storage.s3 import presign_put, presign_get, ensure_bucket_with_cors, head_object, delete_objects
 from schemas.attachment import PresignUploadIn, PresignUploadOut, PresignDownloadIn, PresignDownloadOut, AttachmentOut, \
-    FinalizeIn
+    FinalizeIn, CheckHashIn, CheckHashOut, BundleIn, AttachmentPreviewOut
 from models.attachment import Attachment
 from models.exception import Exception as ExceptionModel
+from models.archive import ExceptionArchive, AttachmentArchive
+from config import settings
+from services.archive import union_attachments, union_exceptions, get_exception_any
+from services.bundles import bundle_entries, stream_zip
+from services.previews import derived_keys, enqueue as enqueue_preview, preview_pool
+from models.attachment_derivative import AttachmentDerivative
+from services import blobs
+from services.directory import directory
+from models.user import User
+from caching import conditional, with_etag
+from serialization import FastJSONResponse, fast_path, rows_response, rows_to_dicts, schema_columns
 
 router = APIRouter(prefix="/attachments", tags=["attachments"])
 
+@router.post("/check-hash", response_model=CheckHashOut)
+def check_hash(payload: CheckHashIn, db: Session = Depends(get_read_session)):
+    return CheckHashOut(existing=blobs.existing(db, payload.hashes))
+
 @router.post("/presign-upload", response_model=PresignUploadOut)
 def presign_upload(payload: PresignUploadIn, db: Session = Depends(get_session)):
     # validate exception exists
@@ -19,9 +37,38 @@ def presign_upload(payload: PresignUploadIn, db: Session = Depends(get_session))
     if not exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exception not found")
 
+    safe_name = payload.filename.replace("\\", "/").split("/")[-1]
+    if payload.sha256:
+        # content-addressed: one object per distinct content, shared by reference
+        sha = blobs.normalize_sha256(payload.sha256)
+        blob = blobs.acquire(db, sha, size=payload.size, mime=payload.mime)
+        att = Attachment(
+            exception_id=payload.exception_id,
+            filename=safe_name,
+            mime=payload.mime,
+            s3_key=blob.s3_key,
+            sha256=sha,
+            blob_sha256=sha,
+            uploaded_by=payload.uploaded_by,
+        )
+        if blob.status == "READY":
+            att.size, att.etag = blob.size, blob.etag
+            enqueue_preview(db, blob.s3_key, payload.mime)  # no-op when the blob already has them
+        db.add(att)
+        db.commit()
+        db.refresh(att)
+        if blob.status == "READY":
+            return PresignUploadOut(attachment_id=att.id, key=blob.s3_key, deduplicated=True)
+        ensure_bucket_with_cors()
+        checksum = blobs.checksum_b64(sha)
+        url = presign_put(blob.s3_key, payload.mime, expires_seconds=600, checksum_sha256=checksum)
+        return PresignUploadOut(
+            attachment_id=att.id, upload_url=url, key=blob.s3_key,
+            upload_headers={"x-amz-checksum-sha256": checksum},
+        )
+
     ensure_bucket_with_cors()
     # key pattern: exceptions/{id}/{uuid}_{filename}
-    safe_name = payload.filename.replace("\\", "/").split("/")[-1]
     key = f"exceptions/{payload.exception_id}/{uuid.uuid4().hex}_{safe_name}"
 
     url = presign_put(key, payload.mime, expires_seconds=600)
@@ -49,24 +96,55 @@ def presign_download(payload: PresignDownloadIn, db: Session = Depends(get_sessi
     return PresignDownloadOut(download_url=url)
 
 @router.get("/by-exception/{exc_id}", response_model=List[dict])
-def list_for_exception(exc_id: int, db: Session = Depends(get_session)):
-    rows = (
-        db.query(Attachment)
-        .filter(Attachment.exception_id == exc_id)
-        .order_by(Attachment.id.desc())
-        .all()
-    )
-    # quick dicts (avoid writing a separate Out schema for brevity)
-    return [
-        {
-            "id": r.id,
-            "filename": r.filename,
-            "mime": r.mime,
-            "uploaded_by": r.uploaded_by,
-            "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None,
-        }
-        for r in rows
-    ]
+def list_for_exception(
+    exc_id: int,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
+    expand: Optional[Literal["users"]] = Query(None, description="users: embed uploaded_by_user"),
+    db: Session = Depends(get_read_session),
+):
+    # attachments have no updated_at; finalize fills etag/size, so count those too
+    extra = (func.count(Attachment.etag), func.sum(Attachment.size))
+    if expand:
+        extra += (select(func.max(User.updated_at)).scalar_subquery(),)
+    etag, not_modified = conditional(request, db, Attachment, Attachment.exception_id == exc_id, extra=extra)
+    if not_modified:
+        return not_modified
+    if include_archived:
+        both = union_attachments(list(AttachmentOut.model_fields), exc_id)
+        rows = db.query(*both.c).order_by(both.c.id.desc()).all()
+    elif expand or fast_path("list_for_exception"):
+        rows = (
+            db.query(*schema_columns(AttachmentOut, Attachment))
+            .filter(Attachment.exception_id == exc_id)
+            .order_by(Attachment.id.desc())
+            .all()
+        )
+    else:
+        rows = (
+            db.query(Attachment)
+            .filter(Attachment.exception_id == exc_id)
+            .order_by(Attachment.id.desc())
+            .all()
+        )
+        # quick dicts (avoid writing a separate Out schema for brevity)
+        return with_etag([
+            {
+                "id": r.id,
+                "filename": r.filename,
+                "mime": r.mime,
+                "size": r.size,
+                "etag": r.etag,
+                "uploaded_by": r.uploaded_by,
+                "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None,
+            }
+            for r in rows
+        ], response, etag)
+    if expand:
+        # every uploader resolved in one pass from services.directory
+        return with_etag(FastJSONResponse(directory.expand(db, rows_to_dicts(rows))), response, etag)
+    return with_etag(rows_response(rows), response, etag)
 
 @router.post("/finalize", response_model=AttachmentOut)
 def finalize_upload(payload: FinalizeIn, db: Session = Depends(get_session)):
@@ -75,26 +153,113 @@ def finalize_upload(payload: FinalizeIn, db: Session = Depends(get_session)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
 
     # Query S3 for metadata
-    meta = head_object(att.s3_key)
+    meta = head_object(att.s3_key, checksum=att.blob_sha256 is not None)
     size = int(meta.get("ContentLength") or 0)
     etag = meta.get("ETag")
     if etag:
         etag = etag.strip('"')  # MinIO/S3 returns quoted ETag
 
+    if att.blob_sha256:
+        # the PUT was checksum-signed; still refuse a blob whose stored checksum disagrees
+        stored = meta.get("ChecksumSHA256")
+        if stored and stored != blobs.checksum_b64(att.blob_sha256):
+            raise HTTPException(status_code=409, detail="Stored object does not match sha256")
+        blobs.mark_ready(db, att.blob_sha256, size, etag)
     att.size = size
     att.etag = etag
-    if payload.sha256:
+    if payload.sha256 and not att.blob_sha256:
         att.sha256 = payload.sha256
+    enqueue_preview(db, att.s3_key, att.mime)
     db.commit()
+    preview_pool.wake()
     db.refresh(att)
     return att
 
-@router.get("/by-exception/{exc_id}", response_model=List[AttachmentOut])
-def list_for_exception(exc_id: int, db: Session = Depends(get_session)):
-    rows = (
-        db.query(Attachment)
-        .filter(Attachment.exception_id == exc_id)
-        .order_by(Attachment.id.desc())
-        .all()
+@router.get("/{attachment_id}/preview", response_model=AttachmentPreviewOut)
+def get_preview(attachment_id: int, response: Response, db: Session = Depends(get_read_session)):
+    """Presigned URLs of the thumbnail and extracted text; 202 while they are still being made."""
+    row = db.query(Attachment.s3_key).filter(Attachment.id == attachment_id).first()
+    if row is None:
+        row = db.query(AttachmentArchive.s3_key).filter(AttachmentArchive.id == attachment_id).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    d = db.get(AttachmentDerivative, row.s3_key)
+    if d is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No preview for this attachment")
+    if d.status in ("QUEUED", "RUNNING"):
+        response.status_code = status.HTTP_202_ACCEPTED
+    return AttachmentPreviewOut(
+        attachment_id=attachment_id,
+        status=d.status,
+        preview_url=presign_get(d.preview_key) if d.preview_key else None,
+        text_url=presign_get(d.text_key) if d.text_key else None,
+        text_excerpt=(d.text or "")[:500] or None,
+        error=d.error,
+    )
+
+@router.delete("/{attachment_id}", status_code=204)
+def delete_attachment(attachment_id: int, db: Session = Depends(get_session)):
+    att = db.get(Attachment, attachment_id)
+    if not att:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    sha, key = att.blob_sha256, att.s3_key
+    db.delete(att)
+    if sha:
+        # shared content: drop the reference, GC removes the object once nothing points at it
+        blobs.release(db, sha)
+        db.commit()
+    else:
+        db.query(AttachmentDerivative).filter(AttachmentDerivative.s3_key == key).delete(synchronize_session=False)
+        db.commit()
+        # own object: gone from S3 only once the row is gone
+        delete_objects([key, *derived_keys(key)])
+    return Response(status_code=204)
+
+
+def _naive_utc(d: datetime) -> datetime:
+    # created_at is a naive UTC column
+    return d.astimezone(timezone.utc).replace(tzinfo=None) if d.tzinfo else d
+
+def _zip_response(entries, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
     )
-    return rows
+
+@router.get("/by-exception/{exc_id}/bundle.zip")
+def bundle_for_exception(exc_id: int, db: Session = Depends(get_read_session)):
+    """Every attachment of one exception as a ZIP, streamed while it is built."""
+    obj, _ = get_exception_any(db, exc_id)
+    if obj is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exception not found")
+    return _zip_response(bundle_entries(db, [exc_id]), f"exception-{exc_id}-attachments.zip")
+
+@router.post("/bundle")
+def bundle(payload: BundleIn, db: Session = Depends(get_read_session)):
+    """Case pack: attachments of the listed (or filtered) exceptions as one streamed ZIP."""
+    limit = settings.bundle_max_exceptions
+    if payload.exception_ids is not None:
+        ids = sorted(set(payload.exception_ids))
+    else:
+        live, cold = [], []
+        for f in ("status", "type_id", "bu_id"):
+            v = getattr(payload, f)
+            if v is not None:
+                live.append(ExceptionModel.__table__.c[f] == v)
+                cold.append(ExceptionArchive.__table__.c[f] == v)
+        if not live and payload.date_from is None and payload.date_to is None:
+            raise HTTPException(status_code=400, detail="Give exception_ids or at least one filter")
+        both = union_exceptions(["id", "created_at"], live, cold)
+        q = db.query(both.c.id)
+        if payload.date_from is not None:
+            q = q.filter(both.c.created_at >= _naive_utc(payload.date_from))
+        if payload.date_to is not None:
+            q = q.filter(both.c.created_at < _naive_utc(payload.date_to))
+        ids = [r.id for r in q.order_by(both.c.id).limit(limit + 1)]
+    if len(ids) > limit:
+        raise HTTPException(status_code=400, detail=f"A bundle covers at most {limit} exceptions")
+    if not ids:
+        raise HTTPException(status_code=404, detail="No matching exceptions")
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _zip_response(bundle_entries(db, ids), f"case-pack-{stamp}.zip")
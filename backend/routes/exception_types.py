@@ -1,11 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from db_session import get_session
+from db_session import get_session, get_read_session
 from models.exception_type import ExceptionType
 from schemas.exception_type import ExceptionTypeCreate, ExceptionTypeOut
+from caching import conditional, with_etag
+from serialization import fast_path, rows_response, schema_columns
 
 router = APIRouter(prefix="/exception-types", tags=["exception-types"])
 
@@ -22,5 +24,11 @@ def create_exception_type(payload: ExceptionTypeCreate, db: Session = Depends(ge
     return obj
 
 @router.get("", response_model=List[ExceptionTypeOut])
-def list_exception_types(db: Session = Depends(get_session)):
-    return db.query(ExceptionType).order_by(ExceptionType.id).all()
+def list_exception_types(request: Request, response: Response, db: Session = Depends(get_read_session)):
+    etag, not_modified = conditional(request, db, ExceptionType)
+    if not_modified:
+        return not_modified
+    if fast_path("list_exception_types"):
+        cols = schema_columns(ExceptionTypeOut, ExceptionType)
+        return with_etag(rows_response(db.query(*cols).order_by(ExceptionType.id).all()), response, etag)
+    return with_etag(db.query(ExceptionType).order_by(ExceptionType.id).all(), response, etag)
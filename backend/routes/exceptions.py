@@ -1,14 +1,42 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
 
-from db_session import get_session
-from models.exception import Exception as ExceptionModel
-from schemas.exception import ExceptionCreate, ExceptionOut
+from db_session import get_session, get_read_session
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from config import settings
+from schemas.exception import (
+    ExceptionCreate, ExceptionOut, ExceptionDetailOut, ExceptionFullOut, ExceptionAsOfOut,
+    BulkIngestIn, BulkIngestOut,
+)
+from schemas.assignment_rule import AutoAssignIn, AutoAssignOut
+from schemas.attachment import AttachmentWithUrlOut
+from schemas.approval import ApprovalOut
+from schemas.audit_event import AuditEventOut
+from caching import conditional, with_etag
+from serialization import FastJSONResponse, fast_path, rows_response, rows_to_dicts, schema_columns
 from schemas.transitions import AssignIn, TransitionIn, ApprovalIn
 from services.exceptions import (
     assign_exception, transition_exception, approve_exception, compute_due_at
 )
+from services.queue import compute_urgency_at
+from services.assignment import assigner
+from services.notifications import notifier
+from services.ingest import ingest_batch
+from services.directory import directory
+from services import dedupe
+from services.history import exception_as_of, queue_as_of, record_created
+from services.archive import get_exception_any, union_exceptions, approvals_any
+from models.archive import ExceptionArchive, AttachmentArchive
+from models.audit_event import AuditEvent
+from models.user import User
+from services.previews import search_criteria
+from models.attachment import Attachment
+from models.attachment_derivative import AttachmentDerivative
+from storage.s3 import presign_get
 
 router = APIRouter(prefix="/exceptions", tags=["exceptions"])
 
@@ -20,27 +48,198 @@ def create_exception(payload: ExceptionCreate, db: Session = Depends(get_session
         data = payload.dict(exclude_none=True)
 
     if "due_at" not in data:
-        data["due_at"] = compute_due_at(db, data["type_id"])
+        data["due_at"] = compute_due_at(db, data["type_id"], data.get("bu_id"))
         print("CREATE due_at:", data["due_at"].isoformat())
 
-    obj = ExceptionModel(**data)
-    db.add(obj)
+    data["urgency_at"] = compute_urgency_at(data.get("due_at"), data.get("priority"), data.get("severity"))
+    obj, original = dedupe.insert_or_link(db, data)
+    record_created(db, [obj], actor_id=obj.created_by)
+    if original is not None:
+        # a repeat of an open exception: no assignment, no notification, just the link
+        db.commit()
+        db.refresh(obj)
+        return obj
+    if obj.assigned_to is None and settings.auto_assign:
+        assigner.assign_one(db, obj, actor_id=obj.created_by)
+    else:
+        assigner.note_assigned(obj.assigned_to)
     db.commit()
+    notifier.publish_assignments({obj.id: obj.assigned_to}, actor_id=obj.created_by)
     db.refresh(obj)
     return obj
 
+@router.post("/bulk", response_model=BulkIngestOut, status_code=201)
+def bulk_ingest(payload: BulkIngestIn, db: Session = Depends(get_session)):
+    if len(payload.items) > settings.bulk_ingest_max:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_ingest_max} items per batch")
+    ids, assigned, duplicates = ingest_batch(db, [i.model_dump() for i in payload.items], actor_id=payload.actor_id)
+    db.commit()
+    explicit = {
+        i: item.assigned_to for i, item in zip(ids, payload.items)
+        if item.assigned_to is not None and i not in duplicates
+    }
+    notifier.publish_assignments({**explicit, **assigned}, actor_id=payload.actor_id)
+    return BulkIngestOut(ids=ids, auto_assigned=assigned, duplicates=duplicates)
+
+@router.post("/auto-assign", response_model=AutoAssignOut)
+def auto_assign(payload: AutoAssignIn, db: Session = Depends(get_session)):
+    # open rows only, locked: closed ones must not move or skew the assigner's loads
+    rows = (
+        db.query(ExceptionModel.id, ExceptionModel.type_id, ExceptionModel.bu_id, ExceptionModel.assigned_to)
+        .filter(ExceptionModel.id.in_(payload.exception_ids), ExceptionModel.status.notin_(TERMINAL_STATUSES))
+        .order_by(ExceptionModel.id)
+        .with_for_update()
+        .all()
+    )
+    assigned, unassigned = assigner.assign_batch(db, [tuple(r) for r in rows], actor_id=payload.actor_id)
+    found = {r.id for r in rows}
+    unassigned += [i for i in dict.fromkeys(payload.exception_ids) if i not in found]
+    db.commit()
+    notifier.publish_assignments(assigned, actor_id=payload.actor_id)
+    return AutoAssignOut(assigned=assigned, unassigned=unassigned)
+
 @router.get("", response_model=List[ExceptionOut])
 def list_exceptions(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
     type_id: Optional[int] = None,
-    db: Session = Depends(get_session),
+    include_archived: bool = False,
+    q: Optional[str] = None,
+    expand: Optional[Literal["users"]] = Query(None, description="users: embed created_by_user / assigned_to_user"),
+    db: Session = Depends(get_read_session),
 ):
-    q = db.query(ExceptionModel)
+    criteria = []
     if status:
-        q = q.filter(ExceptionModel.status == status)
+        criteria.append(ExceptionModel.status == status)
     if type_id:
-        q = q.filter(ExceptionModel.type_id == type_id)
-    return q.order_by(ExceptionModel.id.desc()).all()
+        criteria.append(ExceptionModel.type_id == type_id)
+    extra = ()
+    if q:
+        # title, or text extracted from an attachment (services.previews)
+        criteria.append(search_criteria(ExceptionModel, Attachment, q))
+        # new extractions change the result without touching exceptions
+        extra = (select(func.max(AttachmentDerivative.updated_at)).scalar_subquery(),)
+    if expand:
+        extra += (select(func.max(User.updated_at)).scalar_subquery(),)
+
+    etag, not_modified = conditional(request, db, ExceptionModel, *criteria, extra=extra)
+    if not_modified:
+        return not_modified
+
+    if include_archived:
+        # archiving only ever removes live rows, so the live-table ETag still changes with it
+        cold = [ExceptionArchive.status == status] if status else []
+        if type_id:
+            cold.append(ExceptionArchive.type_id == type_id)
+        if q:
+            cold.append(search_criteria(ExceptionArchive, AttachmentArchive, q))
+        names = list(ExceptionOut.model_fields)
+        both = union_exceptions(names, criteria, cold)
+        rows = db.query(*both.c).order_by(both.c.id.desc()).all()
+    elif expand or fast_path("list_exceptions"):
+        rows = (
+            db.query(*schema_columns(ExceptionOut, ExceptionModel))
+            .filter(*criteria).order_by(ExceptionModel.id.desc()).all()
+        )
+    else:
+        return with_etag(db.query(ExceptionModel).filter(*criteria).order_by(ExceptionModel.id.desc()).all(), response, etag)
+    if expand:
+        # every user on the page resolved in one pass from services.directory
+        return with_etag(FastJSONResponse(directory.expand(db, rows_to_dicts(rows))), response, etag)
+    return with_etag(rows_response(rows), response, etag)
+
+@router.get("/as-of")
+def list_exceptions_as_of(
+    at: datetime,
+    status: Optional[str] = None,
+    assigned_to: Optional[int] = None,
+    type_id: Optional[int] = None,
+    bu_id: Optional[str] = None,
+    include_closed: bool = False,
+):
+    """The queue as it stood at `at`, streamed as NDJSON (one ExceptionAsOfOut per line)."""
+    at = at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+    return StreamingResponse(
+        queue_as_of(at, status=status, assigned_to=assigned_to, type_id=type_id, bu_id=bu_id,
+                    include_closed=include_closed),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/{exc_id}", response_model=ExceptionDetailOut)
+def get_exception(exc_id: int, db: Session = Depends(get_read_session)):
+    obj, archived = get_exception_any(db, exc_id)
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Exception not found")
+    out = ExceptionDetailOut.model_validate(obj)
+    out.archived = archived
+    return out
+
+@router.get("/{exc_id}/full", response_model=ExceptionFullOut)
+def get_exception_full(
+    exc_id: int,
+    include_urls: bool = False,
+    expand: Optional[Literal["users"]] = Query(
+        None, description="users: embed the creator, assignee, approvers, actors and uploaders"
+    ),
+    db: Session = Depends(get_read_session),
+):
+    # one query per collection regardless of size: exception + 3 selectin loads
+    obj = (
+        db.query(ExceptionModel)
+        .options(
+            selectinload(ExceptionModel.attachments),
+            selectinload(ExceptionModel.approvals),
+            selectinload(ExceptionModel.history),
+        )
+        .filter(ExceptionModel.id == exc_id)
+        .one_or_none()
+    )
+    archived = False
+    if obj is not None:
+        attachments, approvals, history = obj.attachments, obj.approvals, obj.history
+    else:
+        obj, archived = get_exception_any(db, exc_id)
+        if obj is None:
+            raise HTTPException(status_code=404, detail="Exception not found")
+        attachments = (
+            db.query(AttachmentArchive)
+            .filter(AttachmentArchive.exception_id == exc_id)
+            .order_by(AttachmentArchive.id.desc())
+            .all()
+        )
+        approvals = approvals_any(db, exc_id)
+        history = (
+            db.query(AuditEvent)
+            .filter(AuditEvent.entity_type == "exception", AuditEvent.entity_id == exc_id)
+            .order_by(AuditEvent.id)
+            .all()
+        )
+
+    out = ExceptionFullOut.model_validate(obj)
+    out.archived = archived
+    out.attachments = [AttachmentWithUrlOut.model_validate(a) for a in attachments]
+    out.approvals = [ApprovalOut.model_validate(a) for a in approvals]
+    out.history = [AuditEventOut.model_validate(h) for h in history]
+    if include_urls:
+        # presigning is local HMAC work, no round-trip to S3
+        keys = {a.id: a.s3_key for a in attachments}
+        for a in out.attachments:
+            a.download_url = presign_get(keys[a.id], expires_seconds=600)
+    if expand:
+        # every user of the exception and its collections resolved in one pass
+        data = out.model_dump()
+        directory.expand(db, [data], data["attachments"], data["approvals"], data["history"])
+        return data
+    return out
+
+@router.get("/{exc_id}/as-of", response_model=ExceptionAsOfOut)
+def get_exception_as_of(exc_id: int, at: datetime, db: Session = Depends(get_read_session)):
+    at = at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+    state = exception_as_of(db, exc_id, at)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Exception did not exist at that time")
+    return state
 
 @router.post("/{exc_id}/assign", response_model=ExceptionOut)
 def assign(exc_id: int, payload: AssignIn, db: Session = Depends(get_session)):
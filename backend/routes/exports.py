@@ -0,0 +1,54 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import get_session, get_read_session
+from models.export_job import ExportJob
+from schemas.export_job import ExportCreate, ExportOut
+from services.exports import build_query, export_pool
+from storage.s3 import presign_get
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+def _out(job: ExportJob) -> ExportOut:
+    out = ExportOut.model_validate(job)
+    if job.total_rows:
+        out.progress = round(min(1.0, job.rows_written / job.total_rows), 4)
+    elif job.status == "DONE":
+        out.progress = 1.0
+    if job.status == "DONE" and job.s3_key:
+        out.download_url = presign_get(
+            job.s3_key, expires_seconds=settings.export_url_expires_seconds, filename=job.s3_key.rsplit("/", 1)[-1]
+        )
+    return out
+
+@router.post("", response_model=ExportOut, status_code=202)
+def create_export(payload: ExportCreate, db: Session = Depends(get_session)):
+    params = payload.params.model_dump(mode="json", exclude_none=True)
+    build_query(payload.kind, payload.format, params)  # validate now, not in the worker
+    job = ExportJob(kind=payload.kind, format=payload.format, params=params, requested_by=payload.requested_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    export_pool.wake()
+    return _out(job)
+
+@router.get("", response_model=List[ExportOut])
+def list_exports(
+    requested_by: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_session),
+):
+    q = db.query(ExportJob)
+    if requested_by is not None:
+        q = q.filter(ExportJob.requested_by == requested_by)
+    return [_out(j) for j in q.order_by(ExportJob.id.desc()).limit(limit)]
+
+@router.get("/{job_id}", response_model=ExportOut)
+def get_export(job_id: int, db: Session = Depends(get_session)):
+    # primary: progress is written there and replicas may lag behind it
+    job = db.get(ExportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return _out(job)
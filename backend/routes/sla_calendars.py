@@ -0,0 +1,47 @@
+from typing import List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db_session import get_session, get_read_session
+from models.sla_calendar import SlaCalendar, SlaHoliday
+from schemas.sla_calendar import SlaCalendarCreate, SlaCalendarOut, SlaHolidayIn
+from services.sla_calendar import calendars
+
+router = APIRouter(prefix="/sla-calendars", tags=["sla-calendars"])
+
+@router.post("", response_model=SlaCalendarOut, status_code=status.HTTP_201_CREATED)
+def create_sla_calendar(payload: SlaCalendarCreate, db: Session = Depends(get_session)):
+    try:
+        ZoneInfo(payload.timezone)
+    except ZoneInfoNotFoundError:
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+    obj = SlaCalendar(**payload.model_dump())
+    db.add(obj)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Calendar for this business unit already exists")
+    db.refresh(obj)
+    calendars.invalidate()
+    return obj
+
+@router.get("", response_model=List[SlaCalendarOut])
+def list_sla_calendars(db: Session = Depends(get_read_session)):
+    return db.query(SlaCalendar).order_by(SlaCalendar.id).all()
+
+@router.post("/{calendar_id}/holidays", status_code=status.HTTP_204_NO_CONTENT)
+def add_holidays(calendar_id: int, payload: SlaHolidayIn, db: Session = Depends(get_session)):
+    if not db.get(SlaCalendar, calendar_id):
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    if payload.days:
+        db.execute(
+            insert(SlaHoliday)
+            .values([{"calendar_id": calendar_id, "day": d, "name": payload.name} for d in payload.days])
+            .on_conflict_do_nothing(index_elements=["calendar_id", "day"])
+        )
+        db.commit()
+    calendars.invalidate()
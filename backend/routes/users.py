@@ -1,11 +1,18 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from db_session import get_session
+from db_session import get_session, get_read_session
 from models.user import User
 from schemas.user import UserCreate, UserOut
+from schemas.queue import QueueOut, QueueSummaryOut
+from services.queue import user_queue, user_queue_summary
+from services.assignment import assigner
+from services.directory import directory
+from caching import conditional, with_etag
+from serialization import fast_path, rows_response, schema_columns
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -19,8 +26,58 @@ def create_user(payload: UserCreate, db: Session = Depends(get_session)):
         db.rollback()
         raise HTTPException(status_code=409, detail="username/email already exists")
     db.refresh(obj)
+    assigner.note_user(obj.id, obj.is_active)
+    directory.note_user(obj)
     return obj
 
 @router.get("", response_model=List[UserOut])
-def list_users(db: Session = Depends(get_session)):
-    return db.query(User).order_by(User.id).all()
+def list_users(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, description="substring of username, full name or email"),
+    active: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="page size; omit (with cursor) for every user"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    db: Session = Depends(get_read_session),
+):
+    """Users by id. Paged when limit or cursor is given (X-Next-Cursor is set
+    while more remain), otherwise all of them."""
+    criteria = []
+    if q:
+        like = f"%{q.strip()}%"
+        criteria.append(or_(User.username.ilike(like), User.full_name.ilike(like), User.email.ilike(like)))
+    if active is not None:
+        criteria.append(User.is_active.is_(active))
+    etag, not_modified = conditional(request, db, User, *criteria)
+    if not_modified:
+        return not_modified
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        criteria.append(User.id > int(cursor))
+        limit = limit or 100
+
+    fast = fast_path("list_users")
+    query = db.query(*schema_columns(UserOut, User)) if fast else db.query(User)
+    query = query.filter(*criteria).order_by(User.id)
+    rows = query.limit(limit + 1).all() if limit else query.all()
+    more = bool(limit) and len(rows) > limit
+    rows = rows[:limit] if limit else rows
+    result = rows_response(rows) if fast else rows
+    if more:
+        (result if fast else response).headers["X-Next-Cursor"] = str(rows[-1].id)
+    return with_etag(result, response, etag)
+
+@router.get("/{user_id}/queue", response_model=QueueOut)
+def get_user_queue(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+):
+    items, next_cursor = user_queue(db, user_id, limit=limit, cursor=cursor)
+    return QueueOut(items=items, next_cursor=next_cursor)
+
+@router.get("/{user_id}/queue/summary", response_model=QueueSummaryOut)
+def get_user_queue_summary(user_id: int, db: Session = Depends(get_read_session)):
+    return user_queue_summary(db, user_id)
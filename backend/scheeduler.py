@@ -1,60 +1,95 @@
 from __future__ import annotations
 
 import os
+import time
 from datetime import datetime, timezone
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy import and_
+from typing import TYPE_CHECKING
 from sqlalchemy.orm import Session
 
+from config import settings
 from db_session import SessionLocal
-from models.exception import Exception as ExceptionModel
-from models.audit_event import AuditEvent
+from services.assignment import assigner
+from services.archive import archive_closed_exceptions
+from services.notifications import notifier
+from services.history import take_snapshots
+from services.blobs import collect_garbage
+from services.sla_alerts import evaluate_sla_tiers, escalate_breached, group_alerts, load_types
 
-TERMINAL = {"CLOSED", "RESOLVED", "REJECTED"}
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
 
-def escalate_overdue():
-    # run in its own session
+HEARTBEAT_SECONDS = 15
+# wall-clock time of the last heartbeat job run; health.py reports the scheduler stalled when it ages
+last_heartbeat: float | None = None
+
+def heartbeat():
+    global last_heartbeat
+    last_heartbeat = time.time()
+
+def notify_sla_alerts(alerts) -> None:
+    # one event batch per recipient and tier; the dispatcher folds them into a digest per recipient
+    for recipient, by_tier in alerts.items():
+        for pct, rows in sorted(by_tier.items()):
+            kind = "SLA_BREACHED" if pct >= 100 else "SLA_WARNING"
+            notifier.publish(kind, recipient, [r.id for r in rows], pct=pct)
+
+def run_sla_tiers():
+    # run in its own session; each tick only touches rows that crossed a new tier
     with SessionLocal() as db:  # type: Session
         now = datetime.now(timezone.utc)
-        q = (
-            db.query(ExceptionModel)
-            .filter(
-                ExceptionModel.due_at.isnot(None),
-                ExceptionModel.due_at < now,
-                ExceptionModel.status.notin_(TERMINAL),
-                ExceptionModel.status != "ESCALATED",
-            )
-            .order_by(ExceptionModel.id)
-        )
-        rows = q.all()
-        if not rows:
+        # one read of the types: tier indexes in `crossed` must match the tiers used below
+        types = load_types(db)
+        crossed = evaluate_sla_tiers(db, now, types)
+        if not crossed:
+            db.commit()
             return
-        for obj in rows:
-            old = {"status": obj.status}
-            obj.status = "ESCALATED"
-            obj.escalated_at = now
-            db.add(
-                AuditEvent(
-                    at=now,
-                    actor_id=None,
-                    action="AUTO_ESCALATED",
-                    entity_type="exception",
-                    entity_id=obj.id,
-                    old=old,
-                    new={"status": obj.status, "reason": "due_at passed"},
-                )
-            )
+        type_tiers = {type_id: tiers for type_id, (_, tiers) in types.items()}
+        escalated = escalate_breached(db, crossed, type_tiers, now)
+        assigned = {}
+        if settings.auto_assign:
+            assigned, _ = assigner.assign_batch(db, [(r.id, r.type_id, r.bu_id, None) for r in escalated if r.assigned_to is None])
         db.commit()
+    notify_sla_alerts(group_alerts(crossed, type_tiers))
+    notifier.publish_assignments(assigned)
+
+# previous name of the SLA job, still used by the benchmark mixes
+escalate_overdue = run_sla_tiers
+
+def refresh_assignment_loads():
+    with SessionLocal() as db:
+        assigner.refresh(db)
 
 def maybe_start_scheduler(app) -> BackgroundScheduler | None:
     if os.getenv("EMS_SCHEDULER", "0") not in {"1", "true", "TRUE"}:
         print("SLA scheduler disabled (EMS_SCHEDULER not set).")
         return None
+    # only the process that runs the jobs imports APScheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
     sched = BackgroundScheduler(timezone="UTC")
     # run every minute
-    sched.add_job(escalate_overdue, trigger=IntervalTrigger(minutes=1), id="escalate_overdue", replace_existing=True)
+    sched.add_job(run_sla_tiers, trigger=IntervalTrigger(minutes=1), id="sla_tiers", replace_existing=True)
+    if settings.auto_assign:
+        # full recount corrects drift in the in-memory loads from other workers
+        sched.add_job(
+            refresh_assignment_loads,
+            trigger=IntervalTrigger(seconds=settings.assignment_refresh_seconds),
+            id="refresh_assignment_loads",
+            replace_existing=True,
+        )
+    sched.add_job(
+        take_snapshots,
+        trigger=IntervalTrigger(hours=settings.snapshot_interval_hours),
+        id="exception_snapshots",
+        replace_existing=True,
+    )
+    sched.add_job(heartbeat, trigger=IntervalTrigger(seconds=HEARTBEAT_SECONDS), id="heartbeat", replace_existing=True)
+    sched.add_job(collect_garbage, trigger=IntervalTrigger(hours=1), id="blob_gc", replace_existing=True)
+    if settings.archive_enabled:
+        sched.add_job(archive_closed_exceptions, trigger=IntervalTrigger(hours=1), id="archive_closed", replace_existing=True)
     sched.start()
+    heartbeat()
     app.state.scheduler = sched
     print("SLA scheduler started.")
     return sched
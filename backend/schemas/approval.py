@@ -0,0 +1,41 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from schemas.user import UserRefOut
+
+class ApprovalOut(BaseModel):
+    id: int
+    level: int
+    approver_id: Optional[int] = None
+    decision: str
+    comment: Optional[str] = None
+    decided_at: Optional[datetime] = None
+    # only with expand=users
+    approver: Optional[UserRefOut] = None
+
+    class Config:
+        from_attributes = True
+
+class PendingApprovalOut(BaseModel):
+    id: int
+    type_id: int
+    title: str
+    severity: Optional[str] = None
+    priority: Optional[int] = None
+    bu_id: Optional[str] = None
+    created_by: Optional[int] = None
+    assigned_to: Optional[int] = None
+    due_at: Optional[datetime] = None
+    approval_requested_at: datetime
+    next_level: int
+    required_levels: int
+    # only with expand=users
+    created_by_user: Optional[UserRefOut] = None
+    assigned_to_user: Optional[UserRefOut] = None
+
+class PendingApprovalsOut(BaseModel):
+    items: List[PendingApprovalOut]
+    next_cursor: Optional[str] = None
+    total: int
+    by_level: Dict[int, int]
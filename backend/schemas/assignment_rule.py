@@ -0,0 +1,28 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+class AssignmentRuleCreate(BaseModel):
+    type_id: Optional[int] = None
+    bu_id: Optional[str] = None
+    strategy: Literal["ROUND_ROBIN", "LEAST_LOADED"] = "LEAST_LOADED"
+    user_ids: List[int]
+    active: bool = True
+
+class AssignmentRuleOut(BaseModel):
+    id: int
+    type_id: Optional[int] = None
+    bu_id: Optional[str] = None
+    strategy: str
+    user_ids: List[int]
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+class AutoAssignIn(BaseModel):
+    exception_ids: List[int]
+    actor_id: Optional[int] = None
+
+class AutoAssignOut(BaseModel):
+    assigned: dict  # exception id -> user id
+    unassigned: List[int]
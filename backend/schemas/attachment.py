@@ -1,16 +1,30 @@
-from typing import Optional
+from typing import Dict, List, Optional
+from datetime import datetime
 from pydantic import BaseModel
 
+from schemas.user import UserRefOut
+
 class PresignUploadIn(BaseModel):
     exception_id: int
     filename: str
     mime: Optional[str] = None
     uploaded_by: Optional[int] = None
+    # hex SHA-256 of the file: stores it content-addressed and skips the upload if already stored
+    sha256: Optional[str] = None
+    size: Optional[int] = None
 
 class PresignUploadOut(BaseModel):
     attachment_id: int
-    upload_url: str
+    upload_url: Optional[str] = None  # None when the content is already stored
     key: str
+    deduplicated: bool = False
+    upload_headers: Dict[str, str] = {}  # send these with the PUT
+
+class CheckHashIn(BaseModel):
+    hashes: List[str]
+
+class CheckHashOut(BaseModel):
+    existing: List[str]  # hashes that need no upload
 
 class PresignDownloadIn(BaseModel):
     attachment_id: int
@@ -29,7 +43,29 @@ class AttachmentOut(BaseModel):
     size: Optional[int] = None
     etag: Optional[str] = None
     uploaded_by: Optional[int] = None
-    uploaded_at: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AttachmentWithUrlOut(AttachmentOut):
+    download_url: Optional[str] = None
+    # only with expand=users
+    uploaded_by_user: Optional[UserRefOut] = None
+
+class BundleIn(BaseModel):
+    # either explicit ids or filters over live + archived exceptions (created_at window)
+    exception_ids: Optional[List[int]] = None
+    status: Optional[str] = None
+    type_id: Optional[int] = None
+    bu_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+class AttachmentPreviewOut(BaseModel):
+    attachment_id: int
+    status: str  # QUEUED | RUNNING | DONE | UNSUPPORTED | FAILED
+    preview_url: Optional[str] = None
+    text_url: Optional[str] = None
+    text_excerpt: Optional[str] = None
+    error: Optional[str] = None
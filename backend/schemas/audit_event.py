@@ -0,0 +1,18 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from schemas.user import UserRefOut
+
+class AuditEventOut(BaseModel):
+    id: int
+    at: datetime
+    actor_id: Optional[int] = None
+    action: str
+    old: Optional[dict] = None
+    new: Optional[dict] = None
+    # only with expand=users
+    actor: Optional[UserRefOut] = None
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,12 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
+from schemas.attachment import AttachmentWithUrlOut
+from schemas.approval import ApprovalOut
+from schemas.audit_event import AuditEventOut
+from schemas.user import UserRefOut
+
 class ExceptionCreate(BaseModel):
     type_id: int
     title: str
@@ -12,6 +17,7 @@ class ExceptionCreate(BaseModel):
     assigned_to: Optional[int] = None
     due_at: Optional[datetime] = None
     priority: Optional[int] = None
+    attributes: Optional[Dict[str, Any]] = None
 
 class ExceptionOut(BaseModel):
     id: int
@@ -26,8 +32,46 @@ class ExceptionOut(BaseModel):
     priority: Optional[int]
     due_at: Optional[datetime]
     escalated_at: Optional[datetime]
+    duplicate_of: Optional[int] = None
+    duplicate_count: int = 0
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+class ExceptionDetailOut(ExceptionOut):
+    archived: bool = False
+    archived_at: Optional[datetime] = None
+
+class ExceptionFullOut(ExceptionDetailOut):
+    attachments: List[AttachmentWithUrlOut] = []
+    approvals: List[ApprovalOut] = []
+    history: List[AuditEventOut] = []
+    # only with expand=users
+    created_by_user: Optional[UserRefOut] = None
+    assigned_to_user: Optional[UserRefOut] = None
+
+class ExceptionAsOfOut(BaseModel):
+    """Audited fields of an exception reconstructed at `as_of` (services.history)."""
+    id: int
+    as_of: datetime
+    type_id: Optional[int] = None
+    title: Optional[str] = None
+    severity: Optional[str] = None
+    priority: Optional[int] = None
+    bu_id: Optional[str] = None
+    created_by: Optional[int] = None
+    assigned_to: Optional[int] = None
+    status: Optional[str] = None
+    due_at: Optional[datetime] = None
+    replayed: int = 0  # audit events applied on top of the starting point
+
+class BulkIngestIn(BaseModel):
+    items: List[ExceptionCreate]
+    actor_id: Optional[int] = None
+
+class BulkIngestOut(BaseModel):
+    ids: List[int]
+    auto_assigned: Dict[int, int]  # exception id -> user id
+    duplicates: Dict[int, int] = {}  # exception id -> open original it was linked to
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 class ExceptionTypeCreate(BaseModel):
@@ -8,6 +8,8 @@ class ExceptionTypeCreate(BaseModel):
     default_sla_hours: int = 72
     approval_levels: int = 1
     active: bool = True
+    warning_tiers: Optional[List[int]] = None
+    dedupe_fields: Optional[List[str]] = None
 
 class ExceptionTypeOut(BaseModel):
     id: int
@@ -17,6 +19,8 @@ class ExceptionTypeOut(BaseModel):
     default_sla_hours: int
     approval_levels: int
     active: bool
+    warning_tiers: Optional[List[int]] = None
+    dedupe_fields: Optional[List[str]] = None
 
     class Config:
         from_attributes = True
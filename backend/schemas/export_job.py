@@ -0,0 +1,44 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class ExportFilters(BaseModel):
+    # exceptions / sla_breaches: created_at (sla_breaches: due_at) window; audit: event time window
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    status: Optional[str] = None
+    type_id: Optional[int] = None
+    bu_id: Optional[str] = None
+    assigned_to: Optional[int] = None
+    include_archived: bool = False
+    # audit only
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    action: Optional[str] = None
+
+class ExportCreate(BaseModel):
+    kind: str  # exceptions | sla_breaches | audit
+    format: str = "csv"  # csv (gzip) | parquet
+    params: ExportFilters = ExportFilters()
+    requested_by: Optional[int] = None
+
+class ExportOut(BaseModel):
+    id: int
+    kind: str
+    format: str
+    params: dict
+    requested_by: Optional[int] = None
+    status: str
+    attempts: int
+    total_rows: Optional[int] = None
+    rows_written: int
+    bytes_written: int
+    progress: Optional[float] = None  # 0..1 once the row count is known
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
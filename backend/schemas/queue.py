@@ -0,0 +1,28 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class QueueItemOut(BaseModel):
+    id: int
+    type_id: int
+    title: str
+    status: str
+    severity: Optional[str] = None
+    priority: Optional[int] = None
+    bu_id: Optional[str] = None
+    due_at: Optional[datetime] = None
+    urgency_at: datetime
+    urgency_score: float  # hours to the boosted breach point, lower = more urgent
+    time_to_breach_hours: Optional[float] = None
+
+class QueueOut(BaseModel):
+    items: List[QueueItemOut]
+    next_cursor: Optional[str] = None
+
+class QueueSummaryOut(BaseModel):
+    user_id: int
+    open: int
+    overdue: int
+    due_within_24h: int
+    escalated: int
+    top_urgency_score: Optional[float] = None
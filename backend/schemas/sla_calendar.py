@@ -0,0 +1,31 @@
+from typing import List, Optional
+from datetime import date, time
+from pydantic import BaseModel, Field
+
+class SlaCalendarCreate(BaseModel):
+    bu_id: Optional[str] = None
+    name: str
+    timezone: str = "UTC"
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    cutoff: Optional[time] = None
+    workdays: str = Field("1111100", pattern="^[01]{7}$")
+    active: bool = True
+
+class SlaCalendarOut(BaseModel):
+    id: int
+    bu_id: Optional[str] = None
+    name: str
+    timezone: str
+    work_start: time
+    work_end: time
+    cutoff: Optional[time] = None
+    workdays: str
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+class SlaHolidayIn(BaseModel):
+    days: List[date]
+    name: Optional[str] = None
@@ -16,3 +16,10 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class UserRefOut(BaseModel):
+    """What `expand=users` embeds next to a user id."""
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    is_active: bool
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, List
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to stdlib json
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # OPT_UTC_Z keeps aware UTC datetimes rendered the same way pydantic does ("...Z")
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def schema_columns(schema: type[BaseModel], model) -> tuple:
+    # the ORM columns that back every field of an Out schema, in field order
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def rows_to_dicts(rows: Iterable) -> List[dict]:
+    # rows come straight from the DB (trusted), so no per-row validation
+    return [dict(r._mapping) for r in rows]
+
+
+def rows_response(rows: Iterable, status_code: int = 200) -> FastJSONResponse:
+    return FastJSONResponse(rows_to_dicts(rows), status_code=status_code)
+
+
+def fast_path(route_name: str) -> bool:
+    enabled = settings.fast_serialization
+    return "*" in enabled or route_name in enabled
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from sqlalchemy import and_, exists, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+from models.approval import Approval
+from models.exception import Exception as ExceptionModel
+from models.exception_type import ExceptionType
+from services.queue import decode_cursor, encode_cursor
+
+PENDING_COLUMNS = (
+    ExceptionModel.id,
+    ExceptionModel.type_id,
+    ExceptionModel.title,
+    ExceptionModel.severity,
+    ExceptionModel.priority,
+    ExceptionModel.bu_id,
+    ExceptionModel.created_by,
+    ExceptionModel.assigned_to,
+    ExceptionModel.due_at,
+    ExceptionModel.approval_requested_at,
+    (ExceptionModel.approval_level + 1).label("next_level"),
+    ExceptionType.approval_levels.label("required_levels"),
+)
+
+
+def _pending_for(approver_id: int, level: Optional[int] = None, type_id: Optional[int] = None):
+    """AWAITING_APPROVAL rows this approver may sign next: not their own
+    (maker-checker) and no earlier level of the current round signed by them."""
+    signed = exists().where(
+        Approval.exception_id == ExceptionModel.id,
+        Approval.approver_id == approver_id,
+        Approval.decided_at >= ExceptionModel.approval_requested_at,
+    )
+    conds = [
+        ExceptionModel.status == "AWAITING_APPROVAL",
+        or_(ExceptionModel.created_by.is_(None), ExceptionModel.created_by != approver_id),
+        ~signed,
+    ]
+    if level is not None:
+        conds.append(ExceptionModel.approval_level == level - 1)
+    if type_id is not None:
+        conds.append(ExceptionModel.type_id == type_id)
+    return and_(*conds)
+
+
+def pending_approvals(
+    db: Session,
+    approver_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    level: Optional[int] = None,
+    type_id: Optional[int] = None,
+):
+    """One page of the approver's inbox, oldest request first, walked along
+    ix_exceptions_pending_approval; counts per next level come from one GROUP BY."""
+    where = _pending_for(approver_id, level, type_id)
+    q = (
+        db.query(*PENDING_COLUMNS)
+        .join(ExceptionType, ExceptionType.id == ExceptionModel.type_id)
+        .filter(where)
+    )
+    if cursor:
+        after_at, after_id = decode_cursor(cursor)
+        q = q.filter(tuple_(ExceptionModel.approval_requested_at, ExceptionModel.id) > tuple_(after_at, after_id))
+    rows = q.order_by(ExceptionModel.approval_requested_at, ExceptionModel.id).limit(limit + 1).all()
+    items = [dict(r._mapping) for r in rows[:limit]]
+    next_cursor = (
+        encode_cursor(rows[limit - 1].approval_requested_at, rows[limit - 1].id) if len(rows) > limit else None
+    )
+
+    next_level = ExceptionModel.approval_level + 1
+    by_level = {
+        lvl: n
+        for lvl, n in db.query(next_level, func.count()).filter(where).group_by(next_level).all()
+    }
+    return items, next_cursor, by_level
@@ -0,0 +1,146 @@
+from typing import List, Optional
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, literal_column, select, delete, text, union_all
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import SessionLocal
+from models.exception import Exception as ExceptionModel
+from models.approval import Approval
+from models.attachment import Attachment
+from models.archive import ExceptionArchive, ApprovalArchive, AttachmentArchive
+from services.dedupe import DUPLICATE_STATUS
+
+ARCHIVED_STATUS = "CLOSED"
+
+
+def _shared_columns(archive_model, live_model) -> List[str]:
+    live = live_model.__table__.c
+    return [c.name for c in archive_model.__table__.c if c.name in live]
+
+
+def _month_bounds(d: date):
+    start = d.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def ensure_partitions(db: Session, months: set) -> None:
+    for table in ("exceptions_archive", "approvals_archive", "attachments_archive"):
+        for month in months:
+            start, end = _month_bounds(month)
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table}_y{start:%Y}m{start:%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+
+
+def archive_batch(db: Session, older_than: timedelta, batch_size: int) -> int:
+    """Move one batch of CLOSED exceptions (with approvals and attachment
+    metadata) into the archive tables, together with the DUPLICATE rows
+    linked to them. Runs in the caller's transaction."""
+    batch = db.execute(
+        select(ExceptionModel.id, ExceptionModel.updated_at)
+        .where(
+            ExceptionModel.status == ARCHIVED_STATUS,
+            ExceptionModel.updated_at < func.now() - older_than,
+        )
+        .order_by(ExceptionModel.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not batch:
+        return 0
+    # duplicates travel with their original: archived first, duplicate_of is
+    # copied intact instead of being nulled by the FK when the original goes
+    batch += db.execute(
+        select(ExceptionModel.id, ExceptionModel.updated_at)
+        .where(ExceptionModel.duplicate_of.in_([r.id for r in batch]), ExceptionModel.status == DUPLICATE_STATUS)
+        .order_by(ExceptionModel.id)
+        .with_for_update()
+    ).all()
+    ids = [r.id for r in batch]
+    ensure_partitions(db, {r.updated_at.date() for r in batch})
+
+    closed_at = ExceptionModel.updated_at.label("closed_at")
+    for archive_model, live_model in ((ApprovalArchive, Approval), (AttachmentArchive, Attachment)):
+        cols = _shared_columns(archive_model, live_model)
+        db.execute(
+            insert(archive_model).from_select(
+                cols + ["closed_at"],
+                select(*[live_model.__table__.c[c] for c in cols], closed_at)
+                .join(ExceptionModel, ExceptionModel.id == live_model.exception_id)
+                .where(live_model.exception_id.in_(ids)),
+            )
+        )
+    cols = _shared_columns(ExceptionArchive, ExceptionModel)
+    db.execute(
+        insert(ExceptionArchive).from_select(
+            cols + ["closed_at"],
+            select(*[ExceptionModel.__table__.c[c] for c in cols], closed_at).where(ExceptionModel.id.in_(ids)),
+        )
+    )
+    # approvals / attachments go with it via ON DELETE CASCADE
+    db.execute(delete(ExceptionModel).where(ExceptionModel.id.in_(ids)))
+    return len(ids)
+
+
+def archive_closed_exceptions(
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    older_than = timedelta(days=older_than_days or settings.archive_after_days)
+    batch_size = batch_size or settings.archive_batch_size
+    max_batches = max_batches or settings.archive_max_batches
+    moved = 0
+    for _ in range(max_batches):
+        # one short transaction per batch keeps locks and WAL bursts small
+        with SessionLocal() as db:
+            n = archive_batch(db, older_than, batch_size)
+            db.commit()
+        moved += n
+        if n < batch_size:
+            break
+    if moved:
+        print(f"Archived {moved} closed exceptions and duplicates.")
+    return moved
+
+
+# ---- unified reads over live + archive ----
+
+def _columns(model, names):
+    return [model.__table__.c[n] for n in names]
+
+
+def get_exception_any(db: Session, exc_id: int):
+    obj = db.get(ExceptionModel, exc_id)
+    if obj is not None:
+        return obj, False
+    row = db.query(ExceptionArchive).filter(ExceptionArchive.id == exc_id).first()
+    return row, row is not None
+
+
+def union_exceptions(names: List[str], live_criteria=(), archive_criteria=()):
+    live = select(*_columns(ExceptionModel, names), literal_column("false").label("archived")).where(*live_criteria)
+    cold = select(*_columns(ExceptionArchive, names), literal_column("true").label("archived")).where(*archive_criteria)
+    return union_all(live, cold).subquery()
+
+
+def union_attachments(names: List[str], exc_id: int):
+    live = select(*_columns(Attachment, names)).where(Attachment.exception_id == exc_id)
+    cold = select(*_columns(AttachmentArchive, names)).where(AttachmentArchive.exception_id == exc_id)
+    return union_all(live, cold).subquery()
+
+
+def approvals_any(db: Session, exc_id: int) -> list:
+    live = db.query(Approval).filter(Approval.exception_id == exc_id).order_by(Approval.level, Approval.id).all()
+    if live:
+        return live
+    return (
+        db.query(ApprovalArchive)
+        .filter(ApprovalArchive.exception_id == exc_id)
+        .order_by(ApprovalArchive.level, ApprovalArchive.id)
+        .all()
+    )
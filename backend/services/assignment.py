@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.assignment_rule import AssignmentRule
+from models.audit_event import AuditEvent
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from models.user import User
+from services.audit_chain import chain
+
+
+class AssignmentEngine:
+    """Routes exceptions to active users by the most specific AssignmentRule.
+
+    Per-user open counts live in memory: loaded with one GROUP BY, then kept
+    current through note_assigned/note_released as the services change
+    assignments. A periodic refresh() corrects drift from other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rules: Dict[Tuple[Optional[int], Optional[str]], AssignmentRule] = {}
+        self._active: set = set()
+        self._loads: Dict[int, int] = defaultdict(int)
+        self._rr_pos: Dict[int, int] = defaultdict(int)
+        self._loaded_at: float = 0.0
+
+    def refresh(self, db: Session) -> None:
+        rules = db.query(AssignmentRule).filter(AssignmentRule.active.is_(True)).all()
+        active = db.query(User.id).filter(User.is_active.is_(True)).all()
+        loads = (
+            db.query(ExceptionModel.assigned_to, func.count())
+            .filter(ExceptionModel.assigned_to.isnot(None), ExceptionModel.status.notin_(TERMINAL_STATUSES))
+            .group_by(ExceptionModel.assigned_to)
+            .all()
+        )
+        with self._lock:
+            self._rules = {(r.type_id, r.bu_id): r for r in rules}
+            for r in rules:
+                db.expunge(r)
+            self._active = {u for (u,) in active}
+            self._loads = defaultdict(int, {u: n for u, n in loads})
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def ensure_loaded(self, db: Session) -> None:
+        if time.monotonic() - self._loaded_at > settings.assignment_refresh_seconds:
+            self.refresh(db)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at > 0
+
+    def _rule_for(self, type_id: Optional[int], bu_id: Optional[str]) -> Optional[AssignmentRule]:
+        for key in ((type_id, bu_id), (type_id, None), (None, bu_id), (None, None)):
+            rule = self._rules.get(key)
+            if rule is not None:
+                return rule
+        return None
+
+    def pick(self, type_id: Optional[int], bu_id: Optional[str]) -> Optional[int]:
+        with self._lock:
+            rule = self._rule_for(type_id, bu_id)
+            if rule is None:
+                return None
+            pool = [u for u in rule.user_ids if u in self._active]
+            if not pool:
+                return None
+            if rule.strategy == "ROUND_ROBIN":
+                pos = self._rr_pos[rule.id]
+                user_id = pool[pos % len(pool)]
+                self._rr_pos[rule.id] = pos + 1
+            else:
+                user_id = min(pool, key=lambda u: (self._loads[u], u))
+            self._loads[user_id] += 1
+            return user_id
+
+    def note_assigned(self, new_user: Optional[int], old_user: Optional[int] = None) -> None:
+        if new_user == old_user or not self.loaded:
+            return
+        with self._lock:
+            if new_user is not None:
+                self._loads[new_user] += 1
+            if old_user is not None and self._loads[old_user] > 0:
+                self._loads[old_user] -= 1
+
+    def note_released(self, user_id: Optional[int]) -> None:
+        self.note_assigned(None, user_id)
+
+    def note_user(self, user_id: int, is_active: bool) -> None:
+        with self._lock:
+            (self._active.add if is_active else self._active.discard)(user_id)
+
+    def load_of(self, user_id: int) -> int:
+        return self._loads.get(user_id, 0)
+
+    def assign_one(self, db: Session, obj: ExceptionModel, actor_id: Optional[int] = None) -> Optional[int]:
+        # obj must be flushed (has an id); caller commits
+        self.ensure_loaded(db)
+        user_id = self.pick(obj.type_id, obj.bu_id)
+        if user_id is None:
+            return None
+        old = obj.assigned_to
+        obj.assigned_to = user_id
+        if old is not None:
+            self.note_released(old)
+        ev = dict(
+            at=datetime.now(timezone.utc),
+            actor_id=actor_id,
+            action="AUTO_ASSIGNED",
+            entity_type="exception",
+            entity_id=obj.id,
+            old={"assigned_to": old},
+            new={"assigned_to": user_id},
+        )
+        obj.audit_head = chain(ev, obj.audit_head)
+        db.add(AuditEvent(**ev))
+        return user_id
+
+    def assign_batch(
+        self,
+        db: Session,
+        items: Iterable[Tuple[int, Optional[int], Optional[str], Optional[int]]],
+        actor_id: Optional[int] = None,
+        action: str = "AUTO_ASSIGNED",
+    ) -> Tuple[Dict[int, int], List[int]]:
+        """Assign (exception id, type_id, bu_id, current assignee) tuples in one pass.
+
+        Decisions are made in memory, then written with one executemany UPDATE
+        and one bulk audit INSERT. Caller commits.
+        """
+        self.ensure_loaded(db)
+        assigned: Dict[int, int] = {}
+        previous: Dict[int, Optional[int]] = {}
+        unassigned: List[int] = []
+        for exc_id, type_id, bu_id, current in items:
+            user_id = self.pick(type_id, bu_id)
+            if user_id is None:
+                unassigned.append(exc_id)
+                continue
+            assigned[exc_id] = user_id
+            previous[exc_id] = current
+            if current is not None:
+                self.note_released(current)
+        if not assigned:
+            return assigned, unassigned
+
+        now = datetime.now(timezone.utc)
+        # one locked read of the chain heads for the whole batch
+        heads = dict(
+            db.query(ExceptionModel.id, ExceptionModel.audit_head)
+            .filter(ExceptionModel.id.in_(list(assigned)))
+            .with_for_update()
+            .all()
+        )
+        events = [
+            {
+                "at": now,
+                "actor_id": actor_id,
+                "action": action,
+                "entity_type": "exception",
+                "entity_id": e,
+                "old": {"assigned_to": previous[e]},
+                "new": {"assigned_to": u},
+            }
+            for e, u in assigned.items()
+        ]
+        for ev in events:
+            heads[ev["entity_id"]] = chain(ev, heads.get(ev["entity_id"]))
+        db.execute(
+            update(ExceptionModel),
+            [{"id": e, "assigned_to": u, "audit_head": heads[e]} for e, u in assigned.items()],
+        )
+        db.execute(insert(AuditEvent), events)
+        return assigned, unassigned
+
+
+assigner = AssignmentEngine()
@@ -0,0 +1,178 @@
+"""Tamper-evident audit trail.
+
+Every audit event stores prev_hash (the hash of the previous event of the same
+entity) and hash = sha256(prev_hash + event content). The latest hash per
+exception is cached on exceptions.audit_head, so writers chain a new event from
+the row they already hold (locked) instead of reading the last event back.
+
+Verify with:  python -m services.audit_chain [--workers N] [--partitions N]
+"""
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, union_all
+
+
+def _ts(at: datetime) -> str:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def event_hash(
+    prev_hash: Optional[str],
+    at: datetime,
+    actor_id: Optional[int],
+    action: str,
+    entity_type: str,
+    entity_id: int,
+    old: Optional[dict],
+    new: Optional[dict],
+) -> str:
+    # canonical JSON: the same bytes whether the values come from Python or back out of JSONB
+    payload = json.dumps(
+        [prev_hash, _ts(at), actor_id, action, entity_type, entity_id, old, new],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chain(event: Dict[str, Any], prev_hash: Optional[str]) -> str:
+    """Fill prev_hash/hash on an audit event dict (insert(AuditEvent) row) and return the new head."""
+    event["prev_hash"] = prev_hash
+    event["hash"] = event_hash(
+        prev_hash, event["at"], event.get("actor_id"), event["action"],
+        event["entity_type"], event["entity_id"], event.get("old"), event.get("new"),
+    )
+    return event["hash"]
+
+
+# ---- verification ----
+
+def _partitions(conn, n: int) -> List[Tuple[str, int, int]]:
+    from models.audit_event import AuditEvent
+
+    tasks = []
+    for entity_type, lo, hi in conn.execute(
+        select(AuditEvent.entity_type, func.min(AuditEvent.entity_id), func.max(AuditEvent.entity_id))
+        .group_by(AuditEvent.entity_type)
+    ):
+        step = max(1, (hi - lo + n) // n)
+        tasks.extend((entity_type, start, min(start + step - 1, hi)) for start in range(lo, hi + 1, step))
+    return tasks
+
+
+def _heads(conn, lo: int, hi: int) -> Dict[int, Optional[str]]:
+    from models.archive import ExceptionArchive
+    from models.exception import Exception as ExceptionModel
+
+    q = union_all(
+        select(ExceptionModel.id, ExceptionModel.audit_head).where(ExceptionModel.id.between(lo, hi)),
+        select(ExceptionArchive.id, ExceptionArchive.audit_head).where(ExceptionArchive.id.between(lo, hi)),
+    )
+    return {r.id: r.audit_head for r in conn.execute(q)}
+
+
+def check_chains(rows: Iterable[Any], entity_type: str, heads: Dict[int, Optional[str]]) -> dict:
+    """One pass over events sorted by (entity_id, id); reports the first broken link per entity."""
+    out = {"events": 0, "entities": 0, "legacy": 0, "broken": []}
+    current, last, bad = None, None, False
+
+    def close_chain():
+        # a deleted tail leaves the cached head pointing past the last event
+        if not bad and last is not None and current in heads and heads[current] != last[1]:
+            out["broken"].append({
+                "event_id": last[0], "entity_type": entity_type, "entity_id": current,
+                "reason": "chain head on the exception does not match the last event",
+            })
+
+    for r in rows:
+        if r.entity_id != current:
+            if current is not None:
+                close_chain()
+            current, last, bad = r.entity_id, None, False
+            out["entities"] += 1
+        out["events"] += 1
+        if bad:
+            continue
+        reason = None
+        if r.hash is None:
+            if last is None:
+                out["legacy"] += 1  # written before chaining existed
+                continue
+            reason = "unhashed event after the chain started"
+        elif r.prev_hash != (last[1] if last else None):
+            reason = "prev_hash does not match the previous event"
+        elif r.hash != event_hash(r.prev_hash, r.at, r.actor_id, r.action, entity_type, r.entity_id, r.old, r.new):
+            reason = "event content does not match its hash"
+        if reason:
+            bad = True
+            out["broken"].append(
+                {"event_id": r.id, "entity_type": entity_type, "entity_id": r.entity_id, "reason": reason}
+            )
+            continue
+        last = (r.id, r.hash)
+    if current is not None:
+        close_chain()
+    return out
+
+
+def verify_range(task: Tuple[str, int, int]) -> dict:
+    """Check every chain of one entity type with entity_id in [lo, hi], streaming the events."""
+    from db import engine
+    from models.audit_event import AuditEvent
+
+    entity_type, lo, hi = task
+    cols = (
+        AuditEvent.id, AuditEvent.at, AuditEvent.actor_id, AuditEvent.action, AuditEvent.entity_id,
+        AuditEvent.old, AuditEvent.new, AuditEvent.prev_hash, AuditEvent.hash,
+    )
+    with engine.connect() as conn:
+        heads = _heads(conn, lo, hi) if entity_type == "exception" else {}
+        rows = conn.execution_options(stream_results=True, yield_per=5000).execute(
+            select(*cols)
+            .where(AuditEvent.entity_type == entity_type, AuditEvent.entity_id.between(lo, hi))
+            .order_by(AuditEvent.entity_id, AuditEvent.id)
+        )
+        return check_chains(rows, entity_type, heads)
+
+
+def verify(workers: int = 4, partitions: Optional[int] = None) -> dict:
+    """Verify all chains, partitioned by entity id range across a process pool."""
+    from db import engine
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        tasks = _partitions(conn, partitions or workers * 4)
+    total = {"events": 0, "entities": 0, "legacy": 0, "broken_entities": 0, "first_broken": None}
+    broken: List[dict] = []
+    # spawn: workers open their own connections instead of inheriting the parent's pool
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        for res in pool.map(verify_range, tasks):
+            for k in ("events", "entities", "legacy"):
+                total[k] += res[k]
+            broken.extend(res["broken"])
+    total["broken_entities"] = len(broken)
+    total["first_broken"] = min(broken, key=lambda b: b["event_id"]) if broken else None
+    total["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return total
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Verify the audit_events hash chains.")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--partitions", type=int, default=None, help="id ranges per entity type (default 4 x workers)")
+    args = p.parse_args(argv)
+    result = verify(args.workers, args.partitions)
+    print(json.dumps(result, indent=2, default=str))
+    return 1 if result["first_broken"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
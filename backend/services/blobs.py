@@ -0,0 +1,121 @@
+import base64
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import SessionLocal
+from models.archive import AttachmentArchive
+from models.attachment import Attachment
+from models.attachment_derivative import AttachmentDerivative
+from models.blob import Blob
+from services.previews import derived_keys
+from storage.s3 import delete_objects
+
+BLOB_PREFIX = "blobs/sha256"
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_sha256(value: str) -> str:
+    v = (value or "").strip().lower()
+    if not _SHA256_HEX.match(v):
+        raise HTTPException(status_code=400, detail="sha256 must be 64 hex characters")
+    return v
+
+
+def blob_key(sha256: str) -> str:
+    # two levels of fan-out keep listings of the prefix manageable
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def checksum_b64(sha256: str) -> str:
+    """The hex digest in the base64 form S3 uses for x-amz-checksum-sha256."""
+    return base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+
+
+def existing(db: Session, hashes: Iterable[str]) -> List[str]:
+    """Which of these hashes are already stored (uploaded and verified)."""
+    hashes = list({normalize_sha256(h) for h in hashes})
+    if not hashes:
+        return []
+    return list(db.scalars(select(Blob.sha256).where(Blob.sha256.in_(hashes), Blob.status == "READY")))
+
+
+def acquire(db: Session, sha256: str, size: Optional[int] = None, mime: Optional[str] = None) -> Blob:
+    """Take a reference on the blob, creating it as PENDING if new. One upsert,
+    so concurrent uploads of the same content agree on a single row."""
+    stmt = (
+        pg_insert(Blob)
+        .values(sha256=sha256, s3_key=blob_key(sha256), size=size, mime=mime, refcount=1)
+        .on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"refcount": Blob.refcount + 1, "unreferenced_at": None},
+        )
+        .returning(Blob)
+    )
+    return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+
+def release(db: Session, sha256: str) -> None:
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(
+            refcount=Blob.refcount - 1,
+            unreferenced_at=case((Blob.refcount <= 1, datetime.now(timezone.utc)), else_=None),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def mark_ready(db: Session, sha256: str, size: int, etag: Optional[str]) -> None:
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(status="READY", size=size, etag=etag)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def collect_garbage(grace_hours: Optional[float] = None, batch_size: Optional[int] = None) -> int:
+    """Delete blobs unreferenced for longer than the grace period, objects first.
+
+    Candidate rows stay locked until their S3 objects are gone, so a concurrent
+    acquire() of the same hash waits and then starts a fresh PENDING blob
+    instead of pointing at an object that is about to disappear. The NOT EXISTS
+    checks are a safety net against a drifted refcount."""
+    grace = timedelta(hours=settings.blob_gc_grace_hours if grace_hours is None else grace_hours)
+    batch_size = batch_size or settings.blob_gc_batch_size
+    cutoff = datetime.now(timezone.utc) - grace
+    removed = 0
+    with SessionLocal() as db:
+        while True:
+            rows = db.execute(
+                select(Blob.sha256, Blob.s3_key)
+                .where(
+                    Blob.refcount <= 0,
+                    Blob.unreferenced_at < cutoff,
+                    ~exists().where(Attachment.blob_sha256 == Blob.sha256),
+                    ~exists().where(AttachmentArchive.blob_sha256 == Blob.sha256),
+                )
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                break
+            keys = [r.s3_key for r in rows]
+            delete_objects(keys + [k for key in keys for k in derived_keys(key)])
+            db.execute(delete(AttachmentDerivative).where(AttachmentDerivative.s3_key.in_(keys)))
+            db.execute(delete(Blob).where(Blob.sha256.in_([r.sha256 for r in rows])))
+            db.commit()
+            removed += len(rows)
+            if len(rows) < batch_size:
+                break
+    if removed:
+        print(f"Blob GC removed {removed} unreferenced blobs.")
+    return removed
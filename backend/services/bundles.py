@@ -0,0 +1,202 @@
+import csv
+import io
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.archive import AttachmentArchive
+from models.attachment import Attachment
+from storage.s3 import open_object
+
+# formats that are already compressed; deflating them again only burns CPU
+_STORED_MIME_PREFIXES = ("image/", "video/", "audio/")
+_STORED_MIMES = {
+    "application/pdf", "application/zip", "application/gzip", "application/x-7z-compressed",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+_DONE = object()
+
+
+class BundleEntry(NamedTuple):
+    id: int
+    exception_id: int
+    filename: str
+    mime: Optional[str]
+    s3_key: str
+    size: Optional[int]
+    sha256: Optional[str]
+    uploaded_at: Optional[datetime]
+
+
+def bundle_entries(db: Session, exception_ids: List[int]) -> List[BundleEntry]:
+    """Attachments (live and archived) of these exceptions, in zip order."""
+    names = BundleEntry._fields
+
+    def part(model):
+        return select(*[model.__table__.c[n] for n in names]).where(model.exception_id.in_(exception_ids))
+
+    both = union_all(part(Attachment), part(AttachmentArchive)).subquery()
+    rows = db.execute(select(*both.c).order_by(both.c.exception_id, both.c.id)).all()
+    return [BundleEntry(*r) for r in rows]
+
+
+def _compression(mime: Optional[str]) -> int:
+    m = (mime or "").lower()
+    if m in _STORED_MIMES or m.startswith(_STORED_MIME_PREFIXES):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _arcname(e: BundleEntry) -> str:
+    # the id prefix keeps names unique when two files share a filename
+    return f"{e.exception_id}/{e.id}_{e.filename}"
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target for ZipFile: collects what it writes so the
+    generator can hand it to the response. Not seekable, so zipfile writes
+    data descriptors after each entry instead of seeking back."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        return len(b)
+
+    def take(self) -> bytes:
+        out, self._buf = bytes(self._buf), bytearray()
+        return out
+
+
+class _Prefetcher:
+    """Reads up to BUNDLE_PREFETCH objects concurrently, each into its own
+    bounded queue of chunks. A reader blocks when its queue is full, so memory
+    stays at prefetch x buffer_chunks x chunk_size whatever the object sizes."""
+
+    def __init__(self, entries: List[BundleEntry]):
+        self._entries = entries
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, settings.bundle_prefetch), thread_name_prefix="ems-bundle")
+        # admit entries one slot at a time so a worker never sits on a file far ahead of the writer
+        self._slots = threading.Semaphore(max(1, settings.bundle_prefetch))
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, settings.bundle_buffer_chunks)) for _ in entries]
+        self._feeder = threading.Thread(target=self._feed, name="ems-bundle-feed", daemon=True)
+        self._feeder.start()
+
+    def _feed(self) -> None:
+        for i, e in enumerate(self._entries):
+            while not self._slots.acquire(timeout=0.5):
+                if self._stop.is_set():
+                    return
+            if self._stop.is_set():
+                return
+            self._pool.submit(self._read, e, self._queues[i])
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, e: BundleEntry, q: queue.Queue) -> None:
+        chunk = settings.bundle_chunk_kb * 1024
+        try:
+            body = open_object(e.s3_key)
+            try:
+                for data in body.iter_chunks(chunk):
+                    if not self._put(q, data):
+                        return
+            finally:
+                body.close()
+            self._put(q, _DONE)
+        except Exception as exc:  # surfaced to the writer in entry order
+            self._put(q, exc)
+
+    def chunks(self, i: int) -> Iterator[bytes]:
+        """Chunks of entry i; raises the read error if the object could not be fetched."""
+        q = self._queues[i]
+        try:
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._queues[i] = None
+            self._slots.release()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _manifest(rows: List[list]) -> bytes:
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["attachment_id", "exception_id", "path", "size", "sha256", "uploaded_at", "status"])
+    w.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+def stream_zip(entries: List[BundleEntry]) -> Iterator[bytes]:
+    """Yield a ZIP of the objects as their bytes arrive from S3, plus a
+    MANIFEST.csv listing every entry (and any object that could not be read).
+
+    Runs in the response's threadpool; if the client goes away the generator
+    is closed and the prefetch readers stop at their next chunk."""
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    sink = _Sink()
+    fetch = _Prefetcher(entries)
+    manifest = []
+    try:
+        with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+            for i, e in enumerate(entries):
+                info = zipfile.ZipInfo(_arcname(e), date_time=(e.uploaded_at or datetime.now(timezone.utc)).timetuple()[:6])
+                info.compress_type = _compression(e.mime)
+                info.external_attr = 0o644 << 16
+                status = "ok"
+                # force_zip64: the size is not trusted up front and may pass 2 GiB
+                with zf.open(info, mode="w", force_zip64=True) as dst:
+                    try:
+                        for data in fetch.chunks(i):
+                            dst.write(data)
+                            out = sink.take()
+                            if out:
+                                yield out
+                    except (ClientError, BotoCoreError) as exc:
+                        # the entry stays in the zip (possibly truncated); the manifest says why.
+                        # Transport errors (timeouts, dropped connections) too: they must not cut the stream
+                        code = (
+                            exc.response.get("Error", {}).get("Code", "error") if isinstance(exc, ClientError)
+                            else type(exc).__name__
+                        )
+                        status = f"missing: {code}"
+                        print(f"Bundle: attachment {e.id} ({e.s3_key}) not readable: {status}")
+                manifest.append([e.id, e.exception_id, _arcname(e), e.size, e.sha256,
+                                 e.uploaded_at.isoformat() if e.uploaded_at else None, status])
+                out = sink.take()
+                if out:
+                    yield out
+            zf.writestr("MANIFEST.csv", _manifest(manifest))
+        yield sink.take()
+    finally:
+        fetch.close()
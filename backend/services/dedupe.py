@@ -0,0 +1,161 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import SessionLocal
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from models.exception_type import ExceptionType
+
+DUPLICATE_STATUS = "DUPLICATE"
+# top-level fields a type may dedupe on; anything else is looked up in `attributes`
+COLUMN_FIELDS = ("title", "bu_id", "severity", "description")
+# predicate of ux_exceptions_open_fingerprint, spelled out literally so ON CONFLICT can infer the index
+OPEN_FINGERPRINT_WHERE = text(
+    "fingerprint IS NOT NULL AND status NOT IN (%s)" % ", ".join(f"'{s}'" for s in TERMINAL_STATUSES)
+)
+
+
+def _norm(v: Any) -> Any:
+    # "ACC-1 " == "acc-1", 100 == 100.0 == "100.00"
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float, Decimal)):
+        return format(Decimal(str(v)).normalize(), "f")
+    s = str(v).strip().casefold()
+    try:
+        return format(Decimal(s).normalize(), "f")
+    except (InvalidOperation, ValueError):
+        return s
+
+
+def fingerprint(type_id: int, fields: Optional[List[str]], data: Dict[str, Any]) -> Optional[str]:
+    """sha256 over the type and its dedupe fields, or None when the type does not
+    dedupe or the item carries none of the fields."""
+    if not fields:
+        return None
+    attrs = data.get("attributes") or {}
+    values = [_norm(data.get(f) if f in COLUMN_FIELDS else attrs.get(f)) for f in fields]
+    if all(v is None for v in values):
+        return None
+    payload = json.dumps([type_id, fields, values], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def find_open(db: Session, fingerprints: Iterable[str]) -> Dict[str, int]:
+    """fingerprint -> id of the open exception holding it (the unique index guarantees at most one)."""
+    fps = list(set(fingerprints))
+    if not fps:
+        return {}
+    return dict(
+        db.query(ExceptionModel.fingerprint, ExceptionModel.id)
+        .filter(ExceptionModel.fingerprint.in_(fps), ExceptionModel.status.notin_(TERMINAL_STATUSES))
+        .all()
+    )
+
+
+def insert_or_link(db: Session, data: Dict[str, Any]) -> Tuple[ExceptionModel, Optional[int]]:
+    """Add one exception; if an open exception has its fingerprint, add it as
+    a DUPLICATE linked to that original instead. Returns (row, original id)."""
+    et = db.get(ExceptionType, data["type_id"])
+    fp = data["fingerprint"] = fingerprint(data["type_id"], et.dedupe_fields if et else None, data)
+    original = find_open(db, [fp]).get(fp) if fp else None
+    if original is None:
+        obj = ExceptionModel(**data)
+        try:
+            # savepoint: losing the race on the unique index must not cost the whole transaction
+            with db.begin_nested():
+                db.add(obj)
+            if fp:
+                bloom.add(fp)
+            return obj, None
+        except IntegrityError:
+            original = find_open(db, [fp]).get(fp) if fp else None
+            if original is None:
+                raise
+    obj = ExceptionModel(**data, status=DUPLICATE_STATUS, duplicate_of=original)
+    db.add(obj)
+    db.flush()
+    bump_originals(db, {original: 1})
+    return obj, original
+
+
+def bump_originals(db: Session, counts: Dict[int, int]) -> None:
+    """duplicate_count += n on each original, one executemany UPDATE."""
+    if not counts:
+        return
+    t = ExceptionModel.__table__
+    db.execute(
+        update(t)
+        .where(t.c.id == bindparam("orig_id"))
+        .values(duplicate_count=t.c.duplicate_count + bindparam("n"), updated_at=datetime.now(timezone.utc)),
+        [{"orig_id": i, "n": n} for i, n in counts.items()],
+    )
+
+
+class FingerprintBloom:
+    """Bloom filter over the fingerprints of open exceptions: a miss proves a
+    fingerprint is new, so bulk ingest only asks Postgres about the hits.
+
+    Sized for DEDUPE_BLOOM_CAPACITY at DEDUPE_BLOOM_ERROR false positives and
+    rebuilt from the table every DEDUPE_BLOOM_REFRESH_SECONDS (closed
+    exceptions never leave a Bloom filter; rebuilding drops them). Fingerprints
+    inserted by other workers in between are caught by the unique index."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.built_at = 0.0
+        self.count = 0
+
+    def _positions(self, fp: str):
+        # the fingerprint is already a sha256: two 64-bit slices give every probe (double hashing)
+        h1, h2 = int(fp[:16], 16), int(fp[16:32], 16) | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, fp: str) -> None:
+        with self._lock:
+            for p in self._positions(fp):
+                self._array[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def __contains__(self, fp: str) -> bool:
+        a = self._array
+        return all(a[p >> 3] & (1 << (p & 7)) for p in self._positions(fp))
+
+    def rebuild(self, db: Session) -> None:
+        array, count = bytearray(len(self._array)), 0
+        rows = db.query(ExceptionModel.fingerprint).filter(
+            ExceptionModel.fingerprint.isnot(None), ExceptionModel.status.notin_(TERMINAL_STATUSES)
+        ).yield_per(10_000)
+        for (fp,) in rows:
+            for p in self._positions(fp):
+                array[p >> 3] |= 1 << (p & 7)
+            count += 1
+        with self._lock:
+            self._array, self.count, self.built_at = array, count, time.monotonic()
+        if count > settings.dedupe_bloom_capacity:
+            print(f"Dedupe Bloom filter holds {count} fingerprints, above its capacity "
+                  f"{settings.dedupe_bloom_capacity}; raise DEDUPE_BLOOM_CAPACITY.")
+
+    def ensure_fresh(self) -> None:
+        if time.monotonic() - self.built_at < settings.dedupe_bloom_refresh_seconds and self.built_at:
+            return
+        with SessionLocal() as db:
+            self.rebuild(db)
+
+
+bloom = FingerprintBloom(settings.dedupe_bloom_capacity, settings.dedupe_bloom_error)
@@ -0,0 +1,118 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import SessionLocal
+from models.user import User
+
+# id fields that `expand=users` resolves, and the key the user lands under
+EXPAND_KEYS = {
+    "created_by": "created_by_user",
+    "assigned_to": "assigned_to_user",
+    "approver_id": "approver",
+    "actor_id": "actor",
+    "uploaded_by": "uploaded_by_user",
+}
+
+
+class UserRef(NamedTuple):
+    id: int
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+
+
+class UserDirectory:
+    """id -> (username, full_name, is_active) for every user, held in memory.
+
+    Loaded once, then kept current incrementally: create_user calls
+    note_user, and a background thread picks up rows whose updated_at moved
+    past the high-water mark (changes from other workers) every
+    USER_DIRECTORY_REFRESH_SECONDS. Ids the cache has not seen yet are
+    fetched in one query when they are resolved, so results are never stale
+    by more than one refresh interval and never missing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: Dict[int, UserRef] = {}
+        self._high_water: Optional[datetime] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def refresh(self, db: Session) -> int:
+        cols = (User.id, User.username, User.full_name, User.is_active, User.updated_at)
+        q = db.query(*cols)
+        if self._high_water is not None:
+            # >=: rows committed with the same timestamp as the last one seen are re-read, not skipped
+            q = q.filter(User.updated_at >= self._high_water)
+        rows = q.all()
+        with self._lock:
+            for r in rows:
+                self._users[r.id] = UserRef(r.id, r.username, r.full_name, bool(r.is_active))
+                if self._high_water is None or r.updated_at > self._high_water:
+                    self._high_water = r.updated_at
+            if self._high_water is None:
+                self._high_water = datetime.min  # empty table: later refreshes stay incremental
+        return len(rows)
+
+    def note_user(self, user: User) -> None:
+        with self._lock:
+            self._users[user.id] = UserRef(user.id, user.username, user.full_name, bool(user.is_active))
+
+    def resolve(self, db: Session, ids: Iterable[Optional[int]]) -> Dict[int, UserRef]:
+        wanted = {i for i in ids if i is not None}
+        with self._lock:
+            found = {i: self._users[i] for i in wanted if i in self._users}
+        missing = wanted - found.keys()
+        if missing:
+            rows = (
+                db.query(User.id, User.username, User.full_name, User.is_active)
+                .filter(User.id.in_(missing))
+                .all()
+            )
+            with self._lock:
+                for r in rows:
+                    found[r.id] = self._users[r.id] = UserRef(r.id, r.username, r.full_name, bool(r.is_active))
+        return found
+
+    def expand(self, db: Session, rows: List[dict], *more: List[dict]) -> List[dict]:
+        """Add a user object next to every user id field of the rows (EXPAND_KEYS),
+        resolving all of them in one pass. `more` are further lists of the same
+        response (a detail's history, approvals, ...) resolved in that pass too."""
+        groups = [(g, [f for f in EXPAND_KEYS if f in g[0]]) for g in (rows, *more) if g]
+        users = self.resolve(db, (r[f] for g, fields in groups for r in g for f in fields))
+        for g, fields in groups:
+            for r in g:
+                for f in fields:
+                    u = users.get(r[f])
+                    r[EXPAND_KEYS[f]] = u._asdict() if u else None
+        return rows
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ems-user-directory", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    self.refresh(db)
+            except Exception as e:
+                print("User directory refresh failed:", e)
+            self._stop.wait(settings.user_directory_refresh_seconds)
+
+    def status(self) -> dict:
+        return {"users": len(self._users), "high_water": self._high_water, "running": self._thread is not None}
+
+
+directory = UserDirectory()
@@ -4,9 +4,13 @@ from datetime import datetime, timezone
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from models.exception import Exception as ExceptionModel
+from config import settings
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
 from models.audit_event import AuditEvent
 from models.approval import Approval
+from services.audit_chain import chain as chain_event
+from services.assignment import assigner
+from services.notifications import notifier
 
 ALLOWED_STATUSES = {
     "NEW",
@@ -18,6 +22,7 @@ ALLOWED_STATUSES = {
     "RESOLVED",
     "CLOSED",
     "ESCALATED",
+    "DUPLICATE",
 }
 
 # Very simple allowed transitions for now
@@ -31,17 +36,43 @@ TRANSITIONS = {
     "RESOLVED": {"CLOSED"},
     "ESCALATED": {"IN_PROGRESS", "AWAITING_APPROVAL"},
     "CLOSED": set(),
+    "DUPLICATE": set(),
 }
 
-from datetime import timedelta
 from models.exception_type import ExceptionType
+from services.queue import compute_urgency_at
+from services.sla_calendar import add_business_time, business_seconds_between, extend_without_cutoff
+from services.sla_alerts import tier_at
 
-def compute_due_at(db: Session, type_id: int) -> datetime:
+# the SLA clock does not run while waiting on an approver
+SLA_PAUSED_STATUSES = {"AWAITING_APPROVAL"}
+
+def compute_due_at(db: Session, type_id: int, bu_id: Optional[str] = None, start: Optional[datetime] = None) -> datetime:
     et = db.get(ExceptionType, type_id)
     if not et:
         raise HTTPException(status_code=400, detail="Invalid exception type")
     hours = et.default_sla_hours or 0
-    return datetime.now(timezone.utc) + timedelta(hours=hours)
+    # business hours when the BU (or the default) has an SLA calendar, wall-clock otherwise
+    return add_business_time(db, bu_id, start or datetime.now(timezone.utc), hours * 3600)
+
+def _sla_pause_resume(db: Session, obj: ExceptionModel, to_status: str) -> Optional[int]:
+    """Stop the SLA clock entering a paused status; on leaving it, push due_at
+    out by the working time spent paused. Returns the paused seconds on resume."""
+    now = datetime.now(timezone.utc)
+    if to_status in SLA_PAUSED_STATUSES:
+        if obj.sla_paused_at is None:
+            obj.sla_paused_at = now
+        return None
+    if obj.sla_paused_at is None:
+        return None
+    paused = business_seconds_between(db, obj.bu_id, obj.sla_paused_at, now)
+    obj.sla_paused_at = None
+    if obj.due_at is not None and paused > 0:
+        obj.due_at = extend_without_cutoff(db, obj.bu_id, obj.due_at, paused)
+        obj.urgency_at = compute_urgency_at(obj.due_at, obj.priority, obj.severity)
+        # tiers warned before the pause fire again for the extended window
+        obj.sla_tier = min(obj.sla_tier or 0, tier_at(db, obj.type_id, obj.bu_id, obj.due_at, now))
+    return paused
 
 
 def _audit(
@@ -52,8 +83,9 @@ def _audit(
     entity_id: int,
     old: Optional[Dict[str, Any]],
     new: Optional[Dict[str, Any]],
+    chain: Optional[ExceptionModel] = None,
 ) -> None:
-    ev = AuditEvent(
+    ev = dict(
         at=datetime.now(timezone.utc),
         actor_id=actor_id,
         action=action,
@@ -62,10 +94,22 @@ def _audit(
         old=old,
         new=new,
     )
-    db.add(ev)
+    if chain is not None:
+        # chain from the head cached on the (locked) row: no read of the previous event
+        chain.audit_head = chain_event(ev, chain.audit_head)
+    db.add(AuditEvent(**ev))
+
+def _track_load(assigned_to: Optional[int], from_status: str, to_status: str) -> None:
+    # keep the auto-assignment engine's in-memory open counts current
+    was_open, is_open = from_status not in TERMINAL_STATUSES, to_status not in TERMINAL_STATUSES
+    if was_open and not is_open:
+        assigner.note_released(assigned_to)
+    elif is_open and not was_open:
+        assigner.note_assigned(assigned_to)
 
 def _get_exception(db: Session, exc_id: int) -> ExceptionModel:
-    obj = db.get(ExceptionModel, exc_id)
+    # locked: writers serialize on the row, which keeps its audit chain linear
+    obj = db.get(ExceptionModel, exc_id, with_for_update=True)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exception not found")
     return obj
@@ -77,6 +121,8 @@ def assign_exception(
     old = {"assigned_to": obj.assigned_to}
     obj.assigned_to = assigned_to
     db.flush()
+    if obj.status not in TERMINAL_STATUSES:
+        assigner.note_assigned(assigned_to, old["assigned_to"])
     _audit(
         db,
         actor_id=actor_id,
@@ -85,8 +131,10 @@ def assign_exception(
         entity_id=obj.id,
         old=old,
         new={"assigned_to": obj.assigned_to, "comment": comment},
+        chain=obj,
     )
     db.commit()
+    notifier.publish_assignments({obj.id: assigned_to}, actor_id=actor_id)
     db.refresh(obj)
     return obj
 
@@ -102,11 +150,22 @@ def transition_exception(
         raise HTTPException(status_code=400, detail=f"Invalid transition {obj.status} -> {to_status}")
 
     old = {"status": obj.status}
+    old_due = obj.due_at
     obj.status = to_status
     if to_status == "ESCALATED":
         obj.escalated_at = datetime.now(timezone.utc)
+    elif to_status == "AWAITING_APPROVAL":
+        # a new approval round: every level has to sign off again
+        obj.approval_requested_at = datetime.now(timezone.utc)
+        obj.approval_level = 0
+    _track_load(obj.assigned_to, old["status"], to_status)
+    paused = _sla_pause_resume(db, obj, to_status)
 
     db.flush()
+    new = {"status": obj.status, "comment": comment}
+    if paused is not None:
+        old["due_at"] = old_due.isoformat() if old_due else None
+        new.update(sla_paused_seconds=paused, due_at=obj.due_at.isoformat() if obj.due_at else None)
     _audit(
         db,
         actor_id=actor_id,
@@ -114,9 +173,14 @@ def transition_exception(
         entity_type="exception",
         entity_id=obj.id,
         old=old,
-        new={"status": obj.status, "comment": comment},
+        new=new,
+        chain=obj,
     )
     db.commit()
+    if to_status == "AWAITING_APPROVAL":
+        notifier.publish("APPROVAL_REQUESTED", settings.notify_approvals_to, [obj.id])
+    elif to_status == "ESCALATED":
+        notifier.publish("ESCALATED", obj.assigned_to, [obj.id])
     db.refresh(obj)
     return obj
 
@@ -132,12 +196,33 @@ def approve_exception(
     if decision not in ("APPROVED", "REJECTED"):
         raise HTTPException(status_code=400, detail="decision must be APPROVED or REJECTED")
 
-    obj = _get_exception(db, exc_id)
+    # row lock: two approvers must not both sign the same level
+    obj = db.get(ExceptionModel, exc_id, with_for_update=True)
+    if not obj:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exception not found")
+    if obj.status != "AWAITING_APPROVAL":
+        raise HTTPException(status_code=400, detail=f"Exception is {obj.status}, not AWAITING_APPROVAL")
 
     # maker-checker: creator cannot approve own exception (if creator known)
     if obj.created_by is not None and obj.created_by == approver_id:
         raise HTTPException(status_code=400, detail="Maker-checker violation: creator cannot approve")
 
+    next_level = obj.approval_level + 1
+    if level != next_level:
+        raise HTTPException(status_code=400, detail=f"Next approval level is {next_level}")
+    signed = (
+        db.query(Approval.id)
+        .filter(
+            Approval.exception_id == obj.id,
+            Approval.approver_id == approver_id,
+            Approval.decided_at >= obj.approval_requested_at,
+        )
+        .first()
+    )
+    if signed:
+        raise HTTPException(status_code=400, detail="Maker-checker violation: approver already signed this round")
+    required = db.query(ExceptionType.approval_levels).filter(ExceptionType.id == obj.type_id).scalar() or 1
+
     # record the approval
     ap = Approval(
         exception_id=obj.id,
@@ -149,14 +234,27 @@ def approve_exception(
     )
     db.add(ap)
 
-    old = {"status": obj.status}
-    if decision == "APPROVED":
-        obj.status = "APPROVED"
-    else:
+    old = {"status": obj.status, "approval_level": obj.approval_level}
+    old_due = obj.due_at
+    if decision == "REJECTED":
         obj.status = "REJECTED"
+    else:
+        obj.approval_level = level
+        # intermediate levels keep it AWAITING_APPROVAL (and the SLA clock paused)
+        if level >= required:
+            obj.status = "APPROVED"
+    _track_load(obj.assigned_to, old["status"], obj.status)
+    paused = _sla_pause_resume(db, obj, obj.status)
 
     db.flush()
 
+    new = {
+        "status": obj.status,
+        "approval": {"level": level, "of": required, "decision": decision, "comment": comment},
+    }
+    if paused is not None:
+        old["due_at"] = old_due.isoformat() if old_due else None
+        new.update(sla_paused_seconds=paused, due_at=obj.due_at.isoformat() if obj.due_at else None)
     _audit(
         db,
         actor_id=approver_id,
@@ -164,9 +262,12 @@ def approve_exception(
         entity_type="exception",
         entity_id=obj.id,
         old=old,
-        new={"status": obj.status, "approval": {"level": level, "decision": decision, "comment": comment}},
+        new=new,
+        chain=obj,
     )
 
     db.commit()
+    if obj.status == "AWAITING_APPROVAL":
+        notifier.publish("APPROVAL_REQUESTED", settings.notify_approvals_to, [obj.id], level=level + 1)
     db.refresh(obj)
     return obj
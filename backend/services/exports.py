@@ -0,0 +1,333 @@
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric, and_, cast, func, or_, select, union_all, literal_column, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import ReadSessionLocal, SessionLocal
+from models.archive import ExceptionArchive
+from models.audit_event import AuditEvent
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from models.export_job import ExportJob
+from storage.s3 import MultipartWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - csv only
+    pa = pq = None
+
+EXPORT_KINDS = ("exceptions", "sla_breaches", "audit")
+EXPORT_FORMATS = ("csv", "parquet")
+
+EXCEPTION_FIELDS = (
+    "id", "type_id", "title", "severity", "bu_id", "created_by", "assigned_to", "status",
+    "priority", "due_at", "escalated_at", "created_at", "updated_at",
+)
+
+
+def _dt(params: dict, key: str) -> Optional[datetime]:
+    v = params.get(key)
+    if v is None:
+        return None
+    try:
+        d = datetime.fromisoformat(v) if isinstance(v, str) else v
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{key} must be an ISO timestamp")
+    return d if d.tzinfo else d.replace(tzinfo=timezone.utc)
+
+
+def _exception_filters(model, params: dict) -> list:
+    crit = []
+    for f in ("status", "type_id", "bu_id", "assigned_to"):
+        if params.get(f) is not None:
+            crit.append(model.__table__.c[f] == params[f])
+    date_from, date_to = _dt(params, "date_from"), _dt(params, "date_to")
+    # created_at is a naive UTC column
+    if date_from:
+        crit.append(model.created_at >= date_from.astimezone(timezone.utc).replace(tzinfo=None))
+    if date_to:
+        crit.append(model.created_at < date_to.astimezone(timezone.utc).replace(tzinfo=None))
+    return crit
+
+
+def _exceptions_query(params: dict):
+    def cols(model):
+        return [model.__table__.c[f] for f in EXCEPTION_FIELDS]
+
+    live = select(*cols(ExceptionModel)).where(*_exception_filters(ExceptionModel, params))
+    if not params.get("include_archived"):
+        return live.order_by(ExceptionModel.id)
+    cold = select(*cols(ExceptionArchive)).where(*_exception_filters(ExceptionArchive, params))
+    both = union_all(live, cold).subquery()
+    return select(*both.c).order_by(both.c.id)
+
+
+def _sla_breaches_query(params: dict):
+    """Escalated exceptions (live or archived) plus open ones already past due."""
+    now = datetime.now(timezone.utc)
+
+    def part(model, open_only: bool):
+        breached = model.escalated_at.isnot(None)
+        if open_only:
+            breached = or_(breached, and_(model.status.notin_(TERMINAL_STATUSES), model.due_at < now))
+        crit = [breached]
+        for f in ("type_id", "bu_id", "assigned_to"):
+            if params.get(f) is not None:
+                crit.append(model.__table__.c[f] == params[f])
+        date_from, date_to = _dt(params, "date_from"), _dt(params, "date_to")
+        if date_from:
+            crit.append(model.due_at >= date_from)
+        if date_to:
+            crit.append(model.due_at < date_to)
+        return select(
+            model.id, model.type_id, model.bu_id, model.assigned_to, model.status, model.priority,
+            model.due_at, model.escalated_at,
+            cast(func.extract("epoch", func.coalesce(model.escalated_at, now) - model.due_at) / 3600.0, Float)
+            .label("overdue_hours"),
+            literal_column("true" if model is ExceptionArchive else "false").label("archived"),
+        ).where(*crit)
+
+    both = union_all(part(ExceptionModel, True), part(ExceptionArchive, False)).subquery()
+    return select(*both.c).order_by(both.c.due_at, both.c.id)
+
+
+def _audit_query(params: dict):
+    date_from, date_to = _dt(params, "date_from"), _dt(params, "date_to")
+    if not date_from or not date_to:
+        raise HTTPException(status_code=400, detail="audit exports need date_from and date_to")
+    crit = [AuditEvent.at >= date_from, AuditEvent.at < date_to]
+    for f in ("entity_type", "entity_id", "action"):
+        if params.get(f) is not None:
+            crit.append(AuditEvent.__table__.c[f] == params[f])
+    return (
+        select(
+            AuditEvent.id, AuditEvent.at, AuditEvent.actor_id, AuditEvent.action, AuditEvent.entity_type,
+            AuditEvent.entity_id, AuditEvent.old, AuditEvent.new, AuditEvent.prev_hash, AuditEvent.hash,
+        )
+        .where(*crit)
+        .order_by(AuditEvent.id)
+    )
+
+
+QUERIES: Dict[str, Callable[[dict], Any]] = {
+    "exceptions": _exceptions_query,
+    "sla_breaches": _sla_breaches_query,
+    "audit": _audit_query,
+}
+
+
+def build_query(kind: str, fmt: str, params: dict):
+    """Validate a request and return its SELECT; raises 400 on bad input."""
+    if kind not in QUERIES:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(EXPORT_KINDS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet" and pa is None:
+        raise HTTPException(status_code=400, detail="Parquet exports need pyarrow installed on the server")
+    return QUERIES[kind](params)
+
+
+# ---- writers ----
+
+def _cell(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, separators=(",", ":"), default=str)
+    return v
+
+
+def _write_csv(out, names: List[str], batches, on_batch: Callable[[int], None]) -> int:
+    rows = 0
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=settings.gzip_level) as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        w = csv.writer(text)
+        w.writerow(names)
+        for batch in batches:
+            w.writerows([_cell(v) for v in r] for r in batch)
+            rows += len(batch)
+            text.flush()
+            on_batch(rows)
+        text.flush()
+        text.detach()
+    return rows
+
+
+def _arrow_type(sa_type):
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _write_parquet(out, stmt, names: List[str], batches, on_batch: Callable[[int], None]) -> int:
+    # explicit schema: per-batch inference breaks on all-NULL batches
+    types = [_arrow_type(c.type) for c in stmt.selected_columns]
+    schema = pa.schema(list(zip(names, types)))
+    convert = [(lambda v: v) if t != pa.string() else (lambda v: None if v is None else str(_cell(v))) for t in types]
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for batch in batches:
+            cols = [[conv(r[i]) for r in batch] for i, conv in enumerate(convert)]
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=t) for c, t in zip(cols, types)], schema=schema))
+            rows += len(batch)
+            on_batch(rows)
+    return rows
+
+
+# ---- jobs ----
+
+def _update(job_id: int, **values) -> None:
+    with SessionLocal() as db:
+        db.query(ExportJob).filter(ExportJob.id == job_id).update(values, synchronize_session=False)
+        db.commit()
+
+
+def run_export(job_id: int) -> None:
+    """Produce one claimed job: stream the SELECT from a read replica with a
+    server-side cursor and write it batch by batch into an S3 multipart upload."""
+    with SessionLocal() as db:
+        job = db.get(ExportJob, job_id)
+        kind, fmt, params = job.kind, job.format, dict(job.params or {})
+    ext, ctype = ("csv.gz", "application/gzip") if fmt == "csv" else ("parquet", "application/vnd.apache.parquet")
+    key = f"exports/{job_id}/{kind}-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{ext}"
+    try:
+        stmt = build_query(kind, fmt, params)
+        names = [c.name for c in stmt.selected_columns]
+        with ReadSessionLocal() as rdb:
+            total = rdb.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+            _update(job_id, total_rows=total)
+            result = rdb.execute(stmt.execution_options(stream_results=True, yield_per=settings.export_batch_rows))
+            last = [0.0]
+            with MultipartWriter(key, ctype, part_size=settings.export_part_size_mb * 1024 * 1024) as out:
+
+                def on_batch(rows: int) -> None:
+                    # progress + heartbeat, at most every 2s
+                    if time.monotonic() - last[0] >= 2:
+                        last[0] = time.monotonic()
+                        _update(job_id, rows_written=rows, bytes_written=out.bytes_written,
+                                heartbeat_at=datetime.now(timezone.utc))
+
+                batches = result.partitions()
+                if fmt == "csv":
+                    rows = _write_csv(out, names, batches, on_batch)
+                else:
+                    rows = _write_parquet(out, stmt, names, batches, on_batch)
+            size = out.bytes_written
+        _update(job_id, status="DONE", s3_key=key, rows_written=rows, bytes_written=size,
+                finished_at=datetime.now(timezone.utc), error=None)
+        print(f"Export {job_id} done: {rows} rows, {size} bytes -> {key}")
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+        _update(job_id, status="FAILED", error=str(detail)[:2000], finished_at=datetime.now(timezone.utc))
+        print(f"Export {job_id} failed: {detail}")
+
+
+def claim_next(db: Session) -> Optional[int]:
+    """Take the oldest queued job (or one whose worker stopped heartbeating)."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.export_stale_seconds)
+    # a dead worker's job that is out of attempts will never be reclaimed: close it out
+    db.execute(
+        update(ExportJob)
+        .where(
+            ExportJob.status == "RUNNING",
+            ExportJob.heartbeat_at < stale,
+            ExportJob.attempts >= settings.export_max_attempts,
+        )
+        .values(status="FAILED", error="worker stopped heartbeating; no attempts left", finished_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    job = (
+        db.query(ExportJob)
+        .filter(
+            or_(
+                ExportJob.status == "QUEUED",
+                and_(ExportJob.status == "RUNNING", ExportJob.heartbeat_at < stale),
+            ),
+            ExportJob.attempts < settings.export_max_attempts,
+        )
+        .order_by(ExportJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.commit()
+        return None
+    job.status, job.started_at, job.heartbeat_at = "RUNNING", now, now
+    job.attempts += 1
+    job.rows_written = job.bytes_written = 0
+    db.commit()
+    return job.id
+
+
+class ExportWorkerPool:
+    """N threads that claim jobs with FOR UPDATE SKIP LOCKED, so any number of
+    API processes (or `python -m services.exports`) can share the queue."""
+
+    def __init__(self):
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self, workers: Optional[int] = None) -> None:
+        workers = settings.export_workers if workers is None else workers
+        if self._threads or workers <= 0:
+            return
+        self._stop.clear()
+        for i in range(workers):
+            t = threading.Thread(target=self._loop, name=f"ems-export-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"Export workers started ({workers}).")
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    job_id = claim_next(db)
+            except Exception as e:
+                print("Export claim failed:", e)
+                job_id = None
+            if job_id is not None:
+                run_export(job_id)
+                continue
+            self._wake.wait(settings.export_poll_seconds)
+            self._wake.clear()
+
+
+export_pool = ExportWorkerPool()
+
+
+if __name__ == "__main__":
+    # standalone worker process: keeps heavy exports off the API hosts entirely
+    export_pool.start(max(1, settings.export_workers))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        export_pool.stop()
@@ -0,0 +1,245 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Text, cast, func, insert, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import ReadSessionLocal, SessionLocal
+from models.archive import ExceptionArchive
+from models.audit_event import AuditEvent
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from models.exception_snapshot import ExceptionSnapshot
+from serialization import dumps
+from services.audit_chain import chain
+from services.archive import get_exception_any, union_exceptions
+
+# the audited fields of an exception; audit events carry the ones they change
+# in `new` (and their previous values in `old`)
+STATE_FIELDS = (
+    "type_id", "title", "severity", "priority", "bu_id",
+    "created_by", "assigned_to", "status", "due_at",
+)
+
+_EXCEPTION_EVENTS = AuditEvent.entity_type == "exception"
+
+
+def _jsonable(v: Any) -> Any:
+    return v.isoformat() if isinstance(v, datetime) else v
+
+
+def state_of(row: Any) -> Dict[str, Any]:
+    get = row.get if isinstance(row, dict) else (lambda f: getattr(row, f, None))
+    return {f: _jsonable(get(f)) for f in STATE_FIELDS}
+
+
+def record_created(db: Session, rows: Iterable[Any], actor_id: Optional[int] = None) -> None:
+    """Bulk CREATED events holding the full initial state, so replay can start
+    from nothing. Each starts its exception's audit chain: ORM objects get
+    audit_head set directly, dict rows in one executemany UPDATE."""
+    now = datetime.now(timezone.utc)
+    events, heads = [], []
+    for r in rows:
+        is_dict = isinstance(r, dict)
+        ev = {
+            "at": now,
+            "actor_id": actor_id if actor_id is not None else (r.get("created_by") if is_dict else r.created_by),
+            "action": "CREATED",
+            "entity_type": "exception",
+            "entity_id": r["id"] if is_dict else r.id,
+            "old": None,
+            "new": state_of(r),
+        }
+        head = chain(ev, None)
+        if is_dict:
+            heads.append({"id": ev["entity_id"], "audit_head": head})
+        else:
+            r.audit_head = head
+        events.append(ev)
+    if events:
+        db.execute(insert(AuditEvent), events)
+    if heads:
+        db.execute(update(ExceptionModel), heads)
+
+
+def _forward(state: dict, new: Optional[dict]) -> None:
+    for f in STATE_FIELDS:
+        if new and f in new:
+            state[f] = new[f]
+
+
+def _reverse(state: dict, old: Optional[dict]) -> None:
+    for f in STATE_FIELDS:
+        if old and f in old:
+            state[f] = old[f]
+
+
+# ---- snapshots ----
+
+def take_snapshots(batch_size: Optional[int] = None) -> int:
+    """Snapshot every live exception with audit events since its last snapshot,
+    one INSERT ... SELECT per id range. Bounds replay to the events of one
+    snapshot interval."""
+    batch_size = batch_size or settings.snapshot_batch_size
+    last = (
+        select(AuditEvent.id.label("event_id"), AuditEvent.at)
+        .where(_EXCEPTION_EVENTS, AuditEvent.entity_id == ExceptionModel.id)
+        .order_by(AuditEvent.id.desc())
+        .limit(1)
+        .lateral("last_event")
+    )
+    prev = (
+        select(func.coalesce(func.max(ExceptionSnapshot.event_id), 0))
+        .where(ExceptionSnapshot.exception_id == ExceptionModel.id)
+        .scalar_subquery()
+    )
+    state = func.jsonb_build_object(
+        *[x for f in STATE_FIELDS for x in (cast(literal(f), Text), ExceptionModel.__table__.c[f])]
+    )
+    taken = 0
+    with SessionLocal() as db:
+        max_id = db.query(func.max(ExceptionModel.id)).scalar() or 0
+        for lo in range(0, max_id, batch_size):
+            sel = (
+                select(ExceptionModel.id, last.c.event_id, last.c.at, state)
+                .select_from(ExceptionModel)
+                .join(last, true())
+                .where(ExceptionModel.id > lo, ExceptionModel.id <= lo + batch_size, last.c.event_id > prev)
+            )
+            res = db.execute(
+                pg_insert(ExceptionSnapshot)
+                .from_select(["exception_id", "event_id", "taken_at", "state"], sel)
+                .on_conflict_do_nothing()
+            )
+            db.commit()
+            taken += res.rowcount or 0
+    if taken:
+        print(f"Took {taken} exception snapshots.")
+    return taken
+
+
+# ---- point-in-time reads ----
+
+def _reconstruct(db: Session, rows: List[Any], at: datetime) -> Iterator[dict]:
+    """State at `at` for `rows` (current live/archived rows created by then).
+
+    - latest snapshot at or before `at`: replay the later events up to `at`
+    - otherwise, a CREATED event: replay from nothing up to `at`
+    - otherwise (rows older than CREATED events): start from the current row
+      and undo the events after `at` using their `old` values
+    """
+    ids = [r.id for r in rows]
+    snaps = {
+        s.exception_id: s
+        for s in db.query(ExceptionSnapshot)
+        .filter(ExceptionSnapshot.exception_id.in_(ids), ExceptionSnapshot.taken_at <= at)
+        .order_by(ExceptionSnapshot.exception_id, ExceptionSnapshot.taken_at.desc(), ExceptionSnapshot.event_id.desc())
+        .distinct(ExceptionSnapshot.exception_id)
+    }
+    rest = [i for i in ids if i not in snaps]
+    created = set()
+    if rest:
+        created = set(db.scalars(
+            select(AuditEvent.entity_id).where(
+                _EXCEPTION_EVENTS, AuditEvent.action == "CREATED", AuditEvent.entity_id.in_(rest)
+            )
+        ))
+    forward = list(snaps) + list(created)
+    backward = [i for i in rest if i not in created]
+
+    cols = (AuditEvent.entity_id, AuditEvent.id, AuditEvent.at, AuditEvent.old, AuditEvent.new)
+    events: Dict[int, list] = defaultdict(list)
+    if forward:
+        after = min((snaps[i].event_id if i in snaps else 0) for i in forward)
+        q = (
+            db.query(*cols)
+            .filter(_EXCEPTION_EVENTS, AuditEvent.entity_id.in_(forward), AuditEvent.id > after, AuditEvent.at <= at)
+            .order_by(AuditEvent.entity_id, AuditEvent.id)
+        )
+        for ev in q:
+            s = snaps.get(ev.entity_id)
+            if s is None or ev.id > s.event_id:
+                events[ev.entity_id].append(ev)
+    if backward:
+        q = (
+            db.query(*cols)
+            .filter(_EXCEPTION_EVENTS, AuditEvent.entity_id.in_(backward), AuditEvent.at > at)
+            .order_by(AuditEvent.entity_id, AuditEvent.id.desc())
+        )
+        for ev in q:
+            events[ev.entity_id].append(ev)
+
+    as_of = at.isoformat()
+    for r in rows:
+        evs = events.get(r.id, ())
+        if r.id in snaps or r.id in created:
+            state = dict(snaps[r.id].state) if r.id in snaps else {}
+            for ev in evs:
+                _forward(state, ev.new)
+            if not state:
+                continue  # CREATED landed after `at`
+        else:
+            state = state_of(r)
+            for ev in evs:
+                _reverse(state, ev.old)
+        yield {"id": r.id, "as_of": as_of, **state, "replayed": len(evs)}
+
+
+def _aware(d: datetime) -> datetime:
+    # created_at is a naive UTC timestamp
+    return d if d.tzinfo else d.replace(tzinfo=timezone.utc)
+
+
+def exception_as_of(db: Session, exc_id: int, at: datetime) -> Optional[dict]:
+    row, _ = get_exception_any(db, exc_id)
+    if row is None or _aware(row.created_at) > at:
+        return None
+    return next(_reconstruct(db, [row], at), None)
+
+
+def queue_as_of(
+    at: datetime,
+    status: Optional[str] = None,
+    assigned_to: Optional[int] = None,
+    type_id: Optional[int] = None,
+    bu_id: Optional[str] = None,
+    include_closed: bool = False,
+) -> Iterator[bytes]:
+    """NDJSON lines of every exception as it stood at `at`, walked by id in
+    chunks of ASOF_CHUNK_SIZE over live + archive, so memory stays flat
+    however large the queue was. Uses its own read session because it runs
+    while the response streams."""
+    live, cold = [], []
+    if type_id is not None:
+        live.append(ExceptionModel.type_id == type_id)
+        cold.append(ExceptionArchive.type_id == type_id)
+    if bu_id is not None:
+        live.append(ExceptionModel.bu_id == bu_id)
+        cold.append(ExceptionArchive.bu_id == bu_id)
+    both = union_exceptions(["id", "created_at", *STATE_FIELDS], live, cold)
+    naive_at = at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    with ReadSessionLocal() as db:
+        after = 0
+        while True:
+            rows = (
+                db.query(*both.c)
+                .filter(both.c.id > after, both.c.created_at <= naive_at)
+                .order_by(both.c.id)
+                .limit(settings.asof_chunk_size)
+                .all()
+            )
+            if not rows:
+                return
+            after = rows[-1].id
+            for item in _reconstruct(db, rows, at):
+                if status is not None:
+                    if item["status"] != status:
+                        continue
+                elif not include_closed and item["status"] in TERMINAL_STATUSES:
+                    continue
+                if assigned_to is not None and item["assigned_to"] != assigned_to:
+                    continue
+                yield dumps(item) + b"\n"
@@ -0,0 +1,116 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.exception import Exception as ExceptionModel
+from services import dedupe
+from services.assignment import assigner
+from services.history import record_created
+from models.exception_type import ExceptionType
+from services.queue import compute_urgency_at
+from services.sla_calendar import due_dates_batch
+
+
+def ingest_batch(
+    db: Session, items: List[Dict[str, Any]], actor_id: Optional[int] = None
+) -> Tuple[List[int], Dict[int, int], Dict[int, int]]:
+    """Insert a batch of exceptions with multi-row INSERTs, then auto-assign
+    the unassigned ones in a single pass. Repeats of an open exception (same
+    fingerprint, services.dedupe) go in as DUPLICATE rows linked to it.
+    Returns ids in item order, auto-assignments and duplicate -> original.
+    Caller commits."""
+    type_ids = {d["type_id"] for d in items}
+    types = {
+        r.id: r for r in db.query(ExceptionType.id, ExceptionType.default_sla_hours, ExceptionType.dedupe_fields)
+        .filter(ExceptionType.id.in_(type_ids)).all()
+    }
+    if len(types) != len(type_ids):
+        raise HTTPException(status_code=400, detail="Invalid exception type")
+
+    # due dates for the whole batch in one vectorized pass per SLA calendar
+    todo = [d for d in items if d.get("due_at") is None]
+    if todo:
+        now = datetime.now(timezone.utc)
+        dues = due_dates_batch(
+            db, [d.get("bu_id") for d in todo], [now] * len(todo),
+            [types[d["type_id"]].default_sla_hours or 0 for d in todo],
+        )
+        for d, due in zip(todo, dues):
+            d["due_at"] = due
+    for d in items:
+        # spelled out rather than left to the server default: the CREATED event records it
+        d.setdefault("status", "NEW")
+        d["urgency_at"] = compute_urgency_at(d["due_at"], d.get("priority"), d.get("severity"))
+        d["fingerprint"] = dedupe.fingerprint(d["type_id"], types[d["type_id"]].dedupe_fields, d)
+
+    # only Bloom hits can have an open original; misses skip the lookup entirely
+    fps = {d["fingerprint"] for d in items if d["fingerprint"]}
+    if fps:
+        dedupe.bloom.ensure_fresh()
+    originals = dedupe.find_open(db, [fp for fp in fps if fp in dedupe.bloom])
+
+    plain, leaders, dups = [], {}, []
+    for n, d in enumerate(items):
+        fp = d["fingerprint"]
+        if fp is None:
+            plain.append(n)
+        elif fp in originals or fp in leaders:
+            dups.append(n)  # repeats within the batch follow its first occurrence
+        else:
+            leaders[fp] = n
+
+    ids: List[Optional[int]] = [None] * len(items)
+    if plain:
+        new = db.execute(
+            insert(ExceptionModel).returning(ExceptionModel.id, sort_by_parameter_order=True),
+            [items[n] for n in plain],
+        ).scalars().all()
+        for n, i in zip(plain, new):
+            ids[n] = i
+    if leaders:
+        # the unique index on open fingerprints arbitrates against concurrent writers
+        stmt = pg_insert(ExceptionModel).on_conflict_do_nothing(
+            index_elements=[ExceptionModel.fingerprint], index_where=dedupe.OPEN_FINGERPRINT_WHERE
+        ).returning(ExceptionModel.id, ExceptionModel.fingerprint)
+        won = dict((fp, i) for i, fp in db.execute(stmt, [items[n] for n in leaders.values()]).all())
+        for fp, n in leaders.items():
+            if fp in won:
+                ids[n] = originals[fp] = won[fp]
+                dedupe.bloom.add(fp)
+        lost = [fp for fp in leaders if fp not in won]
+        if lost:
+            originals.update(dedupe.find_open(db, lost))
+            if len(originals) < len(fps):
+                raise HTTPException(status_code=409, detail="Duplicate exception was closed concurrently; retry")
+            dups = sorted(dups + [leaders[fp] for fp in lost])
+
+    duplicates: Dict[int, int] = {}
+    if dups:
+        rows = [{**items[n], "status": dedupe.DUPLICATE_STATUS, "duplicate_of": originals[items[n]["fingerprint"]]}
+                for n in dups]
+        new = db.execute(
+            insert(ExceptionModel).returning(ExceptionModel.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        for n, i, r in zip(dups, new, rows):
+            ids[n] = i
+            items[n] = r
+            duplicates[i] = r["duplicate_of"]
+        dedupe.bump_originals(db, Counter(duplicates.values()))
+    record_created(db, [{**d, "id": i} for i, d in zip(ids, items)], actor_id=actor_id)
+
+    assigned: Dict[int, int] = {}
+    if settings.auto_assign:
+        todo = [(i, d["type_id"], d.get("bu_id"), None) for i, d in zip(ids, items)
+                if d.get("assigned_to") is None and i not in duplicates]
+        assigned, _ = assigner.assign_batch(db, todo, actor_id=actor_id)
+    for i, d in zip(ids, items):
+        if d.get("assigned_to") is not None and i not in duplicates:
+            assigner.note_assigned(d["assigned_to"])
+    return ids, assigned, duplicates
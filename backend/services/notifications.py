@@ -0,0 +1,296 @@
+import asyncio
+import json
+import random
+import smtplib
+import threading
+from collections import defaultdict
+from email.message import EmailMessage
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from config import settings
+from db_session import SessionLocal
+from models.user import User
+
+# int = user id (resolved to an email at flush time), str = literal address, None = ops fallback
+Recipient = Union[int, str, None]
+
+KIND_TITLES = {
+    "ASSIGNED": "Assigned to you",
+    "ESCALATED": "Escalated",
+    "SLA_WARNING": "SLA warning",
+    "SLA_BREACHED": "SLA breached",
+    "APPROVAL_REQUESTED": "Awaiting your approval",
+}
+
+# ids listed per kind in an email body; the rest is summarised as a count
+MAX_LISTED = 50
+
+
+class Event(NamedTuple):
+    kind: str
+    exception_id: int
+    detail: Optional[dict]
+
+
+class Digest(NamedTuple):
+    recipient: Recipient
+    address: str
+    name: Optional[str]
+    events: List[Event]
+
+    def by_kind(self) -> Dict[str, List[Event]]:
+        out: Dict[str, List[Event]] = defaultdict(list)
+        for ev in self.events:
+            out[ev.kind].append(ev)
+        return out
+
+    def subject(self) -> str:
+        parts = [f"{len(evs)} {KIND_TITLES.get(k, k).lower()}" for k, evs in sorted(self.by_kind().items())]
+        return "EMS: " + ", ".join(parts)
+
+    def text(self) -> str:
+        lines = [f"Hello {self.name or self.address},", ""]
+        for kind, evs in sorted(self.by_kind().items()):
+            lines.append(f"{KIND_TITLES.get(kind, kind)} ({len(evs)}):")
+            for ev in evs[:MAX_LISTED]:
+                extra = ", ".join(f"{k}={v}" for k, v in (ev.detail or {}).items())
+                lines.append(f"  - exception #{ev.exception_id}" + (f" ({extra})" if extra else ""))
+            if len(evs) > MAX_LISTED:
+                lines.append(f"  ... and {len(evs) - MAX_LISTED} more")
+            lines.append("")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        return {
+            "recipient": self.recipient,
+            "address": self.address,
+            "events": {
+                kind: [{"exception_id": ev.exception_id, **(ev.detail or {})} for ev in evs]
+                for kind, evs in self.by_kind().items()
+            },
+        }
+
+
+class LogTransport:
+    name = "log"
+
+    async def send(self, digest: Digest) -> None:
+        print(f"NOTIFY {digest.address}: {digest.subject()}")
+
+
+class SmtpTransport:
+    """Plain smtplib in a worker thread; point SMTP_HOST/PORT at mailhog locally."""
+    name = "smtp"
+
+    def _send(self, digest: Digest) -> None:
+        msg = EmailMessage()
+        msg["From"] = settings.smtp_from
+        msg["To"] = digest.address
+        msg["Subject"] = digest.subject()
+        msg.set_content(digest.text())
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10) as smtp:
+            if settings.smtp_starttls:
+                smtp.starttls()
+            if settings.smtp_user:
+                smtp.login(settings.smtp_user, settings.smtp_password)
+            smtp.send_message(msg)
+
+    async def send(self, digest: Digest) -> None:
+        await asyncio.to_thread(self._send, digest)
+
+
+class WebhookTransport:
+    name = "webhook"
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None  # httpx.AsyncClient, imported on first use
+
+    async def send(self, digest: Digest) -> None:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=10)
+        resp = await self._client.post(self.url, content=json.dumps(digest.as_dict()),
+                                       headers={"Content-Type": "application/json"})
+        resp.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def build_transports(names: Iterable[str]) -> list:
+    out = []
+    for name in names:
+        if name == "log":
+            out.append(LogTransport())
+        elif name == "smtp":
+            out.append(SmtpTransport())
+        elif name == "webhook" and settings.notify_webhook_url:
+            out.append(WebhookTransport(settings.notify_webhook_url))
+        else:
+            print(f"Notification transport {name!r} skipped (unknown or not configured).")
+    return out
+
+
+class NotificationDispatcher:
+    """Collects notification events and sends one digest per recipient.
+
+    publish() only appends to an in-memory buffer, so it is safe to call from
+    request handlers and scheduler jobs. A background thread runs an asyncio
+    loop that drains the buffer every NOTIFY_DIGEST_SECONDS, resolves user ids
+    to addresses with one query and feeds the digests through a bounded queue
+    to NOTIFY_WORKERS senders, which retry each transport with exponential
+    backoff. Call publish() after the producing transaction commits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Recipient, List[Event]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.stats = {"published": 0, "digests": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    # --- producers -----------------------------------------------------------
+    def publish(self, kind: str, recipient: Recipient, exception_ids: Iterable[int], **detail) -> None:
+        if not settings.notify_enabled:
+            return
+        events = [Event(kind, i, detail or None) for i in exception_ids]
+        if not events:
+            return
+        with self._lock:
+            self._pending[recipient].extend(events)
+            self.stats["published"] += len(events)
+        self.start()
+
+    def publish_assignments(self, assigned: Dict[int, int], actor_id: Optional[int] = None) -> None:
+        """exception id -> user id, as returned by AssignmentEngine.assign_batch."""
+        by_user: Dict[int, List[int]] = defaultdict(list)
+        for exc_id, user_id in assigned.items():
+            if user_id is not None and user_id != actor_id:
+                by_user[user_id].append(exc_id)
+        for user_id, ids in by_user.items():
+            self.publish("ASSIGNED", user_id, ids)
+
+    # --- lifecycle -----------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._thread_main, name="ems-notify", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush whatever is buffered and wait (bounded) for the senders to finish."""
+        thread, loop = self._thread, self._loop
+        if thread is None or loop is None or self._stop is None:
+            return
+        loop.call_soon_threadsafe(self._stop.set)
+        thread.join(timeout)
+        self._thread = None
+
+    def status(self) -> dict:
+        with self._lock:
+            pending = sum(len(v) for v in self._pending.values())
+            return {"running": self._thread is not None, "pending_events": pending,
+                    "pending_recipients": len(self._pending), **self.stats}
+
+    # --- loop ----------------------------------------------------------------
+    def _thread_main(self) -> None:
+        asyncio.run(self._run())
+
+    def _drain(self) -> Dict[Recipient, List[Event]]:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+        return pending
+
+    def _resolve(self, recipients: Iterable[Recipient]) -> Dict[Recipient, tuple]:
+        """recipient -> (address, display name); recipients without one are dropped."""
+        out: Dict[Recipient, tuple] = {}
+        user_ids = [r for r in recipients if isinstance(r, int)]
+        if user_ids:
+            with SessionLocal() as db:
+                rows = (
+                    db.query(User.id, User.email, User.full_name)
+                    .filter(User.id.in_(user_ids), User.is_active.is_(True))
+                    .all()
+                )
+            out.update({r.id: (r.email, r.full_name) for r in rows if r.email})
+        for r in recipients:
+            if isinstance(r, str):
+                out[r] = (r, None)
+            elif r is None and settings.notify_fallback_to:
+                out[r] = (settings.notify_fallback_to, None)
+        return out
+
+    async def _flush(self, queue: asyncio.Queue) -> None:
+        pending = self._drain()
+        if not pending:
+            return
+        try:
+            addresses = await asyncio.to_thread(self._resolve, list(pending))
+        except Exception as e:
+            # put the events back; the next tick tries again
+            print("Notification address lookup failed:", e)
+            with self._lock:
+                for r, evs in pending.items():
+                    self._pending[r][:0] = evs
+            return
+        for recipient, events in pending.items():
+            if recipient not in addresses:
+                continue
+            address, name = addresses[recipient]
+            self.stats["digests"] += 1
+            # bounded: a flood of digests waits here instead of piling up in memory
+            await queue.put(Digest(recipient, address, name, events))
+
+    async def _send_with_retry(self, transport, digest: Digest) -> None:
+        for attempt in range(settings.notify_max_retries + 1):
+            try:
+                await transport.send(digest)
+                self.stats["sent"] += 1
+                return
+            except Exception as e:
+                if attempt == settings.notify_max_retries:
+                    self.stats["failed"] += 1
+                    print(f"Notification via {transport.name} to {digest.address} failed: {e}")
+                    return
+                self.stats["retried"] += 1
+                delay = settings.notify_backoff_seconds * (2 ** attempt)
+                await asyncio.sleep(min(delay, 300) * (0.5 + random.random() / 2))
+
+    async def _worker(self, queue: asyncio.Queue, transports: list) -> None:
+        while True:
+            digest = await queue.get()
+            try:
+                # transports retry independently so a webhook outage does not resend emails
+                await asyncio.gather(*(self._send_with_retry(t, digest) for t in transports))
+            finally:
+                queue.task_done()
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        transports = build_transports(settings.notify_transports)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.notify_queue_max))
+        workers = [asyncio.create_task(self._worker(queue, transports)) for _ in range(max(1, settings.notify_workers))]
+        window = max(1.0, settings.notify_digest_seconds)
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=window)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush(queue)
+        await queue.join()
+        for w in workers:
+            w.cancel()
+        for t in transports:
+            if hasattr(t, "close"):
+                await t.close()
+
+
+notifier = NotificationDispatcher()
@@ -0,0 +1,192 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+from typing import List, Optional
+
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_session import SessionLocal
+from models.attachment_derivative import AttachmentDerivative
+from services.render import render
+from storage.s3 import head_object, open_object, put_object
+
+
+def derived_keys(s3_key: str) -> List[str]:
+    """Derived objects live next to the original."""
+    return [f"{s3_key}.preview.png", f"{s3_key}.txt"]
+
+
+def enqueue(db: Session, s3_key: str, mime: Optional[str]) -> None:
+    """Queue derivatives for an object; a key that already has them is left alone."""
+    db.execute(
+        pg_insert(AttachmentDerivative)
+        .values(s3_key=s3_key, mime=mime)
+        .on_conflict_do_nothing(index_elements=[AttachmentDerivative.s3_key])
+    )
+
+
+def text_match(attachment_model, exception_id_col, q: str):
+    """EXISTS: an attachment of the exception whose extracted text matches q."""
+    return exists().where(
+        attachment_model.exception_id == exception_id_col,
+        AttachmentDerivative.s3_key == attachment_model.s3_key,
+        AttachmentDerivative.text_tsv.op("@@")(func.plainto_tsquery("simple", q)),
+    )
+
+
+def search_criteria(exception_model, attachment_model, q: str):
+    return or_(exception_model.title.ilike(f"%{q}%"), text_match(attachment_model, exception_model.id, q))
+
+
+def claim_next(db: Session) -> Optional[str]:
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.preview_stale_seconds)
+    row = (
+        db.query(AttachmentDerivative)
+        .filter(
+            or_(
+                AttachmentDerivative.status == "QUEUED",
+                and_(AttachmentDerivative.status == "RUNNING", AttachmentDerivative.heartbeat_at < stale),
+            ),
+            AttachmentDerivative.attempts < settings.preview_max_attempts,
+        )
+        .order_by(AttachmentDerivative.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if row is None:
+        return None
+    row.status, row.heartbeat_at = "RUNNING", now
+    row.attempts += 1
+    db.commit()
+    return row.s3_key
+
+
+def _finish(s3_key: str, **values) -> None:
+    with SessionLocal() as db:
+        db.query(AttachmentDerivative).filter(AttachmentDerivative.s3_key == s3_key).update(
+            values, synchronize_session=False
+        )
+        db.commit()
+
+
+class PreviewWorkerPool:
+    """Claimer threads download objects (I/O) and hand the bytes to a spawn
+    process pool for rendering (CPU), so thumbnails and PDF text never run
+    on the API's event loop or threadpool. Claims use FOR UPDATE SKIP LOCKED,
+    like the export workers, so several processes can share the queue."""
+
+    def __init__(self):
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._procs: Optional[ProcessPoolExecutor] = None
+
+    def start(self, workers: Optional[int] = None) -> None:
+        workers = settings.preview_workers if workers is None else workers
+        if self._threads or workers <= 0:
+            return
+        self._stop.clear()
+        self._procs = self._new_procs()
+        for i in range(workers):
+            t = threading.Thread(target=self._loop, name=f"ems-preview-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"Preview workers started ({workers} threads, {settings.preview_processes} processes).")
+
+    @staticmethod
+    def _new_procs() -> ProcessPoolExecutor:
+        # spawn: renderers import only services.render, not the app's engine and pools
+        return ProcessPoolExecutor(max_workers=max(1, settings.preview_processes), mp_context=get_context("spawn"))
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        if self._procs is not None:
+            self._procs.shutdown(wait=False, cancel_futures=True)
+            self._procs = None
+
+    def process(self, s3_key: str) -> None:
+        try:
+            with SessionLocal() as db:
+                mime = db.query(AttachmentDerivative.mime).filter(AttachmentDerivative.s3_key == s3_key).scalar()
+            size = int(head_object(s3_key).get("ContentLength") or 0)
+            if size > settings.preview_max_mb * 1024 * 1024:
+                _finish(s3_key, status="UNSUPPORTED", error=f"larger than {settings.preview_max_mb} MB")
+                return
+            body = open_object(s3_key)
+            try:
+                data = body.read()
+            finally:
+                body.close()
+            result = self._procs.submit(
+                render, data, mime, settings.preview_thumb_px, settings.preview_text_pages,
+                settings.preview_text_max_chars,
+            ).result(timeout=settings.preview_timeout_seconds)
+            if "unsupported" in result:
+                _finish(s3_key, status="UNSUPPORTED", error=result["unsupported"])
+                return
+            preview_key, text_key = derived_keys(s3_key)
+            values = {"status": "DONE", "error": None, "preview_key": None, "text_key": None, "text": None}
+            if result.get("preview"):
+                put_object(preview_key, result["preview"], "image/png")
+                values["preview_key"] = preview_key
+            if result.get("text"):
+                put_object(text_key, result["text"].encode("utf-8"), "text/plain; charset=utf-8")
+                # NUL bytes are not allowed in Postgres text
+                values["text_key"], values["text"] = text_key, result["text"].replace("\x00", "")
+            _finish(s3_key, **values)
+        except FutureTimeout:
+            _finish(s3_key, status="FAILED", error=f"render timed out after {settings.preview_timeout_seconds}s")
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # a renderer died (e.g. OOM on a hostile file); later jobs need a fresh pool
+                self._procs = self._new_procs()
+            # back to the queue until PREVIEW_MAX_ATTEMPTS is used up
+            status = "FAILED" if self._attempts(s3_key) >= settings.preview_max_attempts else "QUEUED"
+            _finish(s3_key, status=status, error=f"{type(e).__name__}: {e}"[:2000])
+            print(f"Preview for {s3_key} failed: {e}")
+
+    @staticmethod
+    def _attempts(s3_key: str) -> int:
+        with SessionLocal() as db:
+            return db.query(AttachmentDerivative.attempts).filter(AttachmentDerivative.s3_key == s3_key).scalar() or 0
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    s3_key = claim_next(db)
+            except Exception as e:
+                print("Preview claim failed:", e)
+                s3_key = None
+            if s3_key is not None:
+                self.process(s3_key)
+                continue
+            self._wake.wait(settings.preview_poll_seconds)
+            self._wake.clear()
+
+
+preview_pool = PreviewWorkerPool()
+
+
+if __name__ == "__main__":
+    # standalone worker process: keeps rendering off the API hosts entirely
+    preview_pool.start(max(1, settings.preview_workers))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        preview_pool.stop()
@@ -0,0 +1,116 @@
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.orm import Session
+
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+
+# How far each priority/severity pulls an item ahead of its raw due time.
+# Priority 1 is most urgent; unknown values get no boost.
+PRIORITY_BOOST_HOURS = {1: 48, 2: 24, 3: 8, 4: 0, 5: 0}
+SEVERITY_BOOST_HOURS = {"CRITICAL": 48, "HIGH": 24, "MEDIUM": 8, "LOW": 0}
+# rows without a due date sort as if due this long after creation
+NO_DUE_FALLBACK = timedelta(hours=72)
+
+
+def compute_urgency_at(
+    due_at: Optional[datetime],
+    priority: Optional[int],
+    severity: Optional[str],
+    created_at: Optional[datetime] = None,
+) -> datetime:
+    """urgency_at = time-to-breach reference point minus priority/severity boosts.
+
+    Ordering by this stored timestamp is the same as ordering by a live score
+    (boosts + time-to-breach) because `now` is common to every row, which lets
+    the queue be served straight from ix_exceptions_queue.
+    """
+    base = due_at or ((created_at or datetime.now(timezone.utc)) + NO_DUE_FALLBACK)
+    boost = PRIORITY_BOOST_HOURS.get(priority, 0) + SEVERITY_BOOST_HOURS.get((severity or "").upper(), 0)
+    return base - timedelta(hours=boost)
+
+
+def urgency_score(urgency_at: datetime, now: Optional[datetime] = None) -> float:
+    # hours until the boosted breach point; lower (negative) = more urgent
+    now = now or datetime.now(timezone.utc)
+    return round((urgency_at - now).total_seconds() / 3600.0, 2)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(urgency_at: datetime, exc_id: int) -> str:
+    # epoch microseconds keep the cursor exact and URL-safe
+    return f"{(urgency_at - _EPOCH) // timedelta(microseconds=1)}_{exc_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        micros, _, exc_id = cursor.partition("_")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(exc_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _open_for(user_id: int):
+    return and_(
+        ExceptionModel.assigned_to == user_id,
+        ExceptionModel.status.notin_(TERMINAL_STATUSES),
+    )
+
+
+QUEUE_COLUMNS = (
+    ExceptionModel.id,
+    ExceptionModel.type_id,
+    ExceptionModel.title,
+    ExceptionModel.status,
+    ExceptionModel.severity,
+    ExceptionModel.priority,
+    ExceptionModel.bu_id,
+    ExceptionModel.due_at,
+    ExceptionModel.urgency_at,
+)
+
+
+def user_queue(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None):
+    q = db.query(*QUEUE_COLUMNS).filter(_open_for(user_id))
+    if cursor:
+        after_urgency, after_id = decode_cursor(cursor)
+        q = q.filter(tuple_(ExceptionModel.urgency_at, ExceptionModel.id) > tuple_(after_urgency, after_id))
+    rows = q.order_by(ExceptionModel.urgency_at, ExceptionModel.id).limit(limit + 1).all()
+
+    now = datetime.now(timezone.utc)
+    items = []
+    for r in rows[:limit]:
+        item = dict(r._mapping)
+        item["urgency_score"] = urgency_score(r.urgency_at, now)
+        item["time_to_breach_hours"] = urgency_score(r.due_at, now) if r.due_at else None
+        items.append(item)
+    next_cursor = encode_cursor(rows[limit - 1].urgency_at, rows[limit - 1].id) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def user_queue_summary(db: Session, user_id: int) -> dict:
+    now = datetime.now(timezone.utc)
+    soon = now + timedelta(hours=24)
+    row = (
+        db.query(
+            func.count(),
+            func.count().filter(ExceptionModel.due_at < now),
+            func.count().filter(and_(ExceptionModel.due_at >= now, ExceptionModel.due_at < soon)),
+            func.count().filter(ExceptionModel.status == "ESCALATED"),
+            func.min(ExceptionModel.urgency_at),
+        )
+        .filter(_open_for(user_id))
+        .one()
+    )
+    return {
+        "user_id": user_id,
+        "open": row[0],
+        "overdue": row[1],
+        "due_within_24h": row[2],
+        "escalated": row[3],
+        "top_urgency_score": urgency_score(row[4], now) if row[4] else None,
+    }
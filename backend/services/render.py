@@ -0,0 +1,64 @@
+"""CPU-bound preview/text extraction, run in services.previews' process pool.
+
+Kept free of database and settings imports so spawned workers start fast.
+Pillow and pypdf are optional: without them images / PDFs are UNSUPPORTED.
+"""
+import io
+from typing import Optional
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - previews disabled
+    Image = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - PDF extraction disabled
+    PdfReader = None
+
+_TEXT_MIMES = {"application/json", "application/xml", "application/csv", "text/csv"}
+
+
+def _thumbnail(img, px: int) -> bytes:
+    img.thumbnail((px, px))
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _pdf(data: bytes, px: int, max_pages: int, max_chars: int) -> dict:
+    reader = PdfReader(io.BytesIO(data))
+    parts, size = [], 0
+    for page in reader.pages[:max_pages]:
+        t = page.extract_text() or ""
+        parts.append(t)
+        size += len(t)
+        if size >= max_chars:
+            break
+    preview = None
+    if Image is not None and reader.pages:
+        # pypdf cannot rasterise; scanned documents carry the page as an image
+        images = sorted(reader.pages[0].images, key=lambda i: len(i.data), reverse=True)
+        if images:
+            preview = _thumbnail(Image.open(io.BytesIO(images[0].data)), px)
+    return {"preview": preview, "text": "\n".join(parts)[:max_chars] or None}
+
+
+def render(data: bytes, mime: Optional[str], px: int = 512, max_pages: int = 20, max_chars: int = 200_000) -> dict:
+    """{"preview": PNG bytes | None, "text": str | None}, or {"unsupported": reason}."""
+    m = (mime or "").lower()
+    if m == "application/pdf" or data[:5] == b"%PDF-":
+        if PdfReader is None:
+            return {"unsupported": "pypdf not installed"}
+        return _pdf(data, px, max_pages, max_chars)
+    if m.startswith("image/"):
+        if Image is None:
+            return {"unsupported": "Pillow not installed"}
+        with Image.open(io.BytesIO(data)) as img:
+            img.seek(0)  # first frame of multi-page TIFF/GIF
+            return {"preview": _thumbnail(img.copy(), px), "text": None}
+    if m.startswith("text/") or m in _TEXT_MIMES:
+        return {"preview": None, "text": data[: max_chars * 4].decode("utf-8", errors="replace")[:max_chars]}
+    return {"unsupported": f"no renderer for {mime or 'unknown type'}"}
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, update, insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from lazy import lazy_import
+from models.audit_event import AuditEvent
+from models.exception import Exception as ExceptionModel, TERMINAL_STATUSES
+from models.exception_type import ExceptionType
+from services.audit_chain import chain
+from services.sla_calendar import business_seconds_between, calendars, CompiledCalendar
+
+np = lazy_import("numpy")
+
+
+def tiers_for(warning_tiers: Optional[List[int]]) -> List[int]:
+    # ascending percentages; 100 is always present so breaches still escalate
+    tiers = sorted({int(t) for t in (warning_tiers or settings.sla_warning_tiers) if int(t) > 0})
+    if not tiers or tiers[-1] < 100:
+        tiers.append(100)
+    return tiers
+
+
+def _threshold(cal: Optional[CompiledCalendar], now: datetime, remaining_seconds: float) -> datetime:
+    # latest due_at that has at most `remaining_seconds` of (working) time left
+    if cal is None:
+        return datetime.fromtimestamp(now.timestamp() + remaining_seconds, tz=timezone.utc)
+    ts = np.array([int(now.timestamp())], dtype=np.int64)
+    due = cal.add(ts, np.array([int(remaining_seconds)], dtype=np.int64), apply_cutoff=False)
+    return datetime.fromtimestamp(int(due[0]), tz=timezone.utc)
+
+
+def _tier_condition(k: int, types: Dict[int, Tuple[int, List[int]]], cals: Dict[Optional[str], CompiledCalendar], now: datetime):
+    """OR of (type_id = t AND <bu calendar> AND due_at <= threshold) for tier k.
+
+    Every branch is a range on due_at within one type_id, i.e. a range scan on
+    ix_exceptions_sla_due per branch."""
+    bu_cals = {bu: c for bu, c in cals.items() if bu is not None}
+    default_cal = cals.get(None)
+    branches = []
+    for type_id, (sla_hours, tiers) in types.items():
+        if len(tiers) < k:
+            continue
+        remaining = round((1 - tiers[k - 1] / 100.0) * sla_hours * 3600)
+        for bu, cal in bu_cals.items():
+            branches.append(and_(
+                ExceptionModel.type_id == type_id,
+                ExceptionModel.bu_id == bu,
+                ExceptionModel.due_at <= _threshold(cal, now, remaining),
+            ))
+        others = ExceptionModel.bu_id.is_(None)
+        if bu_cals:
+            others = or_(others, ExceptionModel.bu_id.notin_(list(bu_cals)))
+        branches.append(and_(
+            ExceptionModel.type_id == type_id,
+            others,
+            ExceptionModel.due_at <= _threshold(default_cal, now, remaining),
+        ))
+    return or_(*branches) if branches else None
+
+
+def load_types(db: Session) -> Dict[int, Tuple[int, List[int]]]:
+    """type id -> (SLA hours, tiers); read once per tick and shared by every step."""
+    return {
+        t.id: (t.default_sla_hours or 0, tiers_for(t.warning_tiers))
+        for t in db.query(ExceptionType.id, ExceptionType.default_sla_hours, ExceptionType.warning_tiers)
+    }
+
+
+def tier_at(db: Session, type_id: int, bu_id: Optional[str], due_at: datetime, now: Optional[datetime] = None) -> int:
+    """The sla_tier an exception due at `due_at` has reached by `now` (same rule as _tier_condition)."""
+    now = now or datetime.now(timezone.utc)
+    et = db.get(ExceptionType, type_id)
+    sla = (et.default_sla_hours or 0) * 3600 if et else 0
+    if sla <= 0:
+        return 0
+    elapsed = 100.0 * (1 - business_seconds_between(db, bu_id, now, due_at) / sla)
+    return sum(1 for t in tiers_for(et.warning_tiers) if elapsed >= t)
+
+
+def evaluate_sla_tiers(
+    db: Session, now: Optional[datetime] = None, types: Optional[Dict[int, Tuple[int, List[int]]]] = None
+) -> Dict[int, list]:
+    """Advance Exception.sla_tier for rows that crossed a warning tier since the
+    last tick; escalate rows crossing a >=100% tier. Caller commits.
+
+    Tiers are evaluated highest first with `sla_tier < k`, so a row that jumps
+    several tiers in one tick is touched and reported once, at its highest tier.
+    Returns {tier k: [crossed rows]}.
+    """
+    now = now or datetime.now(timezone.utc)
+    types = load_types(db) if types is None else types
+    if not types:
+        return {}
+    cals = calendars.all(db)
+    crossed: Dict[int, list] = {}
+    for k in range(max(len(t[1]) for t in types.values()), 0, -1):
+        cond = _tier_condition(k, types, cals, now)
+        if cond is None:
+            continue
+        rows = db.execute(
+            update(ExceptionModel)
+            .where(
+                ExceptionModel.sla_tier < k,
+                ExceptionModel.status.notin_(TERMINAL_STATUSES),
+                ExceptionModel.sla_paused_at.is_(None),
+                ExceptionModel.due_at.isnot(None),
+                cond,
+            )
+            .values(sla_tier=k)
+            .returning(
+                ExceptionModel.id, ExceptionModel.type_id, ExceptionModel.bu_id, ExceptionModel.assigned_to,
+                ExceptionModel.title, ExceptionModel.status, ExceptionModel.due_at, ExceptionModel.audit_head,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        if rows:
+            crossed[k] = rows
+    return crossed
+
+
+def escalate_breached(
+    db: Session, crossed: Dict[int, list], type_tiers: Dict[int, List[int]], now: Optional[datetime] = None
+) -> list:
+    """Escalate rows whose newly crossed tier is >= 100% of SLA, in one executemany
+    UPDATE plus one bulk audit INSERT. Returns the escalated rows."""
+    now = now or datetime.now(timezone.utc)
+    breached = [
+        r for k, rows in crossed.items() for r in rows
+        if type_tiers[r.type_id][k - 1] >= 100 and r.status != "ESCALATED"
+    ]
+    if not breached:
+        return []
+    events = [
+        {
+            "at": now,
+            "actor_id": None,
+            "action": "AUTO_ESCALATED",
+            "entity_type": "exception",
+            "entity_id": r.id,
+            "old": {"status": r.status},
+            "new": {"status": "ESCALATED", "reason": "due_at passed"},
+        }
+        for r in breached
+    ]
+    # the tier UPDATE returned (and row-locked) each chain head, so no re-read here
+    heads = {r.id: chain(ev, r.audit_head) for r, ev in zip(breached, events)}
+    db.execute(
+        update(ExceptionModel),
+        [{"id": i, "status": "ESCALATED", "escalated_at": now, "audit_head": h} for i, h in heads.items()],
+    )
+    db.execute(insert(AuditEvent), events)
+    return breached
+
+
+def group_alerts(crossed: Dict[int, list], type_tiers: Dict[int, List[int]]) -> Dict[Optional[int], Dict[int, list]]:
+    """recipient (assignee, None = unassigned) -> percent -> rows; one batch per recipient and tier."""
+    out: Dict[Optional[int], Dict[int, list]] = defaultdict(lambda: defaultdict(list))
+    for k, rows in crossed.items():
+        for r in rows:
+            out[r.assigned_to][type_tiers[r.type_id][k - 1]].append(r)
+    return out
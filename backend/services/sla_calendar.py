@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import threading
+import time as _time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from lazy import lazy_import
+from models.sla_calendar import SlaCalendar, SlaHoliday
+
+# loaded on the first calendar computation, not at API import
+np = lazy_import("numpy")
+
+# compiled window around today; anything outside falls back to wall-clock math
+HORIZON_PAST_DAYS = 400
+HORIZON_FUTURE_DAYS = 1100
+REFRESH_SECONDS = 600
+
+
+def _epoch(dt: datetime) -> int:
+    return int(dt.timestamp())
+
+
+class CompiledCalendar:
+    """Working intervals flattened into sorted int64 arrays.
+
+    starts/ends/cutoffs hold one working interval per business day (epoch
+    seconds); cum[i] is the working time before interval i. A timestamp maps to
+    its working-time offset with one searchsorted, and "offset + SLA" maps back
+    with another, so due dates cost O(log n) each and a whole batch is a single
+    vectorized pass.
+    """
+
+    def __init__(self, cal: SlaCalendar, holidays: Iterable[date], today: Optional[date] = None):
+        today = today or datetime.now(timezone.utc).date()
+        tz = ZoneInfo(cal.timezone or "UTC")
+        skip = set(holidays)
+        starts, ends, cutoffs = [], [], []
+        day = today - timedelta(days=HORIZON_PAST_DAYS)
+        last = today + timedelta(days=HORIZON_FUTURE_DAYS)
+        while day <= last:
+            if cal.workdays[day.weekday()] == "1" and day not in skip:
+                s = _epoch(datetime.combine(day, cal.work_start, tz))
+                e = _epoch(datetime.combine(day, cal.work_end, tz))
+                if e > s:
+                    starts.append(s)
+                    ends.append(e)
+                    cutoffs.append(_epoch(datetime.combine(day, cal.cutoff, tz)) if cal.cutoff else e)
+            day += timedelta(days=1)
+        self.bu_id = cal.bu_id
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.cutoffs = np.asarray(cutoffs, dtype=np.int64)
+        self.cum = np.concatenate(([0], np.cumsum(self.ends - self.starts))).astype(np.int64)
+
+    def _in_range(self, ts: np.ndarray) -> np.ndarray:
+        return (ts >= self.starts[0]) & (ts <= self.ends[-1]) if len(self.starts) else np.zeros(ts.shape, bool)
+
+    def offsets(self, ts: np.ndarray, apply_cutoff: bool = False) -> np.ndarray:
+        """Working seconds between the horizon start and each timestamp."""
+        i = np.searchsorted(self.starts, ts, side="right") - 1
+        ic = np.clip(i, 0, len(self.starts) - 1)
+        inside = np.minimum(ts - self.starts[ic], self.ends[ic] - self.starts[ic])
+        w = self.cum[ic] + np.maximum(inside, 0)
+        if apply_cutoff:
+            late = (ts >= self.cutoffs[ic]) & (ts < self.ends[ic])
+            w = np.where(late, self.cum[ic + 1], w)
+        return np.where(i < 0, 0, w)
+
+    def at_offsets(self, w: np.ndarray) -> np.ndarray:
+        """Inverse of offsets(): epoch seconds at which `w` working seconds have elapsed."""
+        j = np.clip(np.searchsorted(self.cum, w, side="left") - 1, 0, len(self.starts) - 1)
+        return self.starts[j] + (w - self.cum[j])
+
+    def add(self, ts: np.ndarray, seconds: np.ndarray, apply_cutoff: bool = True) -> np.ndarray:
+        target = self.offsets(ts, apply_cutoff) + seconds
+        # never before the start: from a non-working gap, 0 s would otherwise map
+        # back to the end of the previous working interval
+        due = np.maximum(self.at_offsets(target), ts)
+        # outside the compiled window: plain wall-clock arithmetic
+        ok = self._in_range(ts) & (target <= self.cum[-1])
+        return np.where(ok, due, ts + seconds)
+
+    def between(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Working seconds elapsed between two timestamps."""
+        return np.maximum(self.offsets(end) - self.offsets(start), 0)
+
+
+class CalendarRegistry:
+    """Compiled calendars by bu_id, reloaded every REFRESH_SECONDS or on invalidate()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_bu: Dict[Optional[str], CompiledCalendar] = {}
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+
+    def _load(self, db: Session) -> None:
+        cals = db.query(SlaCalendar).filter(SlaCalendar.active.is_(True)).all()
+        holidays: Dict[int, List[date]] = {}
+        for cal_id, day in db.query(SlaHoliday.calendar_id, SlaHoliday.day).all():
+            holidays.setdefault(cal_id, []).append(day)
+        compiled = (CompiledCalendar(c, holidays.get(c.id, ())) for c in cals)
+        self._by_bu = {c.bu_id: c for c in compiled if len(c.starts)}
+        self._loaded_at = _time.monotonic()
+
+    def get(self, db: Session, bu_id: Optional[str]) -> Optional[CompiledCalendar]:
+        if _time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+            with self._lock:
+                if _time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+                    self._load(db)
+        return self._by_bu.get(bu_id) or self._by_bu.get(None)
+
+    def all(self, db: Session) -> Dict[Optional[str], CompiledCalendar]:
+        self.get(db, None)
+        return dict(self._by_bu)
+
+
+calendars = CalendarRegistry()
+
+
+def _to_dt(epoch: int) -> datetime:
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+
+
+def add_business_time(db: Session, bu_id: Optional[str], start: datetime, seconds: float) -> datetime:
+    cal = calendars.get(db, bu_id)
+    if cal is None:
+        return start + timedelta(seconds=seconds)
+    due = cal.add(np.array([_epoch(start)], dtype=np.int64), np.array([int(seconds)], dtype=np.int64))
+    return _to_dt(due[0])
+
+
+def business_seconds_between(db: Session, bu_id: Optional[str], start: datetime, end: datetime) -> int:
+    cal = calendars.get(db, bu_id)
+    if cal is None:
+        return max(int((end - start).total_seconds()), 0)
+    return int(cal.between(np.array([_epoch(start)]), np.array([_epoch(end)]))[0])
+
+
+def extend_without_cutoff(db: Session, bu_id: Optional[str], due_at: datetime, seconds: float) -> datetime:
+    # used when resuming a paused SLA: shift the due date by the paused working time
+    cal = calendars.get(db, bu_id)
+    if cal is None:
+        return due_at + timedelta(seconds=seconds)
+    due = cal.add(np.array([_epoch(due_at)], dtype=np.int64), np.array([int(seconds)], dtype=np.int64), apply_cutoff=False)
+    return _to_dt(due[0])
+
+
+def due_dates_batch(
+    db: Session, bu_ids: Sequence[Optional[str]], starts: Sequence[datetime], sla_hours: Sequence[float]
+) -> List[datetime]:
+    """Due dates for a whole batch: one vectorized pass per distinct calendar."""
+    n = len(bu_ids)
+    ts = np.fromiter((_epoch(s) for s in starts), dtype=np.int64, count=n)
+    secs = (np.asarray(sla_hours, dtype=np.float64) * 3600).astype(np.int64)
+    due = ts + secs
+    groups: Dict[int, List[int]] = {}
+    cal_of: Dict[int, CompiledCalendar] = {}
+    for idx, bu in enumerate(bu_ids):
+        cal = calendars.get(db, bu)
+        if cal is not None:
+            groups.setdefault(id(cal), []).append(idx)
+            cal_of[id(cal)] = cal
+    for key, idxs in groups.items():
+        sel = np.asarray(idxs, dtype=np.int64)
+        due[sel] = cal_of[key].add(ts[sel], secs[sel])
+    return [_to_dt(d) for d in due]
@@ -1,32 +1,16 @@
-from typing import Optional, List
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
-from config import settings
-
-def put_bucket_cors(origins: List[str]):
-    s3 = _client()
-    cors = {
-        "CORSRules": [
-            {
-                "AllowedMethods": ["PUT", "GET"],
-                "AllowedOrigins": origins,
-                "AllowedHeaders": ["*"],
-                "ExposeHeaders": ["ETag"],
-                "MaxAgeSeconds": 3600,
-            }
-        ]
-    }
-    s3.put_bucket_cors(Bucket=settings.s3_bucket, CORSConfiguration=cors)
-
 # backend/storage/s3.py
+import io
+from functools import lru_cache
 from typing import Optional, List
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
 from config import settings
 
+# boto3 clients are thread-safe and expensive to build; presigning is local work
+@lru_cache(maxsize=1)
 def _client():
+    # boto3 costs ~70 ms to import; only processes that talk to S3 pay for it
+    import boto3
+    from botocore.client import Config
+
     return boto3.client(
         "s3",
         endpoint_url=settings.s3_endpoint,
@@ -38,12 +22,57 @@ def _client():
         verify=settings.s3_secure,
     )
 
-def head_object(key: str) -> dict:
+@lru_cache(maxsize=1)
+def _probe_client(timeout: float):
+    # health checks: fail fast, no retries, never share the data path's connections
+    import boto3
+    from botocore.client import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.s3_endpoint,
+        region_name=settings.s3_region or "us-east-1",
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        config=Config(
+            s3={"addressing_style": "path"}, signature_version="s3v4",
+            connect_timeout=timeout, read_timeout=timeout, retries={"max_attempts": 1},
+        ),
+        use_ssl=settings.s3_secure,
+        verify=settings.s3_secure,
+    )
+
+def head_bucket(timeout: float = 2.0) -> None:
+    """Raises if the bucket is missing or the endpoint does not answer within `timeout`."""
+    _probe_client(timeout).head_bucket(Bucket=settings.s3_bucket)
+
+def head_object(key: str, checksum: bool = False) -> dict:
     s3 = _client()
+    if checksum:
+        return s3.head_object(Bucket=settings.s3_bucket, Key=key, ChecksumMode="ENABLED")
     return s3.head_object(Bucket=settings.s3_bucket, Key=key)
 
+def open_object(key: str):
+    """Streaming body of an object (read it in chunks, close it when done)."""
+    return _client().get_object(Bucket=settings.s3_bucket, Key=key)["Body"]
+
+def put_object(key: str, body: bytes, content_type: Optional[str] = None) -> None:
+    extra = {"ContentType": content_type} if content_type else {}
+    _client().put_object(Bucket=settings.s3_bucket, Key=key, Body=body, **extra)
+
+def delete_objects(keys: List[str]) -> None:
+    s3 = _client()
+    # DeleteObjects takes at most 1000 keys per call
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=settings.s3_bucket,
+            Delete={"Objects": [{"Key": k} for k in keys[i:i + 1000]], "Quiet": True},
+        )
+
 
 def ensure_bucket():
+    from botocore.exceptions import ClientError
+
     s3 = _client()
     try:
         s3.head_bucket(Bucket=settings.s3_bucket)
@@ -57,6 +86,8 @@ def ensure_bucket():
             s3.create_bucket(Bucket=settings.s3_bucket)
 
 def put_bucket_cors(origins: List[str]):
+    from botocore.exceptions import ClientError
+
     s3 = _client()
     cors = {
         "CORSRules": [
@@ -80,6 +111,8 @@ def put_bucket_cors(origins: List[str]):
             raise
 
 def ensure_bucket_with_cors():
+    from botocore.exceptions import ClientError
+
     ensure_bucket()
     try:
         put_bucket_cors([settings.frontend_origin])
@@ -87,13 +120,95 @@ def ensure_bucket_with_cors():
         # As a last resort, never block presign on CORS setup.
         pass
 
-def presign_put(key: str, content_type: Optional[str], expires_seconds: int = 600) -> str:
+def presign_put(
+    key: str, content_type: Optional[str], expires_seconds: int = 600, checksum_sha256: Optional[str] = None
+) -> str:
+    """checksum_sha256 (base64) makes S3 reject a PUT whose body does not hash to it;
+    the client must send it as the x-amz-checksum-sha256 header."""
     s3 = _client()
     params = {"Bucket": settings.s3_bucket, "Key": key}
     if content_type:
         params["ContentType"] = content_type
+    if checksum_sha256:
+        params["ChecksumSHA256"] = checksum_sha256
     return s3.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_seconds)
 
-def presign_get(key: str, expires_seconds: int = 600) -> str:
+def presign_get(key: str, expires_seconds: int = 600, filename: Optional[str] = None) -> str:
     s3 = _client()
-    return s3.generate_presigned_url("get_object", Params={"Bucket": settings.s3_bucket, "Key": key}, ExpiresIn=expires_seconds)
+    params = {"Bucket": settings.s3_bucket, "Key": key}
+    if filename:
+        params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+    return s3.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_seconds)
+
+# S3 rejects multipart parts under 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+class MultipartWriter(io.RawIOBase):
+    """Write-only file object streaming into an S3 multipart upload, one part
+    per `part_size` bytes, so arbitrarily large objects need one part of memory.
+
+    Use as a context manager: a clean exit completes the upload, an exception
+    aborts it (no partial object is ever visible)."""
+
+    def __init__(self, key: str, content_type: Optional[str] = None, part_size: int = 8 * 1024 * 1024):
+        super().__init__()
+        self.key = key
+        self.bytes_written = 0
+        self._s3 = _client()
+        self._part_size = max(part_size, MIN_PART_SIZE)
+        self._buf = bytearray()
+        self._parts: List[dict] = []
+        params = {"Bucket": settings.s3_bucket, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        self._upload_id = self._s3.create_multipart_upload(**params)["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def write(self, b) -> int:
+        self._buf += b
+        self.bytes_written += len(b)
+        while len(self._buf) >= self._part_size:
+            self._upload_part(bytes(self._buf[: self._part_size]))
+            del self._buf[: self._part_size]
+        return len(b)
+
+    def _upload_part(self, data: bytes) -> None:
+        n = len(self._parts) + 1
+        resp = self._s3.upload_part(
+            Bucket=settings.s3_bucket, Key=self.key, UploadId=self._upload_id, PartNumber=n, Body=data
+        )
+        self._parts.append({"ETag": resp["ETag"], "PartNumber": n})
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._buf or not self._parts:
+            self._upload_part(bytes(self._buf))
+            self._buf.clear()
+        self._s3.complete_multipart_upload(
+            Bucket=settings.s3_bucket, Key=self.key, UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        super().close()
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self._s3.abort_multipart_upload(Bucket=settings.s3_bucket, Key=self.key, UploadId=self._upload_id)
+        super().close()
+
+    def __del__(self):
+        # IOBase would close() here, completing a half-written upload; leave it to S3 lifecycle rules
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False